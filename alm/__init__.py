@@ -0,0 +1 @@
+"""Moteurs de calcul des indicateurs ALM, indépendants de Streamlit."""
@@ -0,0 +1,276 @@
+"""Service HTTP des indicateurs ALM (LCR, NSFR, EVE, MNI, change) pour les traitements automatisés.
+
+Chaque indicateur est exposé en ``POST`` (``multipart/form-data``) et
+s'appuie sur les mêmes points d'entrée que les pages (:mod:`alm.calculs`).
+Les fichiers peuvent être des classeurs Excel, des fichiers CSV ou Parquet ;
+les indicateurs qui lisent plusieurs feuilles acceptent soit un champ
+``classeur``, soit un fichier par feuille (champ nommé comme la feuille,
+ex. ``Actifs`` et ``Passifs``). Les autres champs sont des paramètres.
+
+Les calculs s'exécutent dans un pool de processus : la boucle asynchrone ne
+fait que recevoir les fichiers et renvoyer le JSON, plusieurs requêtes sont
+traitées en parallèle. Chaque processus du pool a son propre cache de
+résultats (:data:`alm.cache.cache_resultats`).
+
+- ``POST /lcr``    : ``balance``, ``echeancier``, ``emplois`` ; ``par_blocs``
+- ``POST /nsfr``   : ``classeur`` ou ``Passifs`` + ``Actifs``
+- ``POST /eve``    : ``classeur`` ou une feuille par fichier ; ``amortissement``,
+  ``frequence``, ``maturites`` et ``taux`` (courbe de base, listes séparées par des virgules)
+- ``POST /mni``    : ``classeur`` ou ``Actifs`` + ``Passifs`` ; ``choc_pb``, ``horizon``,
+  ``nb_simulations`` (0 : sans simulation), ``volatilite`` (%), ``graine``
+- ``POST /change`` : ``fichier``, ``historique`` (facultatif) ; ``date_arrete``, ``bornes``
+- ``GET /sante``
+
+Usage : python -m alm.api [--hote 127.0.0.1] [--port 8000] [--processus N]
+"""
+
+import argparse
+import asyncio
+import datetime
+import io
+import math
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+
+import numpy as np
+import pandas as pd
+from starlette.applications import Starlette
+from starlette.datastructures import UploadFile
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from alm.calculs import (
+    change_fichier, delta_eve_fichier, eve_fichier, gap_mni_fichier, lcr_fichiers, nsfr_fichier,
+    simulation_mni_fichier, var_change_fichiers,
+)
+from alm.change import BORNES_MATURITE
+from alm.eve import FEUILLES_EVE, IN_FINE
+from alm.var_change import NIVEAUX
+
+# Courbe de base par défaut des chocs IRRBB (celle de la page EVE)
+MATURITES_COURBE = (1 / 12, 0.25, 0.5, 1, 2, 5, 10, 20, 30)
+TAUX_COURBE = 0.03
+
+
+def en_json(valeur):
+    """Convertit un résultat (DataFrame, Series, scalaires NumPy, dates…) en valeur JSON."""
+    if isinstance(valeur, pd.DataFrame):
+        df = valeur.reset_index() if not isinstance(valeur.index, pd.RangeIndex) else valeur
+        return [{str(c): en_json(v) for c, v in ligne.items()} for ligne in df.to_dict("records")]
+    if isinstance(valeur, pd.Series):
+        return {str(k): en_json(v) for k, v in valeur.items()}
+    if isinstance(valeur, dict):
+        return {str(k): en_json(v) for k, v in valeur.items()}
+    if isinstance(valeur, (list, tuple, np.ndarray)):
+        return [en_json(v) for v in valeur]
+    if isinstance(valeur, np.generic):
+        valeur = valeur.item()
+    if isinstance(valeur, float):
+        return valeur if math.isfinite(valeur) else None
+    if isinstance(valeur, (datetime.date, pd.Timestamp)):
+        return valeur.isoformat()
+    if valeur is None or isinstance(valeur, (bool, int, str)):
+        return valeur
+    return None if pd.isna(valeur) else str(valeur)
+
+
+# Calculs exécutés dans le pool : arguments et résultats doivent être sérialisables
+
+def _lcr(balance, echeancier, emplois, par_blocs):
+    resultat = lcr_fichiers(balance, echeancier, emplois, par_blocs=par_blocs)
+    return {
+        "hqla_par_niveau": resultat.hqla_par_niveau, "total_hqla": resultat.total_hqla,
+        "sorties": resultat.sorties, "entrees": resultat.entrees,
+        "sorties_nettes": resultat.sorties_nettes, "lcr": resultat.lcr,
+    }
+
+
+def _nsfr(sources):
+    resultat = nsfr_fichier(sources)
+    return {
+        "total_asf": resultat.total_asf, "total_rsf": resultat.total_rsf, "nsfr": resultat.nsfr,
+        "asf_par_categorie": resultat.asf_par_categorie, "rsf_par_categorie": resultat.rsf_par_categorie,
+        "ventilation": resultat.ventilation,
+    }
+
+
+def _eve(sources, amortissement, frequence, maturites, taux):
+    _, actifs, passifs, eve, durees = eve_fichier(sources, amortissement, frequence)
+    return {
+        "actifs_actualises": actifs["Valeur actualisée"].sum(),
+        "passifs_actualises": passifs["Valeur actualisée"].sum(),
+        "eve": eve,
+        "delta_eve": delta_eve_fichier(sources, maturites, taux, amortissement, frequence),
+        "durees": durees,
+    }
+
+
+def _mni(sources, choc, horizon, nb_simulations, sigma, graine):
+    mni, mni_choquee, gap = gap_mni_fichier(sources, choc, horizon)
+    reponse = {"mni": mni, "mni_choc": mni_choquee, "gap": gap}
+    if nb_simulations > 0:
+        simulation = simulation_mni_fichier(sources, horizon=horizon, nb_simulations=nb_simulations,
+                                            sigma=sigma, graine=graine)
+        reponse["simulation"] = {
+            "moyenne": simulation.moyenne, "percentiles": simulation.percentiles,
+            "mni_at_risk_95": simulation.mni_at_risk(0.95),
+        }
+    return reponse
+
+
+def _change(fichier, historique, date_arrete, bornes):
+    _, enc, gap = change_fichier(fichier, date_arrete, bornes)
+    reponse = {"enc": enc, "gap": gap}
+    if historique is not None:
+        table, backtest = var_change_fichiers(fichier, historique, date_arrete, bornes)
+        reponse["var_es"] = table
+        if backtest is not None:
+            reponse["backtesting"] = {"niveau": max(NIVEAUX), "jours": len(backtest),
+                                      "exceptions": int(backtest["Exception"].sum())}
+    return reponse
+
+
+def _executer(calcul, arguments):
+    return en_json(calcul(*arguments))
+
+
+# Lecture des requêtes
+
+async def _fichier(formulaire, nom):
+    """Fichier téléversé du champ ``nom`` (objet fichier nommé, comme ceux de Streamlit), ou None."""
+    champ = formulaire.get(nom)
+    if not isinstance(champ, UploadFile):
+        return None
+    fichier = io.BytesIO(await champ.read())
+    fichier.name = champ.filename or nom
+    return fichier
+
+
+async def _fichier_requis(formulaire, nom):
+    fichier = await _fichier(formulaire, nom)
+    if fichier is None:
+        raise ValueError(f"Fichier '{nom}' absent de la requête.")
+    return fichier
+
+
+async def _sources(formulaire, feuilles):
+    """Classeur unique (champ ``classeur``) ou dictionnaire ``{feuille: fichier}``."""
+    classeur = await _fichier(formulaire, "classeur")
+    if classeur is not None:
+        return classeur
+    sources = {}
+    for feuille in feuilles:
+        fichier = await _fichier(formulaire, feuille)
+        if fichier is not None:
+            sources[feuille] = fichier
+    if not sources:
+        raise ValueError(f"Fichier 'classeur' ou fichiers par feuille ({', '.join(feuilles)}) attendus.")
+    return sources
+
+
+def _parametre(formulaire, nom, conversion, defaut):
+    valeur = formulaire.get(nom)
+    if valeur is None or valeur == "":
+        return defaut
+    try:
+        return conversion(valeur)
+    except (TypeError, ValueError):
+        raise ValueError(f"Paramètre '{nom}' invalide : {valeur!r}") from None
+
+
+def _booleen(valeur):
+    return str(valeur).strip().lower() in ("1", "true", "oui", "vrai")
+
+
+def _liste(valeur):
+    return tuple(float(v) for v in str(valeur).split(",") if v.strip())
+
+
+def _date(valeur):
+    return pd.Timestamp(valeur).date()
+
+
+async def _arguments_lcr(formulaire):
+    return (await _fichier_requis(formulaire, "balance"), await _fichier_requis(formulaire, "echeancier"),
+            await _fichier_requis(formulaire, "emplois"), _parametre(formulaire, "par_blocs", _booleen, False))
+
+
+async def _arguments_nsfr(formulaire):
+    return (await _sources(formulaire, ("Passifs", "Actifs")),)
+
+
+async def _arguments_eve(formulaire):
+    maturites = _parametre(formulaire, "maturites", _liste, MATURITES_COURBE)
+    taux = _parametre(formulaire, "taux", _liste, (TAUX_COURBE,) * len(maturites))
+    if len(taux) != len(maturites):
+        raise ValueError("Les paramètres 'maturites' et 'taux' doivent avoir la même longueur.")
+    return (await _sources(formulaire, FEUILLES_EVE), _parametre(formulaire, "amortissement", str, IN_FINE),
+            _parametre(formulaire, "frequence", int, 1), maturites, taux)
+
+
+async def _arguments_mni(formulaire):
+    return (await _sources(formulaire, ("Actifs", "Passifs")),
+            _parametre(formulaire, "choc_pb", float, 100.0) / 10_000,
+            _parametre(formulaire, "horizon", int, 12),
+            _parametre(formulaire, "nb_simulations", int, 0),
+            _parametre(formulaire, "volatilite", float, 1.0) / 100,
+            _parametre(formulaire, "graine", int, 42))
+
+
+async def _arguments_change(formulaire):
+    bornes = _parametre(formulaire, "bornes", _liste, BORNES_MATURITE)
+    return (await _fichier_requis(formulaire, "fichier"), await _fichier(formulaire, "historique"),
+            _parametre(formulaire, "date_arrete", _date, datetime.date.today()), tuple(sorted(bornes)))
+
+
+def _point_entree(calcul, lire_arguments):
+    async def point_entree(request):
+        try:
+            async with request.form() as formulaire:
+                arguments = await lire_arguments(formulaire)
+            boucle = asyncio.get_running_loop()
+            reponse = await boucle.run_in_executor(request.app.state.pool, _executer, calcul, arguments)
+        except (ValueError, KeyError) as e:
+            return JSONResponse({"erreur": str(e)}, status_code=400)
+        except Exception as e:
+            return JSONResponse({"erreur": f"{type(e).__name__} : {e}"}, status_code=500)
+        return JSONResponse(reponse)
+
+    return point_entree
+
+
+async def sante(request):
+    return JSONResponse({"statut": "ok"})
+
+
+def creer_application(processus=None):
+    """Application ASGI ; le pool de ``processus`` est créé au démarrage et arrêté à la fermeture."""
+    @asynccontextmanager
+    async def cycle_de_vie(application):
+        with ProcessPoolExecutor(max_workers=processus) as pool:
+            application.state.pool = pool
+            yield
+
+    return Starlette(routes=[
+        Route("/sante", sante),
+        Route("/lcr", _point_entree(_lcr, _arguments_lcr), methods=["POST"]),
+        Route("/nsfr", _point_entree(_nsfr, _arguments_nsfr), methods=["POST"]),
+        Route("/eve", _point_entree(_eve, _arguments_eve), methods=["POST"]),
+        Route("/mni", _point_entree(_mni, _arguments_mni), methods=["POST"]),
+        Route("/change", _point_entree(_change, _arguments_change), methods=["POST"]),
+    ], lifespan=cycle_de_vie)
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Service HTTP des indicateurs ALM.")
+    parser.add_argument("--hote", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--processus", type=int, default=None, help="taille du pool (défaut : nombre de CPU)")
+    args = parser.parse_args(argv)
+    uvicorn.run(creer_application(args.processus), host=args.hote, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,422 @@
+"""Bac à sable « what-if » : LCR, NSFR, EVE et change recalculés ensemble à chaque modification.
+
+Chaque indicateur est ramené une fois pour toutes à ses contributions
+élémentaires, déjà produites par les calculs complets :
+
+* LCR : montants bruts par niveau HQLA et par catégorie de sorties / d'entrées ;
+* NSFR : montant et montant pondéré par (côté, catégorie, compartiment) ;
+* EVE : flux des jambes fixes déroulés une fois, valeur actualisée par position ;
+* change : soldes par (devise, compartiment, sens) et dernier taux de change.
+
+Une modification (déplacement d'encours entre catégories ou niveaux,
+changement de maturité, choc de taux ou de change) ne touche que les termes
+dont elle dépend : deux cases de contributions, les positions EVE
+concernées, ou la seule réactualisation des flux pour un choc de taux. Seuls
+les indicateurs modifiés sont ensuite réévalués à partir de ces agrégats de
+quelques dizaines de lignes, si bien qu'une modification ne dépend pas de la
+taille des balances.
+"""
+
+from dataclasses import dataclass
+from typing import ClassVar
+
+import numpy as np
+import pandas as pd
+
+from alm.calculs import eve_fichier, lcr_fichiers, nsfr_fichier, sommes_change_fichier
+from alm.change import ACTIF, BORNES_MATURITE, PASSIF, enc_et_gap, libelles_maturite
+from alm.eve import IN_FINE, TAILLE_LOT, VARIABLE, completer_positions, generer_echeancier, valoriser
+from alm.lcr import (DECOTES_HQLA, FEUILLES_LCR, PONDERATIONS_ENTREES, PONDERATIONS_SORTIES, resultat_lcr,
+                     table_ponderations)
+from alm.nsfr import LIBELLES_NSFR, PONDERATIONS_ASF, PONDERATIONS_RSF, ResultatNSFR, ratio_nsfr
+
+LCR, NSFR, EVE, CHANGE = "LCR", "NSFR", "EVE", "Change"
+HQLA, SORTIES, ENTREES = "hqla", "sorties", "entrees"
+SENS_CHANGE = {"actif": ACTIF, "passif": PASSIF}
+
+
+def _verifier_montant(montant, disponible, libelle):
+    if not montant > 0:
+        raise ValueError(f"Le montant déplacé doit être positif (reçu {montant}).")
+    if montant > disponible + 1e-6 * max(abs(disponible), 1.0):
+        raise ValueError(f"Montant déplacé ({montant:,.2f}) supérieur à l'encours de {libelle} "
+                         f"({disponible:,.2f}).")
+
+
+# Modifications : chacune désigne l'indicateur qu'elle touche et l'applique à son état
+
+@dataclass(frozen=True)
+class DeplacementLCR:
+    """Déplace ``montant`` d'un niveau HQLA ou d'une catégorie de sorties / d'entrées vers un autre."""
+    indicateur: ClassVar[str] = LCR
+    cote: str
+    source: object
+    cible: object
+    montant: float
+
+    def appliquer(self, etat):
+        etat.deplacer(self.cote, self.source, self.cible, self.montant)
+
+
+@dataclass(frozen=True)
+class DeplacementNSFR:
+    """Déplace ``montant`` d'une case (catégorie, compartiment) ; même catégorie : changement de maturité."""
+    indicateur: ClassVar[str] = NSFR
+    cote: str
+    categorie_source: str
+    compartiment_source: str
+    categorie_cible: str
+    compartiment_cible: str
+    montant: float
+
+    def appliquer(self, etat):
+        etat.deplacer(self.cote, (self.categorie_source, self.compartiment_source),
+                      (self.categorie_cible, self.compartiment_cible), self.montant)
+
+
+@dataclass(frozen=True)
+class MaturiteEVE:
+    """Nouvelle maturité (années) des positions EVE d'indices ``positions``."""
+    indicateur: ClassVar[str] = EVE
+    positions: tuple
+    maturite: float
+
+    def appliquer(self, etat):
+        etat.changer_maturite(self.positions, self.maturite)
+
+
+@dataclass(frozen=True)
+class ChocTaux:
+    """Choc parallèle (taux décimal) ajouté aux taux d'actualisation ; remplace le choc précédent."""
+    indicateur: ClassVar[str] = EVE
+    choc: float
+
+    def appliquer(self, etat):
+        etat.choquer(self.choc)
+
+
+@dataclass(frozen=True)
+class DeplacementChange:
+    """Déplace ``montant`` de soldes d'un sens (actif / passif) entre couples (devise, compartiment)."""
+    indicateur: ClassVar[str] = CHANGE
+    sens: str
+    devise_source: str
+    compartiment_source: str
+    devise_cible: str
+    compartiment_cible: str
+    montant: float
+
+    def appliquer(self, etat):
+        etat.deplacer(self.sens, (self.devise_source, self.compartiment_source),
+                      (self.devise_cible, self.compartiment_cible), self.montant)
+
+
+@dataclass(frozen=True)
+class ChocChange:
+    """Variation relative du taux de change de ``devise`` ; remplace le choc précédent sur cette devise."""
+    indicateur: ClassVar[str] = CHANGE
+    devise: str
+    variation: float
+
+    def appliquer(self, etat):
+        etat.choquer(self.devise, self.variation)
+
+
+# États des indicateurs
+
+class EtatLCR:
+    """Montants bruts par niveau HQLA et par catégorie, dans l'ordre des tables de pondération."""
+
+    def __init__(self, montants_hqla, montants_sorties, montants_entrees):
+        self.index = {
+            HQLA: pd.Index(list(DECOTES_HQLA), dtype=object),
+            SORTIES: pd.Index(table_ponderations(PONDERATIONS_SORTIES)[0]),
+            ENTREES: pd.Index(table_ponderations(PONDERATIONS_ENTREES)[0]),
+        }
+        self.montants = {
+            HQLA: np.array(montants_hqla, dtype=np.float64),
+            SORTIES: np.array(montants_sorties, dtype=np.float64),
+            ENTREES: np.array(montants_entrees, dtype=np.float64),
+        }
+
+    @classmethod
+    def depuis_resultat(cls, resultat):
+        hqla = [resultat.hqla_par_niveau[niveau] / decote for niveau, decote in DECOTES_HQLA.items()]
+        return cls(hqla, resultat.detail_sorties["Montant"], resultat.detail_entrees["Montant"])
+
+    def _position(self, cote, cle):
+        if cote not in self.index:
+            raise ValueError(f"Côté LCR inconnu : {cote} (attendu : {', '.join(self.index)})")
+        position = self.index[cote].get_indexer([cle])[0]
+        if position < 0:
+            raise ValueError(f"'{cle}' n'est pas un niveau ou une catégorie {cote} du LCR.")
+        return position
+
+    def deplacer(self, cote, source, cible, montant):
+        source, cible = self._position(cote, source), self._position(cote, cible)
+        montants = self.montants[cote]
+        _verifier_montant(montant, montants[source], f"{self.index[cote][source]}")
+        montants[source] -= montant
+        montants[cible] += montant
+
+    def resultat(self):
+        return resultat_lcr(self.montants[HQLA], self.montants[SORTIES], self.montants[ENTREES])
+
+
+class EtatNSFR:
+    """Montant et montant pondéré par case (côté, catégorie, compartiment de maturité résiduelle).
+
+    La pondération d'une case est sa pondération moyenne (part grevée
+    comprise) ; une case absente de la balance reçoit la pondération CRR2 de
+    sa catégorie et de son compartiment, hors charge.
+    """
+
+    def __init__(self, ventilation):
+        self.cases = {
+            (cote, categorie, str(compartiment)): [montant, pondere]
+            for (cote, categorie, compartiment), montant, pondere
+            in zip(ventilation.index, ventilation["Montant (€)"], ventilation["Montant pondéré"])
+        }
+
+    @classmethod
+    def depuis_resultat(cls, resultat):
+        return cls(resultat.ventilation)
+
+    def ponderation(self, cote, categorie, compartiment):
+        case = self.cases.get((cote, categorie, compartiment))
+        if case is not None and case[0] != 0:
+            return case[1] / case[0]
+        table = PONDERATIONS_ASF if cote == "ASF" else PONDERATIONS_RSF
+        if categorie not in table or compartiment not in LIBELLES_NSFR:
+            raise ValueError(f"Pas de pondération {cote} pour ({categorie}, {compartiment}).")
+        return table[categorie][LIBELLES_NSFR.index(compartiment)]
+
+    def deplacer(self, cote, source, cible, montant):
+        if cote not in ("ASF", "RSF"):
+            raise ValueError(f"Côté NSFR inconnu : {cote} (attendu : ASF ou RSF)")
+        case_source = self.cases.get((cote, *source))
+        if case_source is None:
+            raise ValueError(f"Aucun encours {cote} en ({source[0]}, {source[1]}).")
+        _verifier_montant(montant, case_source[0], f"({source[0]}, {source[1]})")
+        ponderation_source = self.ponderation(cote, *source)
+        ponderation_cible = self.ponderation(cote, *cible)
+        case_source[0] -= montant
+        case_source[1] -= montant * ponderation_source
+        case_cible = self.cases.setdefault((cote, *cible), [0.0, 0.0])
+        case_cible[0] += montant
+        case_cible[1] += montant * ponderation_cible
+
+    def resultat(self):
+        ventilation = pd.DataFrame(
+            list(self.cases.values()), columns=["Montant (€)", "Montant pondéré"],
+            index=pd.MultiIndex.from_tuples(list(self.cases), names=["Côté", "Catégorie", "Compartiment"]),
+        )
+        par_cote = ventilation["Montant pondéré"].groupby(level=["Côté", "Catégorie"], sort=False).sum()
+        asf = par_cote.get("ASF", pd.Series(dtype=np.float64)).rename("ASF")
+        rsf = par_cote.get("RSF", pd.Series(dtype=np.float64)).rename("RSF")
+        total_asf, total_rsf = float(asf.sum()), float(rsf.sum())
+        return ResultatNSFR(asf, rsf, total_asf, total_rsf, ratio_nsfr(total_asf, total_rsf), ventilation)
+
+
+@dataclass
+class ResultatEVE:
+    valeur_actifs: float
+    valeur_passifs: float
+    eve: float
+    par_feuille: pd.Series
+
+
+class EtatEVE:
+    """Valeurs actualisées par position, chaque position étant actualisée à son taux plus le choc courant.
+
+    Les flux des jambes fixes ne dépendent pas des taux : ils sont déroulés
+    une fois et un choc de taux ne fait que les réactualiser. Les jambes
+    variables et les positions dont la maturité a été modifiée sont
+    redéroulées à part, à chaque modification qui les concerne.
+    """
+
+    def __init__(self, positions, taille_lot=TAILLE_LOT):
+        self.positions = completer_positions(positions).reset_index(drop=True)
+        self.taux = self.positions["Taux d'actualisation"].to_numpy(dtype=np.float64)
+        self.signe = np.where(self.positions["Côté"].to_numpy() == "passif", -1.0, 1.0)
+        self.code_feuille, self.feuilles = pd.factorize(self.positions["Feuille"])
+        self.choc = 0.0
+        self.maturites = {}
+        # Positions dont les flux sont redéroulés à chaque valorisation
+        self.hors_base = (self.positions["Jambe"] == VARIABLE).to_numpy(copy=True)
+
+        fixes = np.flatnonzero(~self.hors_base)
+        position, temps, flux = [np.empty(0, dtype=np.int64)], [np.empty(0)], [np.empty(0)]
+        for debut in range(0, len(fixes), taille_lot):
+            lot = fixes[debut:debut + taille_lot]
+            echeancier = generer_echeancier(self.positions.iloc[lot])
+            position.append(lot[echeancier.position])
+            temps.append(echeancier.temps)
+            flux.append(echeancier.flux)
+        self._position, self._temps, self._flux = np.concatenate(position), np.concatenate(temps), np.concatenate(flux)
+        self._actualiser()
+
+    def _rederouler(self, indices):
+        """Valeurs actualisées des positions ``indices``, flux redéroulés avec maturités et choc courants."""
+        if not len(indices):
+            return np.empty(0)
+        sous_positions = self.positions.iloc[indices].copy()
+        sous_positions["Maturité"] = [self.maturites.get(int(position), maturite)
+                                      for position, maturite in zip(indices, sous_positions["Maturité"])]
+        return valoriser(sous_positions, self.taux[indices] + self.choc)["Valeur actualisée"].to_numpy()
+
+    def _actualiser(self):
+        """Réactualise tous les flux de base au choc courant, puis redéroule les positions hors base."""
+        # Un logarithme par position plutôt que par flux
+        log_taux = np.log1p(self.taux + self.choc)
+        facteurs = np.exp(-self._temps * log_taux[self._position])
+        self.valeurs = np.bincount(self._position, weights=self._flux * facteurs, minlength=len(self.positions))
+        autres = np.flatnonzero(self.hors_base)
+        self.valeurs[autres] = self._rederouler(autres)
+
+    def choquer(self, choc):
+        self.choc = float(choc)
+        self._actualiser()
+
+    def changer_maturite(self, positions, maturite):
+        indices = np.unique(np.asarray(positions, dtype=np.int64))
+        if not len(indices) or indices[0] < 0 or indices[-1] >= len(self.positions):
+            raise ValueError("Positions EVE invalides.")
+        if not maturite > 0:
+            raise ValueError(f"La maturité doit être positive (reçu {maturite}).")
+        for position in indices:
+            self.maturites[int(position)] = float(maturite)
+        # Les flux de base de ces positions (contigus, triés par position) ne comptent plus
+        debuts, fins = np.searchsorted(self._position, indices), np.searchsorted(self._position, indices, side="right")
+        for debut, fin in zip(debuts, fins):
+            self._flux[debut:fin] = 0.0
+        self.hors_base[indices] = True
+        self.valeurs[indices] = self._rederouler(indices)
+
+    def resultat(self):
+        signees = self.valeurs * self.signe
+        actifs = float(self.valeurs[self.signe > 0].sum())
+        passifs = float(self.valeurs[self.signe < 0].sum())
+        par_feuille = pd.Series(np.bincount(self.code_feuille, weights=signees, minlength=len(self.feuilles)),
+                                index=pd.Index(self.feuilles, name="Feuille"), name="Valeur actualisée")
+        return ResultatEVE(actifs, passifs, actifs - passifs, par_feuille)
+
+
+@dataclass
+class ResultatChange:
+    enc: pd.Series
+    gap: pd.DataFrame
+    enc_devise_locale: pd.Series
+    impact_chocs: float
+
+
+class EtatChange:
+    """Soldes par (devise, compartiment, sens) et chocs relatifs des taux de change par devise."""
+
+    def __init__(self, devises, sommes, presents, taux, bornes=BORNES_MATURITE):
+        self.devises = devises
+        self.sommes = np.array(sommes, dtype=np.float64)
+        self.presents = np.array(presents, dtype=bool)
+        self.libelles = libelles_maturite(bornes)
+        self.taux = taux.reindex(devises).fillna(1.0).to_numpy(dtype=np.float64)
+        self.chocs = np.zeros(len(devises))
+
+    def _devise(self, devise):
+        position = self.devises.get_indexer([devise])[0]
+        if position < 0:
+            raise ValueError(f"Devise absente de la balance : {devise}")
+        return position
+
+    def _case(self, devise, compartiment):
+        if compartiment not in self.libelles:
+            raise ValueError(f"Compartiment de maturité inconnu : {compartiment}")
+        return self._devise(devise), self.libelles.index(compartiment) + 1
+
+    def deplacer(self, sens, source, cible, montant):
+        if sens not in SENS_CHANGE:
+            raise ValueError(f"Sens inconnu : {sens} (attendu : actif ou passif)")
+        sens = SENS_CHANGE[sens]
+        case_source, case_cible = (*self._case(*source), sens), (*self._case(*cible), sens)
+        _verifier_montant(montant, abs(self.sommes[case_source]), f"{source[0]} {source[1]}")
+        # Le solde déplacé garde son signe
+        montant = np.copysign(montant, self.sommes[case_source])
+        self.sommes[case_source] -= montant
+        self.sommes[case_cible] += montant
+        self.presents[case_cible[0], case_cible[1] - 1] = True
+
+    def choquer(self, devise, variation):
+        self.chocs[self._devise(devise)] = float(variation)
+
+    def resultat(self):
+        enc, gap = enc_et_gap(self.devises, self.sommes, self.presents, self.libelles)
+        base = enc.to_numpy() * self.taux
+        enc_locale = pd.Series(base * (1 + self.chocs), index=self.devises, name="ENC en devise locale")
+        return ResultatChange(enc, gap, enc_locale, float(np.dot(base, self.chocs)))
+
+
+# Bac à sable
+
+def _indicateurs_cles(nom, resultat):
+    """Chiffres de la synthèse : {libellé: valeur} pour un indicateur."""
+    if nom == LCR:
+        return {"LCR (%)": resultat.lcr, "HQLA": resultat.total_hqla, "Sorties nettes": resultat.sorties_nettes}
+    if nom == NSFR:
+        return {"NSFR": resultat.nsfr, "ASF": resultat.total_asf, "RSF": resultat.total_rsf}
+    if nom == EVE:
+        return {"EVE": resultat.eve}
+    return {"ENC (devise locale)": float(resultat.enc_devise_locale.sum()),
+            "Impact des chocs de change": resultat.impact_chocs}
+
+
+class BacASable:
+    """États des indicateurs, modifications appliquées et résultats recalculés à la demande.
+
+    Une modification ne marque comme périmé que l'indicateur qu'elle touche ;
+    :meth:`resultats` ne réévalue que les indicateurs périmés.
+    """
+
+    def __init__(self, lcr=None, nsfr=None, eve=None, change=None):
+        self.etats = {nom: etat for nom, etat in ((LCR, lcr), (NSFR, nsfr), (EVE, eve), (CHANGE, change))
+                      if etat is not None}
+        self.base = {nom: etat.resultat() for nom, etat in self.etats.items()}
+        self._resultats = dict(self.base)
+        self._perimes = set()
+        self.journal = []
+
+    def appliquer(self, modification):
+        etat = self.etats.get(modification.indicateur)
+        if etat is None:
+            raise ValueError(f"Indicateur {modification.indicateur} absent du bac à sable.")
+        modification.appliquer(etat)
+        self._perimes.add(modification.indicateur)
+        self.journal.append(modification)
+
+    def resultats(self):
+        for nom in self._perimes:
+            self._resultats[nom] = self.etats[nom].resultat()
+        self._perimes.clear()
+        return dict(self._resultats)
+
+    def synthese(self):
+        """Chiffres clés de chaque indicateur : base, scénario et écart."""
+        lignes = []
+        for nom, resultat in self.resultats().items():
+            base = _indicateurs_cles(nom, self.base[nom])
+            for libelle, valeur in _indicateurs_cles(nom, resultat).items():
+                lignes.append((nom, libelle, base[libelle], valeur, valeur - base[libelle]))
+        return pd.DataFrame(lignes, columns=["Indicateur", "Mesure", "Base", "Scénario", "Écart"])
+
+
+def creer_bac_a_sable(fichiers_lcr=None, fichier_nsfr=None, fichier_eve=None, fichier_change=None,
+                      date_arrete=None, bornes=BORNES_MATURITE, amortissement=IN_FINE, frequence=1,
+                      feuilles_lcr=FEUILLES_LCR):
+    """Bac à sable des indicateurs dont les fichiers sont fournis (calculs complets repris du cache)."""
+    lcr = EtatLCR.depuis_resultat(lcr_fichiers(*fichiers_lcr, feuilles_lcr)) if fichiers_lcr else None
+    nsfr = EtatNSFR.depuis_resultat(nsfr_fichier(fichier_nsfr)) if fichier_nsfr is not None else None
+    eve = EtatEVE(eve_fichier(fichier_eve, amortissement, frequence)[0]) if fichier_eve is not None else None
+    change = None
+    if fichier_change is not None:
+        if date_arrete is None:
+            raise ValueError("Une date d'arrêté est nécessaire pour le change.")
+        change = EtatChange(*sommes_change_fichier(fichier_change, date_arrete, bornes), bornes=bornes)
+    return BacASable(lcr, nsfr, eve, change)
@@ -0,0 +1,144 @@
+"""Calcul du LCR en lot sur de nombreuses dates d'arrêté et entités.
+
+Le répertoire d'entrée contient un instantané par couple (date, entité),
+chaque fichier étant nommé ``<type>_<AAAAMMJJ>_<entité>.<ext>`` :
+
+- ``balance_20211231_Paris.xlsx``    (feuille "Balance")
+- ``echeancier_20211231_Paris.xlsx`` (feuille "LDSCHED_20211231")
+- ``emplois_20211231_Paris.xlsx``    (feuille "Feuil1")
+
+Les formats CSV et Parquet sont aussi acceptés. Les instantanés sont
+répartis sur un pool de processus et les résultats écrits dans une série
+temporelle unique (Parquet ou CSV selon l'extension de sortie).
+
+Usage : python -m alm.batch_lcr REPERTOIRE --sortie lcr.parquet [--processus N]
+"""
+
+import argparse
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import pandas as pd
+
+from alm.ingestion import lire_table
+from alm.lcr import COLONNES_BALANCE, COLONNES_FLUX, calculer_lcr
+
+_MOTIF_FICHIER = re.compile(
+    r"^(balance|echeancier|emplois)_(\d{8})_(.+)\.(xlsx|xlsm|csv|parquet)$", re.IGNORECASE
+)
+TYPES_FICHIERS = ("balance", "echeancier", "emplois")
+
+
+@dataclass
+class Instantane:
+    date: pd.Timestamp
+    entite: str
+    balance: Path = None
+    echeancier: Path = None
+    emplois: Path = None
+
+    def feuilles(self):
+        """Feuilles Excel lues pour cet instantané (balance, échéancier, emplois)."""
+        return "Balance", f"LDSCHED_{self.date:%Y%m%d}", "Feuil1"
+
+
+def lister_instantanes(repertoire):
+    """Regroupe les fichiers du répertoire par (date, entité), triés chronologiquement."""
+    instantanes = {}
+    for chemin in sorted(Path(repertoire).iterdir()):
+        correspondance = _MOTIF_FICHIER.match(chemin.name)
+        if not correspondance:
+            continue
+        type_fichier, date, entite, _ = correspondance.groups()
+        cle = (pd.Timestamp(date), entite)
+        instantane = instantanes.setdefault(cle, Instantane(*cle))
+        setattr(instantane, type_fichier.lower(), chemin)
+    return [instantanes[cle] for cle in sorted(instantanes)]
+
+
+def calculer_instantane(instantane):
+    """Calcule le LCR d'un instantané ; les erreurs sont rapportées dans la colonne ``erreur``."""
+    ligne = {"date": instantane.date, "entite": instantane.entite}
+    manquants = [t for t in TYPES_FICHIERS if getattr(instantane, t) is None]
+    if manquants:
+        return {**ligne, "erreur": f"Fichiers manquants : {', '.join(manquants)}"}
+    try:
+        feuille_balance, feuille_echeancier, feuille_emplois = instantane.feuilles()
+        resultat = calculer_lcr(
+            lire_table(instantane.balance, feuille_balance, COLONNES_BALANCE),
+            lire_table(instantane.echeancier, feuille_echeancier, COLONNES_FLUX),
+            lire_table(instantane.emplois, feuille_emplois, COLONNES_FLUX),
+        )
+    except Exception as e:
+        return {**ligne, "erreur": str(e)}
+    return {
+        **ligne,
+        "lcr": resultat.lcr,
+        **{f"hqla_niveau_{niveau}": montant for niveau, montant in resultat.hqla_par_niveau.items()},
+        "total_hqla": resultat.total_hqla,
+        "sorties": resultat.sorties,
+        "entrees": resultat.entrees,
+        "sorties_nettes": resultat.sorties_nettes,
+        "erreur": None,
+    }
+
+
+def executer_lot(repertoire, sortie=None, processus=None):
+    """Calcule le LCR de tous les instantanés du répertoire en parallèle.
+
+    Retourne ``(series, statistiques)`` : la série temporelle (une ligne par
+    date et entité) et un dictionnaire avec la durée et le débit en
+    instantanés par seconde. Si ``sortie`` est fourni, la série y est écrite.
+    """
+    instantanes = lister_instantanes(repertoire)
+    debut = time.perf_counter()
+    if processus == 1 or len(instantanes) <= 1:
+        lignes = [calculer_instantane(i) for i in instantanes]
+    else:
+        with ProcessPoolExecutor(max_workers=processus) as pool:
+            lignes = list(pool.map(calculer_instantane, instantanes))
+    duree = time.perf_counter() - debut
+
+    series = pd.DataFrame(lignes, columns=[
+        "date", "entite", "lcr", "hqla_niveau_1", "hqla_niveau_2a", "hqla_niveau_2b",
+        "total_hqla", "sorties", "entrees", "sorties_nettes", "erreur",
+    ])
+    if sortie is not None:
+        ecrire_series(series, sortie)
+    statistiques = {
+        "instantanes": len(instantanes),
+        "erreurs": int(series["erreur"].notna().sum()),
+        "duree_s": duree,
+        "instantanes_par_s": len(instantanes) / duree if duree > 0 else float("inf"),
+    }
+    return series, statistiques
+
+
+def ecrire_series(series, sortie):
+    """Écrit la série en Parquet ou en CSV selon l'extension de ``sortie``."""
+    sortie = Path(sortie)
+    if sortie.suffix.lower() == ".csv":
+        series.to_csv(sortie, index=False)
+    else:
+        series.to_parquet(sortie, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calcul du LCR en lot par date d'arrêté et entité.")
+    parser.add_argument("repertoire", help="répertoire des instantanés balance/echeancier/emplois")
+    parser.add_argument("--sortie", default="lcr_series.parquet", help="fichier de sortie (.parquet ou .csv)")
+    parser.add_argument("--processus", type=int, default=None, help="taille du pool (défaut : nombre de CPU)")
+    args = parser.parse_args(argv)
+
+    series, statistiques = executer_lot(args.repertoire, args.sortie, args.processus)
+    print(f"{statistiques['instantanes']} instantanés en {statistiques['duree_s']:.2f} s "
+          f"({statistiques['instantanes_par_s']:.2f} instantanés/s), {statistiques['erreurs']} en erreur")
+    print(f"Série écrite dans {args.sortie}")
+    return 1 if statistiques["erreurs"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
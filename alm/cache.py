@@ -0,0 +1,157 @@
+"""Cache mémoire des résultats de calcul, partagé par toutes les sessions du processus.
+
+Les résultats sont indexés par le nom de la fonction et une clé construite à
+partir des arguments : les fichiers (objets fichier ou chemins, y compris
+en chaîne) sont identifiés par l'empreinte SHA-256 de leur contenu, les DataFrames et tableaux par un hachage de leurs valeurs.
+Chaque entrée expire après ``ttl`` secondes et le cache est borné en
+mémoire : les entrées les moins récemment utilisées sont évincées en premier.
+
+Les résultats mis en cache sont partagés : l'appelant ne doit pas les modifier.
+"""
+
+import dataclasses
+import functools
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from alm.ingestion import empreinte
+
+TAILLE_MAX_RESULTATS = int(os.environ.get("ALM_CACHE_RESULTATS_TAILLE_MAX", 512 * 1024 ** 2))
+TTL_RESULTATS = float(os.environ.get("ALM_CACHE_RESULTATS_TTL", 3600))
+
+
+def taille_memoire(valeur):
+    """Estimation (en octets) de la mémoire occupée par un résultat."""
+    if isinstance(valeur, pd.DataFrame):
+        return int(valeur.memory_usage(deep=True).sum())
+    if isinstance(valeur, (pd.Series, pd.Index)):
+        return int(valeur.memory_usage(deep=True))
+    if isinstance(valeur, np.ndarray):
+        return valeur.nbytes
+    if dataclasses.is_dataclass(valeur) and not isinstance(valeur, type):
+        return sum(taille_memoire(getattr(valeur, f.name)) for f in dataclasses.fields(valeur))
+    if isinstance(valeur, dict):
+        return sys.getsizeof(valeur) + sum(taille_memoire(k) + taille_memoire(v) for k, v in valeur.items())
+    if isinstance(valeur, (list, tuple)):
+        return sys.getsizeof(valeur) + sum(taille_memoire(v) for v in valeur)
+    if hasattr(valeur, "__slots__"):
+        return sum(taille_memoire(getattr(valeur, nom, None)) for nom in valeur.__slots__)
+    return sys.getsizeof(valeur)
+
+
+def cle_argument(valeur):
+    """Représentation hachable et stable d'un argument de calcul.
+
+    Une chaîne qui désigne un fichier existant est un chemin : elle est
+    identifiée, comme un ``os.PathLike``, par l'empreinte du contenu.
+    """
+    if isinstance(valeur, str) and os.path.isfile(valeur):
+        return "fichier", empreinte(valeur)
+    if valeur is None or isinstance(valeur, (bool, int, float, str, bytes)):
+        return valeur
+    if isinstance(valeur, (pd.DataFrame, pd.Series)):
+        valeurs = pd.util.hash_pandas_object(valeur, index=True).to_numpy()
+        colonnes = tuple(map(str, valeur.columns)) if isinstance(valeur, pd.DataFrame) else valeur.name
+        return type(valeur).__name__, colonnes, hashlib.sha256(valeurs.tobytes()).hexdigest()
+    if isinstance(valeur, np.ndarray):
+        condensat = hashlib.sha256(np.ascontiguousarray(valeur).tobytes()).hexdigest()
+        return "ndarray", valeur.dtype.str, valeur.shape, condensat
+    if isinstance(valeur, (list, tuple)):
+        return tuple(cle_argument(v) for v in valeur)
+    if isinstance(valeur, dict):
+        return tuple(sorted((str(k), cle_argument(v)) for k, v in valeur.items()))
+    if isinstance(valeur, (os.PathLike, bytearray)) or hasattr(valeur, "getvalue") or hasattr(valeur, "read"):
+        return "fichier", empreinte(valeur)
+    return repr(valeur)
+
+
+class CacheResultats:
+    """Cache LRU borné en mémoire, avec expiration, sûr entre threads."""
+
+    def __init__(self, taille_max=TAILLE_MAX_RESULTATS, ttl=TTL_RESULTATS):
+        self.taille_max = taille_max
+        self.ttl = ttl
+        self.entrees = OrderedDict()  # clé -> (expiration, taille, valeur)
+        self.taille = 0
+        self.succes = 0
+        self.echecs = 0
+        self._verrou = threading.RLock()
+
+    def lire(self, cle):
+        """Valeur en cache, ou None si absente ou expirée."""
+        with self._verrou:
+            entree = self.entrees.get(cle)
+            if entree is None or entree[0] < time.monotonic():
+                if entree is not None:
+                    self._supprimer(cle)
+                self.echecs += 1
+                return None
+            self.entrees.move_to_end(cle)
+            self.succes += 1
+            return entree[2]
+
+    def ecrire(self, cle, valeur, ttl=None):
+        taille = taille_memoire(valeur)
+        if taille > self.taille_max:
+            return  # trop volumineux pour être conservé
+        with self._verrou:
+            if cle in self.entrees:
+                self._supprimer(cle)
+            self.entrees[cle] = (time.monotonic() + (self.ttl if ttl is None else ttl), taille, valeur)
+            self.taille += taille
+            self.evincer()
+
+    def evincer(self):
+        """Supprime les entrées expirées, puis les moins récemment utilisées au-delà de ``taille_max``."""
+        with self._verrou:
+            maintenant = time.monotonic()
+            for cle in [c for c, (expiration, _, _) in self.entrees.items() if expiration < maintenant]:
+                self._supprimer(cle)
+            while self.taille > self.taille_max and self.entrees:
+                self._supprimer(next(iter(self.entrees)))
+
+    def vider(self):
+        with self._verrou:
+            self.entrees.clear()
+            self.taille = 0
+
+    def _supprimer(self, cle):
+        _, taille, _ = self.entrees.pop(cle)
+        self.taille -= taille
+
+    def statistiques(self):
+        with self._verrou:
+            return {"entrees": len(self.entrees), "taille": self.taille, "succes": self.succes, "echecs": self.echecs}
+
+
+cache_resultats = CacheResultats()
+
+
+def memoiser(fonction=None, *, cache=None, ttl=None):
+    """Décorateur : met en cache le résultat selon les arguments (fichiers par contenu).
+
+    Le cache utilisé par défaut est :data:`cache_resultats`, commun au
+    processus ; ``fonction.sans_cache`` appelle la fonction d'origine.
+    """
+    def decorer(f):
+        @functools.wraps(f)
+        def enveloppe(*args, **kwargs):
+            utilise = cache if cache is not None else cache_resultats
+            cle = (f.__module__, f.__qualname__, cle_argument(args), cle_argument(kwargs))
+            resultat = utilise.lire(cle)
+            if resultat is None:
+                resultat = f(*args, **kwargs)
+                utilise.ecrire(cle, resultat, ttl)
+            return resultat
+
+        enveloppe.sans_cache = f
+        return enveloppe
+
+    return decorer(fonction) if fonction is not None else decorer
@@ -0,0 +1,175 @@
+"""Points d'entrée des calculateurs à partir des fichiers d'entrée, avec cache des résultats.
+
+Chaque fonction lit ses fichiers et lance le calcul complet d'un indicateur ;
+le résultat est conservé dans :data:`alm.cache.cache_resultats`, indexé par le
+contenu des fichiers et les paramètres. Un rerun de page, une autre session
+ou un autre client qui soumet les mêmes entrées obtient le résultat sans
+recalcul.
+
+Les fichiers peuvent être des classeurs Excel, ou des fichiers CSV / Parquet ;
+pour les indicateurs qui lisent plusieurs feuilles d'un classeur, on passe
+alors un dictionnaire ``{feuille: fichier}``. Les ajustements manuels
+(forçage des HQLA, des sorties, etc.) ne font pas partie de la clé : ils
+s'appliquent ensuite au seul calcul du ratio.
+"""
+
+from alm.cache import memoiser
+from alm.change import BORNES_MATURITE, COLONNE_ECHEANCE, COLONNES_CHANGE, derniers_taux, sommes_change, ventiler_change
+from alm.echelle_liquidite import echelle_liquidite
+from alm.eve import IN_FINE, CourbeTaux, calculer_eve, positions_depuis_classeur
+from alm.eve_scenarios import delta_eve
+from alm.eve_sensibilites import sensibilites_eve
+from alm.ingestion import lire_sources, lire_table
+from alm.instrumentation import Chronometre, etape
+from alm.lcr import COLONNE_NIVEAU, COLONNES_BALANCE, COLONNES_FLUX, FEUILLES_LCR, calculer_lcr, calculer_lcr_par_blocs
+from alm.mni import COLONNES_MNI, Banque, PositionsMNI
+from alm.mni_simulation import parametres_categories, simuler_mni
+from alm.nsfr import COLONNES_ACTIFS, COLONNES_PASSIFS, calculer_nsfr
+from alm.stress_change import appliquer_chocs, chocs_historiques, chocs_unitaires, matrice_expositions
+from alm.var_change import (FENETRE, NIVEAUX, expositions, historique_taux, pnl_portefeuille, rendements, var_es,
+                             var_glissante)
+
+
+@memoiser
+def lcr_fichiers(fichier_balance, fichier_echeancier, fichier_emplois, feuilles=FEUILLES_LCR, par_blocs=False):
+    """:class:`~alm.lcr.ResultatLCR` des trois fichiers (lecture par blocs si ``par_blocs``)."""
+    if par_blocs:
+        return calculer_lcr_par_blocs(fichier_balance, fichier_echeancier, fichier_emplois, feuilles)
+    feuille_balance, feuille_echeancier, feuille_emplois = feuilles
+    df_balance = lire_table(fichier_balance, feuille_balance, COLONNES_BALANCE)
+    if COLONNE_NIVEAU not in df_balance.columns:
+        raise ValueError(f"La colonne '{COLONNE_NIVEAU}' est absente dans le fichier de balance.")
+    return calculer_lcr(
+        df_balance,
+        lire_table(fichier_echeancier, feuille_echeancier, COLONNES_FLUX),
+        lire_table(fichier_emplois, feuille_emplois, COLONNES_FLUX),
+    )
+
+
+@memoiser
+def echelle_liquidite_fichiers(fichier_balance, fichier_echeancier, fichier_emplois, date_arrete,
+                               feuilles=FEUILLES_LCR):
+    """:class:`~alm.echelle_liquidite.EchelleLiquidite` de l'échéancier et des emplois interbancaires."""
+    feuille_balance, feuille_echeancier, feuille_emplois = feuilles
+    dfs_flux = [lire_table(fichier, feuille, COLONNES_FLUX + [COLONNE_ECHEANCE])
+                for fichier, feuille in [(fichier_echeancier, feuille_echeancier), (fichier_emplois, feuille_emplois)]]
+    if any(COLONNE_ECHEANCE not in df.columns for df in dfs_flux):
+        raise ValueError(f"La colonne '{COLONNE_ECHEANCE}' est absente de l'échéancier ou des emplois interbancaires.")
+    return echelle_liquidite(lire_table(fichier_balance, feuille_balance, COLONNES_BALANCE), dfs_flux, date_arrete)
+
+
+@memoiser
+def nsfr_fichier(fichier):
+    """:class:`~alm.nsfr.ResultatNSFR` d'un classeur Actifs / Passifs."""
+    feuilles = lire_sources(fichier, {"Passifs": COLONNES_PASSIFS, "Actifs": COLONNES_ACTIFS})
+    return calculer_nsfr(feuilles["Passifs"], feuilles["Actifs"])
+
+
+@memoiser
+def eve_fichier(fichier, amortissement=IN_FINE, frequence=1):
+    """``(positions, actifs, passifs, eve, durees)`` : valorisation des positions du classeur EVE.
+
+    ``durees`` est le tableau des temps par étape du calcul d'origine.
+    """
+    chronometre = Chronometre()
+    positions = positions_depuis_classeur(fichier, chronometre=chronometre)
+    positions["Amortissement"] = amortissement
+    positions["Fréquence"] = frequence
+    with chronometre.etape("actualisation"):
+        actifs, passifs, eve = calculer_eve(positions)
+    return positions, actifs, passifs, eve, chronometre.tableau()
+
+
+@memoiser
+def delta_eve_fichier(fichier, maturites, taux, amortissement=IN_FINE, frequence=1):
+    """Table des ΔEVE sous les chocs de Bâle autour de la courbe (``maturites``, ``taux``)."""
+    positions = eve_fichier(fichier, amortissement, frequence)[0]
+    return delta_eve(positions, CourbeTaux(maturites, taux))
+
+
+@memoiser
+def sensibilites_eve_fichier(fichier, amortissement=IN_FINE, frequence=1):
+    """:class:`~alm.eve_sensibilites.SensibilitesEVE` des positions, actualisées à leur propre taux."""
+    positions = eve_fichier(fichier, amortissement, frequence)[0]
+    return sensibilites_eve(positions)
+
+
+@memoiser
+def feuilles_mni(fichier):
+    """``(actifs, passifs)`` du classeur MNI."""
+    feuilles = lire_sources(fichier, {"Actifs": COLONNES_MNI, "Passifs": COLONNES_MNI})
+    return feuilles["Actifs"], feuilles["Passifs"]
+
+
+@memoiser
+def gap_mni_fichier(fichier, choc=0.01, horizon=12):
+    """``(mni, mni_choquee, gap)`` : MNI annuelle, MNI sur l'horizon après choc et gap de taux."""
+    actifs, passifs = feuilles_mni(fichier)
+    with etape("nettoyage", len(actifs) + len(passifs)):
+        banque = Banque(PositionsMNI.depuis_dataframe(actifs), PositionsMNI.depuis_dataframe(passifs))
+    with etape("calcul"):
+        return banque.calcul_mni(), banque.mni_choc(choc, horizon), banque.gap_de_taux(choc, horizon)
+
+
+@memoiser
+def simulation_mni_fichier(fichier, horizon=12, nb_simulations=10_000, sigma=0.01, graine=None):
+    """:class:`~alm.mni_simulation.ResultatSimulationMNI` des catégories du classeur."""
+    actifs, passifs = feuilles_mni(fichier)
+    with etape("agrégation", len(actifs) + len(passifs)):
+        parametres = parametres_categories(actifs, passifs)
+    with etape("calcul"):
+        return simuler_mni(parametres, horizon=horizon, nb_simulations=nb_simulations, sigma=sigma, graine=graine)
+
+
+@memoiser
+def change_fichier(fichier, date_arrete, bornes=BORNES_MATURITE):
+    """``(balance, enc, gap_par_periode_df)`` de la balance multidevise."""
+    df = lire_table(fichier, "Feuil1", COLONNES_CHANGE)
+    enc, gap = ventiler_change(df, date_arrete, bornes)
+    return df, enc, gap
+
+
+@memoiser
+def sommes_change_fichier(fichier, date_arrete, bornes=BORNES_MATURITE):
+    """``(devises, sommes, presents, taux)`` : soldes par devise × compartiment × sens et derniers taux de change."""
+    df = lire_table(fichier, "Feuil1", COLONNES_CHANGE)
+    return (*sommes_change(df, date_arrete, bornes), derniers_taux(df))
+
+
+@memoiser
+def taux_historiques_fichier(fichier_historique):
+    """Historique des taux de change (dates × devises)."""
+    return historique_taux(lire_table(fichier_historique, 0))
+
+
+@memoiser
+def var_change_fichiers(fichier, fichier_historique, date_arrete, bornes=BORNES_MATURITE, fenetre=FENETRE,
+                        niveau_backtest=max(NIVEAUX)):
+    """``(table VaR / ES, backtesting ou None si l'historique est plus court que la fenêtre)``."""
+    enc = change_fichier(fichier, date_arrete, bornes)[1]
+    taux = taux_historiques_fichier(fichier_historique)
+    with etape("nettoyage", len(taux)):
+        rendements_devises = rendements(taux)
+        expo = expositions(enc, taux)
+    with etape("calcul"):
+        table = var_es(rendements_devises, expo, graine=0)
+        if len(rendements_devises) <= fenetre:
+            return table, None
+        return table, var_glissante(pnl_portefeuille(rendements_devises, expo), fenetre, niveau_backtest)
+
+
+@memoiser
+def stress_change_fichiers(fichier, date_arrete, bornes=BORNES_MATURITE, amplitudes=(), fichier_historique=None,
+                           horizon=10, chocs_personnalises=None):
+    """:class:`~alm.stress_change.ResultatStress` des chocs unitaires, historiques et personnalisés."""
+    df, _, gap = change_fichier(fichier, date_arrete, bornes)
+    with etape("agrégation", len(df)):
+        expositions_gap = matrice_expositions(gap, derniers_taux(df))
+    taux = taux_historiques_fichier(fichier_historique) if fichier_historique is not None else None
+    with etape("calcul"):
+        familles = [chocs_unitaires(expositions_gap.index, amplitudes)]
+        if taux is not None:
+            familles.append(chocs_historiques(taux, horizon))
+        if chocs_personnalises is not None:
+            familles.append(chocs_personnalises)
+        return appliquer_chocs(expositions_gap, *familles)
@@ -0,0 +1,143 @@
+"""Exposition nette de change (ENC) et gap de change par devise et maturité.
+
+La balance est préparée une fois : classe PCEC, devise et compartiment de
+maturité deviennent des codes entiers. Les opérations sur chaînes et le
+parsing des dates ne portent que sur les valeurs distinctes (quelques
+milliers au plus), puis sont rediffusées sur les lignes par indexation. Les
+maturités sont comptées en jours entiers depuis une date d'arrêté explicite,
+si bien que le résultat ne dépend pas du jour du calcul. Un seul ``bincount``
+sur la clé (devise, compartiment, sens) fournit ensuite l'ENC et les gaps.
+"""
+
+import numpy as np
+import pandas as pd
+
+from alm.instrumentation import etape
+
+COLONNE_PCEC = "PCEC Code"
+COLONNE_DEVISE = "currency"
+COLONNE_SOLDE = "CCY balance"
+COLONNE_ECHEANCE = "Maturity Date"
+COLONNE_TAUX_CHANGE = "Exchange RATE"
+COLONNES_CHANGE = [COLONNE_PCEC, COLONNE_DEVISE, COLONNE_SOLDE, COLONNE_ECHEANCE, COLONNE_TAUX_CHANGE]
+
+# Classes du plan de comptes (premier chiffre du code PCEC)
+CLASSES_ACTIF = ["3", "4", "5"]
+CLASSES_PASSIF = ["1", "2"]
+AUTRE, ACTIF, PASSIF = 0, 1, 2
+
+# Compartiments de maturité : bornes supérieures en années (le dernier est ouvert)
+BORNES_MATURITE = (1, 5)
+LIBELLES_MATURITE = ("Court Terme", "Moyen Terme", "Long Terme")
+# Échéance des comptes sans date (à vue, fonds propres) : dernier compartiment
+ECHEANCE_INDETERMINEE = "//"
+
+
+def sens_pcec(codes):
+    """Sens (AUTRE, ACTIF, PASSIF) de chaque code PCEC, déterminé une fois par code distinct."""
+    indices, distincts = pd.factorize(codes, use_na_sentinel=False)
+    classes = pd.Series(distincts, dtype=object).astype(str).str[:1].to_numpy()
+    sens = np.select([np.isin(classes, CLASSES_ACTIF), np.isin(classes, CLASSES_PASSIF)], [ACTIF, PASSIF], AUTRE)
+    return sens.astype(np.int8)[indices]
+
+
+def jours_restants(echeances, date_arrete):
+    """Jours entiers entre ``date_arrete`` et chaque échéance.
+
+    Les échéances sans date (``//``) valent +inf, les dates illisibles NaN.
+    """
+    indices, distincts = pd.factorize(echeances, use_na_sentinel=False)
+    distincts = pd.Series(distincts, dtype=object)
+    indeterminee = (distincts.astype(str).str.strip() == ECHEANCE_INDETERMINEE).to_numpy()
+    dates = pd.to_datetime(distincts.mask(indeterminee), errors="coerce")
+    jours = (dates.to_numpy(dtype="datetime64[D]").astype(np.int64)
+             - np.datetime64(pd.Timestamp(date_arrete).date(), "D").astype(np.int64)).astype(np.float64)
+    jours[dates.isna().to_numpy()] = np.nan
+    jours[indeterminee] = np.inf
+    return jours[indices]
+
+
+def compartiments_maturite(jours, bornes=BORNES_MATURITE):
+    """Indice du compartiment de chaque maturité ; les bornes sont en années.
+
+    Les maturités inconnues et les échéances déjà passées valent -1 : elles
+    restent dans l'ENC mais hors du gap par période.
+    """
+    limites = np.asarray(bornes, dtype=np.float64) * 365
+    compartiments = np.searchsorted(limites, jours, side="left").astype(np.int8)
+    compartiments[np.isnan(jours) | (jours < 0)] = -1
+    return compartiments
+
+
+def libelles_maturite(bornes):
+    """Libellés des compartiments : court, moyen et long terme pour les bornes par défaut, sinon générés."""
+    bornes = tuple(bornes)
+    if bornes == BORNES_MATURITE:
+        return LIBELLES_MATURITE
+    return (f"≤ {bornes[0]:g} an", *(f"{a:g}-{b:g} ans" for a, b in zip(bornes, bornes[1:])), f"> {bornes[-1]:g} ans")
+
+
+def sommes_change(df, date_arrete, bornes=BORNES_MATURITE):
+    """Soldes cumulés par (devise, compartiment, sens) et présence de chaque couple (devise, compartiment).
+
+    Retourne ``(devises, sommes, presents)`` : ``sommes`` est un tableau
+    (devises × compartiments + 1 × sens) dont le compartiment 0 regroupe les
+    maturités inconnues ou échues ; ``presents`` (devises × compartiments) indique les
+    couples qui ont au moins une ligne de maturité connue.
+    """
+    with etape("nettoyage", len(df)):
+        devise, devises = pd.factorize(df[COLONNE_DEVISE], sort=True)
+        compartiment = compartiments_maturite(jours_restants(df[COLONNE_ECHEANCE], date_arrete), bornes)
+        sens = sens_pcec(df[COLONNE_PCEC])
+        solde = pd.to_numeric(df[COLONNE_SOLDE], errors="coerce").fillna(0.0).to_numpy(dtype=np.float64)
+
+    # Clé (devise, compartiment + 1, sens) ; le compartiment 0 regroupe les maturités inconnues ou échues
+    with etape("agrégation", len(df)):
+        nb_compartiments = len(bornes) + 2
+        valide = devise >= 0
+        cle = (devise[valide].astype(np.int64) * nb_compartiments + compartiment[valide] + 1) * 3 + sens[valide]
+        sommes = np.bincount(cle, weights=solde[valide], minlength=len(devises) * nb_compartiments * 3)
+        presents = np.bincount(cle // 3, minlength=len(devises) * nb_compartiments).reshape(len(devises), -1)[:, 1:] > 0
+
+    devises = pd.Index(np.asarray(devises), name=COLONNE_DEVISE)  # devises catégorielles : index simple
+    return devises, sommes.reshape(len(devises), nb_compartiments, 3), presents
+
+
+def enc_et_gap(devises, sommes, presents, libelles):
+    """``(enc, gap_par_periode_df)`` à partir des sommes de :func:`sommes_change`."""
+    par_sens = sommes.sum(axis=1)
+    enc = pd.Series(par_sens[:, ACTIF] - par_sens[:, PASSIF], index=devises, name="Exposition Nette de Change")
+
+    # Gap : seulement les couples (devise, compartiment) présents dans la balance
+    ligne, colonne = np.nonzero(presents)
+    gap = pd.DataFrame({
+        COLONNE_DEVISE: devises[ligne],
+        "Maturity Category": pd.Categorical.from_codes(colonne, categories=list(libelles)),
+        "Gap de Change": sommes[:, 1:, :].sum(axis=2)[ligne, colonne],
+    })
+    return enc, gap
+
+
+def ventiler_change(df, date_arrete, bornes=BORNES_MATURITE, libelles=None):
+    """ENC par devise et gap par devise × compartiment de maturité, en une agrégation.
+
+    Retourne ``(enc, gap_par_periode_df)`` : l'ENC est la somme des soldes
+    d'actif moins celle des soldes de passif ; le gap somme tous les soldes
+    dont la maturité est connue.
+    """
+    libelles = libelles_maturite(bornes) if libelles is None else libelles
+    if len(libelles) != len(bornes) + 1:
+        raise ValueError(f"{len(bornes)} bornes de maturité demandent {len(bornes) + 1} libellés.")
+    return enc_et_gap(*sommes_change(df, date_arrete, bornes), libelles)
+
+
+def exposition_nette(df):
+    """ENC par devise : soldes des classes d'actif moins soldes des classes de passif."""
+    sens = sens_pcec(df[COLONNE_PCEC])
+    solde = df[COLONNE_SOLDE].where(sens == ACTIF, 0) - df[COLONNE_SOLDE].where(sens == PASSIF, 0)
+    return solde.groupby(df[COLONNE_DEVISE]).sum().rename("Exposition Nette de Change")
+
+
+def derniers_taux(df):
+    """Dernier taux de change connu de chaque devise dans la balance (unités de devise locale)."""
+    return df.dropna(subset=[COLONNE_TAUX_CHANGE]).groupby(COLONNE_DEVISE)[COLONNE_TAUX_CHANGE].last()
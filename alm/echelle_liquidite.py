@@ -0,0 +1,160 @@
+"""Échelle des maturités et horizon de survie à partir de l'échéancier et des emplois interbancaires.
+
+Chaque flux contractuel (``Maturity Date``) est rangé dans une tranche
+(jour par jour la première semaine, puis par semaine jusqu'au mois, puis
+par mois jusqu'à un an) ; les flux sans échéance (``//``) vont dans la
+dernière tranche ouverte. Les montants sont lus en valeur absolue, comme
+les entrées du LCR, et pondérés par les taux d'entrée pour le scénario
+stressé.
+
+Les flux sont comptés par jour d'échéance (un ``bincount`` par fichier,
+les jours au-delà de l'horizon regroupés sous une seule clé), puis cumulés :
+la somme d'une tranche est la différence des cumuls à ses deux bornes. Les
+mêmes cumuls servent à la grille de l'échelle et au profil jour par jour de
+l'horizon de survie ; le coût est linéaire dans le nombre de flux, sans tri
+ni boucle par ligne.
+
+Les sorties stressées sont celles du LCR (balance × taux de fuite),
+réparties uniformément sur les 30 jours du scénario et supposées se
+poursuivre au même rythme au-delà. La position de liquidité du jour ``t``
+vaut HQLA + entrées stressées cumulées - sorties stressées cumulées ;
+l'horizon de survie est le nombre de jours pendant lesquels elle reste
+positive (le plafond de 75 % des entrées ne s'applique pas ici).
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from alm.change import COLONNE_ECHEANCE, jours_restants
+from alm.instrumentation import etape
+from alm.lcr import COLONNE_CATEGORIE, COLONNE_MONTANT, PONDERATIONS_ENTREES, AccumulateurLCR, table_ponderations
+
+# Horizon des sorties stressées du LCR et horizon maximal du profil de survie (jours)
+HORIZON_STRESS = 30
+HORIZON_MAX = 365
+
+CONTRACTUELLES, STRESSEES = 0, 1
+
+
+def bornes_echelle(date_arrete):
+    """Bornes (jours, incluses) et libellés des tranches : J+1 à J+7, S2, S3, puis M1 à M12 et au-delà."""
+    date_arrete = pd.Timestamp(date_arrete).normalize()
+    mois = [(date_arrete + pd.DateOffset(months=m) - date_arrete).days for m in range(1, 13)]
+    bornes = np.array([*range(1, 8), 14, 21, *mois], dtype=np.float64)
+    libelles = (*(f"J+{j}" for j in range(1, 8)), "S2", "S3", *(f"M{m}" for m in range(1, 13)), "> 12 mois")
+    return bornes, libelles
+
+
+def cumuls_par_jour(dfs, date_arrete, limite):
+    """Entrées (contractuelles, stressées) cumulées jour par jour, des jours 0 à ``limite`` puis au-delà.
+
+    Retourne ``(cumul, nb_flux, echus, illisibles)`` : la ligne ``t`` de
+    ``cumul`` somme les flux échéant au plus tard le jour ``t`` et la dernière
+    tous les flux à venir. Les flux déjà échus sont écartés (``echus`` est
+    leur montant), ainsi que les échéances illisibles (``illisibles`` est
+    leur nombre).
+    """
+    codes, taux = table_ponderations(PONDERATIONS_ENTREES)
+    index = pd.Index(codes)
+    par_jour = np.zeros((2, limite + 2))
+    nb_flux, echus, illisibles = 0, 0.0, 0
+    for df in dfs:
+        with etape("nettoyage", len(df)):
+            jours = jours_restants(df[COLONNE_ECHEANCE], date_arrete)
+            montant = df[COLONNE_MONTANT].abs().to_numpy(dtype=np.float64)
+            positions = index.get_indexer(df[COLONNE_CATEGORIE])
+            stresse = np.where(positions >= 0, montant * taux[positions], 0.0)
+        with etape("agrégation", len(df)):
+            lisibles = ~np.isnan(jours)
+            a_venir = lisibles & (jours >= 0)
+            echus += float(montant[lisibles & ~a_venir].sum())
+            illisibles += int((~lisibles).sum())
+            nb_flux += int(a_venir.sum())
+            # Clé = jour d'échéance ; au-delà de la limite (et sans échéance), une seule clé
+            cle = np.minimum(jours[a_venir], limite + 1).astype(np.int64)
+            par_jour[CONTRACTUELLES] += np.bincount(cle, weights=montant[a_venir], minlength=limite + 2)
+            par_jour[STRESSEES] += np.bincount(cle, weights=stresse[a_venir], minlength=limite + 2)
+    return np.cumsum(par_jour, axis=1).T, nb_flux, echus, illisibles
+
+
+@dataclass
+class EchelleLiquidite:
+    """Entrées par tranche et profil de survie ; les sorties sont appliquées à la lecture, par multiplicateur."""
+    date_arrete: pd.Timestamp
+    hqla: float
+    sorties_stressees: float
+    bornes: np.ndarray
+    libelles: tuple
+    entrees: np.ndarray
+    entrees_cumulees: np.ndarray
+    nb_flux: int
+    echus: float
+    illisibles: int
+
+    @property
+    def sorties_journalieres(self):
+        """Sorties stressées par jour (multiplicateur 1)."""
+        return self.sorties_stressees / HORIZON_STRESS
+
+    def positions(self, multiplicateurs=(1.0,)):
+        """Position de liquidité à la fin de chaque jour (multiplicateurs × jours)."""
+        jours = np.arange(1, len(self.entrees_cumulees) + 1)
+        debits = np.asarray(multiplicateurs, dtype=np.float64)[:, None] * self.sorties_journalieres
+        return self.hqla + self.entrees_cumulees - debits * jours
+
+    def horizons_survie(self, multiplicateurs=(1.0,)):
+        """Jours où la position reste positive, par multiplicateur des sorties (inf au-delà de l'horizon)."""
+        negatives = self.positions(multiplicateurs) < 0
+        horizons = np.where(negatives.any(axis=1), negatives.argmax(axis=1), np.inf)
+        return pd.Series(horizons, index=pd.Index(multiplicateurs, name="Multiplicateur des sorties"),
+                         name="Horizon de survie (jours)")
+
+    def horizon_survie(self, multiplicateur=1.0):
+        return float(self.horizons_survie([multiplicateur]).iloc[0])
+
+    def tableau(self, multiplicateur=1.0):
+        """Échelle des maturités : entrées, sorties stressées, gap net et cumulé par tranche."""
+        longueurs = np.diff(self.bornes, prepend=0.0)
+        sorties = np.append(longueurs * self.sorties_journalieres * multiplicateur, np.nan)
+        gap = self.entrees[:, STRESSEES] - sorties
+        echeances = self.date_arrete + pd.to_timedelta(self.bornes, unit="D")
+        return pd.DataFrame({
+            "Jusqu'au": [*echeances.date, None],
+            "Entrées contractuelles": self.entrees[:, CONTRACTUELLES],
+            "Entrées stressées": self.entrees[:, STRESSEES],
+            "Sorties stressées": sorties,
+            "Gap net": gap,
+            "Gap cumulé": np.cumsum(gap),
+            "Position de liquidité": self.hqla + np.cumsum(gap),
+        }, index=pd.Index(self.libelles, name="Tranche"))
+
+
+def echelle_liquidite(df_balance, dfs_flux, date_arrete, horizon_max=HORIZON_MAX):
+    """Échelle des maturités des flux (échéancier, emplois interbancaires) et profil de survie sur la balance."""
+    date_arrete = pd.Timestamp(date_arrete).normalize()
+    accumulateur = AccumulateurLCR()
+    with etape("agrégation", len(df_balance)):
+        accumulateur.ajouter_balance(df_balance)
+        lcr = accumulateur.resultat()
+
+    bornes, libelles = bornes_echelle(date_arrete)
+    cumul, nb_flux, echus, illisibles = cumuls_par_jour(dfs_flux, date_arrete, max(int(bornes[-1]), horizon_max))
+    with etape("calcul"):
+        # Entrées d'une tranche : différence des cumuls à ses deux bornes ; la dernière tranche prend le reste
+        cumuls = np.vstack([cumul[bornes.astype(np.int64)], cumul[-1]])
+        entrees = np.diff(cumuls, axis=0, prepend=0.0)
+        profil = cumul[1:horizon_max + 1, STRESSEES]
+    return EchelleLiquidite(
+        date_arrete=date_arrete,
+        hqla=lcr.total_hqla,
+        sorties_stressees=lcr.sorties,
+        bornes=bornes,
+        libelles=libelles,
+        entrees=entrees,
+        entrees_cumulees=profil,
+        nb_flux=nb_flux,
+        echus=echus,
+        illisibles=illisibles,
+    )
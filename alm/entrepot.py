@@ -0,0 +1,230 @@
+"""Entrepôt des positions du bilan, ingérées une fois par date d'arrêté.
+
+Chaque jeu de positions (balance LCR, échéancier, emplois interbancaires,
+balance multidevise, feuilles Actifs / Passifs du NSFR et de la MNI) est
+converti dans un schéma typé : montants en ``float64``, codes de catégorie
+en ``int64``, codes PCEC, devises, catégories et niveaux en dictionnaire
+(catégoriels côté pandas). Une valeur renseignée qui n'est pas un nombre
+dans une colonne numérique fait échouer l'ingestion. Il est écrit au format Arrow IPC non compressé
+(``<entrepot>/<AAAAMMJJ>/<jeu>.arrow``) et relu par projection mémoire : les
+calculateurs lisent directement les pages du fichier, sans nouvelle analyse
+du classeur ni copie propre à chaque session ; le cache de pages du système
+est partagé par tous les processus (Streamlit, service HTTP).
+
+Les calculateurs reçoivent un :class:`JeuPositions` à la place d'un fichier
+(voir :func:`alm.ingestion.lire_table`).
+
+Usage : python -m alm.entrepot AAAA-MM-JJ [--balance F] [--echeancier F] [--emplois F]
+        [--change F] [--nsfr CLASSEUR] [--mni CLASSEUR] [--entrepot DIR]
+"""
+
+import argparse
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from alm.change import COLONNE_DEVISE, COLONNE_ECHEANCE, COLONNE_PCEC, COLONNE_SOLDE, COLONNE_TAUX_CHANGE
+from alm.ingestion import booleens, lire_table
+from alm.lcr import COLONNE_CATEGORIE, COLONNE_MONTANT, COLONNE_NIVEAU, FEUILLES_LCR
+from alm.lcr_incremental import COLONNE_COMPTE
+from alm.mni import COLONNES_MNI
+from alm.nsfr import COLONNE_DUREE_CHARGE, COLONNE_GREVE, COLONNE_MATURITE, COLONNES_ACTIFS, COLONNES_PASSIFS
+
+REPERTOIRE_ENTREPOT = Path(os.environ.get("ALM_ENTREPOT_POSITIONS", Path.home() / ".cache" / "alm" / "positions"))
+
+# Types logiques des colonnes ; les colonnes absentes du fichier source sont omises
+TEXTE, ENTIER, REEL, BOOLEEN = "texte", "entier", "réel", "booléen"
+TYPES_COLONNES = {
+    COLONNE_NIVEAU: TEXTE, COLONNE_CATEGORIE: ENTIER, COLONNE_MONTANT: REEL, COLONNE_COMPTE: TEXTE,
+    COLONNE_PCEC: TEXTE, COLONNE_DEVISE: TEXTE, COLONNE_SOLDE: REEL, COLONNE_ECHEANCE: TEXTE,
+    COLONNE_TAUX_CHANGE: REEL,
+    "Catégorie": TEXTE, "Montant (€)": REEL, "Pondération ASF": REEL, "Pondération RSF": REEL,
+    COLONNE_MATURITE: REEL, COLONNE_GREVE: BOOLEEN, COLONNE_DUREE_CHARGE: REEL,
+    "Taux": REEL, "Sensibilité": REEL, "Volatilité spécifique": REEL, "Révision (mois)": REEL, "Type de taux": TEXTE,
+}
+
+# Jeu -> (feuille source par défaut, colonnes)
+JEUX = {
+    "balance": (FEUILLES_LCR[0], [COLONNE_NIVEAU, COLONNE_CATEGORIE, COLONNE_MONTANT, COLONNE_COMPTE]),
+    "echeancier": (FEUILLES_LCR[1], [COLONNE_CATEGORIE, COLONNE_MONTANT, COLONNE_ECHEANCE]),
+    "emplois": (FEUILLES_LCR[2], [COLONNE_CATEGORIE, COLONNE_MONTANT, COLONNE_ECHEANCE]),
+    "change": ("Feuil1", [COLONNE_PCEC, COLONNE_DEVISE, COLONNE_SOLDE, COLONNE_ECHEANCE, COLONNE_TAUX_CHANGE]),
+    "nsfr_passifs": ("Passifs", COLONNES_PASSIFS),
+    "nsfr_actifs": ("Actifs", COLONNES_ACTIFS),
+    "mni_actifs": ("Actifs", COLONNES_MNI),
+    "mni_passifs": ("Passifs", COLONNES_MNI),
+}
+JEUX_LCR = ("balance", "echeancier", "emplois")
+JEUX_NSFR = ("nsfr_passifs", "nsfr_actifs")
+JEUX_MNI = ("mni_actifs", "mni_passifs")
+JEUX_CHANGE = ("change",)
+
+# Tables projetées en mémoire, partagées par les sessions du processus : chemin -> (version, table)
+_tables = {}
+_verrou = threading.Lock()
+
+
+def _texte(valeur):
+    """Libellé d'une valeur : un réel entier (niveau lu 1.0 par Excel) s'écrit comme l'entier, "1"."""
+    if isinstance(valeur, (float, np.floating)) and float(valeur).is_integer():
+        return str(int(valeur))
+    return str(valeur)
+
+
+def _dictionnaire(serie):
+    """Colonne texte encodée en dictionnaire trié ; les conversions ne portent que sur les valeurs distinctes."""
+    indices, distinctes = pd.factorize(serie)
+    indices_texte, textes = pd.factorize(pd.Index(distinctes, dtype=object).map(_texte), sort=True)
+    codes = np.where(indices >= 0, indices_texte[np.maximum(indices, 0)] if len(distinctes) else -1, -1)
+    return pa.DictionaryArray.from_arrays(pa.array(codes.astype(np.int32), mask=codes < 0),
+                                          pa.array(np.asarray(textes, dtype=object), type=pa.string()))
+
+
+def _controler_numerique(serie, valeurs):
+    """Refuse une colonne numérique dont des valeurs renseignées ne sont pas des nombres (pas de perte silencieuse)."""
+    perdues = np.isnan(valeurs) & serie.notna().to_numpy()
+    if not perdues.any():
+        return
+    texte = serie[perdues].astype(str).str.strip()
+    invalides = texte[texte != ""]
+    if len(invalides):
+        raise ValueError(f"{len(invalides):,} valeurs non numériques dans la colonne '{serie.name}' : "
+                         f"{sorted(set(invalides))[:5]}")
+
+
+def typer(df, colonnes):
+    """Table Arrow au schéma de l'entrepôt pour les ``colonnes`` présentes dans ``df``."""
+    tableaux, noms = [], []
+    for colonne in colonnes:
+        if colonne not in df:
+            continue
+        serie, genre = df[colonne], TYPES_COLONNES[colonne]
+        if genre == TEXTE:
+            tableau = _dictionnaire(serie)
+        elif genre == BOOLEEN:
+            tableau = pa.array(booleens(serie))
+        else:
+            valeurs = pd.to_numeric(serie, errors="coerce").to_numpy(dtype=np.float64)
+            _controler_numerique(serie, valeurs)
+            tableau = pa.array(valeurs, from_pandas=True)
+            if genre == ENTIER:
+                tableau = tableau.cast(pa.int64())
+        tableaux.append(tableau)
+        noms.append(colonne)
+    return pa.Table.from_arrays(tableaux, names=noms)
+
+
+def _table_projetee(chemin, version):
+    with _verrou:
+        entree = _tables.get(chemin)
+        if entree is None or entree[0] != version:
+            # La projection reste ouverte tant que la table (et ses tampons) est référencée
+            entree = (version, pa.ipc.open_file(pa.memory_map(chemin)).read_all())
+            _tables[chemin] = entree
+        return entree[1]
+
+
+@dataclass(frozen=True)
+class JeuPositions:
+    """Jeu de positions de l'entrepôt ; ``version`` change à chaque nouvelle ingestion."""
+
+    chemin: str
+    version: int
+
+    def table(self, colonnes=None):
+        """Table Arrow projetée en mémoire (sans copie), restreinte aux ``colonnes`` présentes."""
+        table = _table_projetee(self.chemin, self.version)
+        if colonnes is None:
+            return table
+        return table.select([c for c in colonnes if c in table.column_names])
+
+    def vers_dataframe(self, colonnes=None):
+        """DataFrame des ``colonnes`` ; les colonnes numériques sans valeur manquante ne sont pas copiées."""
+        return self.table(colonnes).to_pandas(split_blocks=True)
+
+    def __len__(self):
+        return self.table().num_rows
+
+
+class EntrepotPositions:
+    """Répertoire des jeux de positions, un sous-répertoire ``AAAAMMJJ`` par date d'arrêté."""
+
+    def __init__(self, repertoire=REPERTOIRE_ENTREPOT):
+        self.repertoire = Path(repertoire)
+
+    def chemin(self, date, jeu):
+        return self.repertoire / f"{pd.Timestamp(date):%Y%m%d}" / f"{jeu}.arrow"
+
+    def dates(self):
+        if not self.repertoire.is_dir():
+            return []
+        dates = []
+        for chemin in self.repertoire.iterdir():
+            if chemin.is_dir() and chemin.name.isdigit() and len(chemin.name) == 8:
+                dates.append(pd.Timestamp(chemin.name))
+        return sorted(dates)
+
+    def jeux(self, date):
+        repertoire = self.chemin(date, "_").parent
+        return {chemin.stem for chemin in repertoire.glob("*.arrow")} if repertoire.is_dir() else set()
+
+    def dates_completes(self, jeux):
+        """Dates d'arrêté pour lesquelles tous les ``jeux`` sont présents."""
+        return [date for date in self.dates() if set(jeux) <= self.jeux(date)]
+
+    def jeu(self, date, jeu):
+        chemin = self.chemin(date, jeu)
+        try:
+            version = chemin.stat().st_mtime_ns
+        except FileNotFoundError:
+            raise ValueError(f"Jeu '{jeu}' absent de l'entrepôt au {pd.Timestamp(date):%d/%m/%Y}") from None
+        return JeuPositions(str(chemin), version)
+
+    def sources(self, date, jeux):
+        """``{feuille source: JeuPositions}`` des ``jeux``, pour les calculateurs qui lisent plusieurs feuilles."""
+        return {JEUX[jeu][0]: self.jeu(date, jeu) for jeu in jeux}
+
+    def ingerer(self, date, jeu, fichier, feuille=None):
+        """Lit ``fichier`` (Excel, CSV ou Parquet), le type et l'écrit dans l'entrepôt à la date ``date``."""
+        feuille_defaut, colonnes = JEUX[jeu]
+        table = typer(lire_table(fichier, feuille or feuille_defaut, colonnes), colonnes)
+        chemin = self.chemin(date, jeu)
+        chemin.parent.mkdir(parents=True, exist_ok=True)
+        temporaire = chemin.with_suffix(f".{os.getpid()}.tmp")
+        with pa.OSFile(str(temporaire), "wb") as sortie, pa.ipc.new_file(sortie, table.schema) as ecrivain:
+            ecrivain.write_table(table)
+        os.replace(temporaire, chemin)
+        return self.jeu(date, jeu)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingestion des positions d'une date d'arrêté dans l'entrepôt.")
+    parser.add_argument("date", help="date d'arrêté (AAAA-MM-JJ)")
+    parser.add_argument("--entrepot", default=REPERTOIRE_ENTREPOT, help="répertoire de l'entrepôt")
+    for jeu in ("balance", "echeancier", "emplois", "change"):
+        parser.add_argument(f"--{jeu}", help=f"fichier du jeu '{jeu}'")
+    parser.add_argument("--nsfr", help="classeur NSFR (feuilles Actifs et Passifs)")
+    parser.add_argument("--mni", help="classeur MNI (feuilles Actifs et Passifs)")
+    args = parser.parse_args(argv)
+
+    entrepot = EntrepotPositions(args.entrepot)
+    fichiers = {jeu: getattr(args, jeu) for jeu in ("balance", "echeancier", "emplois", "change")}
+    fichiers.update({jeu: args.nsfr for jeu in JEUX_NSFR})
+    fichiers.update({jeu: args.mni for jeu in JEUX_MNI})
+    for jeu, fichier in fichiers.items():
+        if fichier is None:
+            continue
+        debut = time.perf_counter()
+        positions = entrepot.ingerer(args.date, jeu, fichier)
+        print(f"{jeu:<14}{len(positions):>12,} lignes  {time.perf_counter() - debut:6.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,250 @@
+"""Moteur EVE (Economic Value of Equity) : échéanciers complets et actualisation vectorisée.
+
+Chaque position (montant, taux, maturité, fréquence, profil d'amortissement,
+jambe fixe ou variable) est déroulée en flux d'intérêts et de principal sous
+forme de tableaux NumPy aplatis : une ligne par flux, avec l'indice de la
+position d'origine. Tous les flux sont ensuite actualisés en une seule
+opération contre une courbe de taux zéro-coupon (ou un taux plat par
+position), puis regroupés par position avec ``np.bincount``.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from alm.ingestion import lire_sources
+from alm.instrumentation import Chronometre, etape
+
+# Feuilles du classeur EVE ; le côté se déduit du nom ("Passif" dans le nom)
+FEUILLES_EVE = ["B et EF", "Crédits", "Titres de Participation", "B et EF Passif", "Compte créditeur Passif"]
+
+IN_FINE, LINEAIRE, ANNUITE = "in_fine", "lineaire", "annuite"
+PROFILS_AMORTISSEMENT = {IN_FINE: 0, LINEAIRE: 1, ANNUITE: 2}
+FIXE, VARIABLE = "fixe", "variable"
+
+# Colonnes d'un DataFrame de positions (les quatre dernières ont des valeurs par défaut)
+COLONNES_POSITIONS = [
+    "Feuille", "Élément", "Côté", "Montant", "Taux d'intérêt", "Taux d'actualisation", "Maturité",
+    "Fréquence", "Amortissement", "Jambe", "Marge",
+]
+VALEURS_DEFAUT = {"Fréquence": 1, "Amortissement": IN_FINE, "Jambe": FIXE, "Marge": 0.0}
+
+# Nombre de positions déroulées à la fois lors d'une valorisation
+TAILLE_LOT = 20_000
+
+
+class CourbeTaux:
+    """Courbe de taux zéro-coupon (composition annuelle), interpolée linéairement et plate aux bornes."""
+
+    def __init__(self, maturites, taux):
+        maturites, taux = np.asarray(maturites, dtype=np.float64), np.asarray(taux, dtype=np.float64)
+        if np.isnan(maturites).any() or np.isnan(taux).any():
+            raise ValueError("Courbe de taux incomplète : chaque point doit avoir une maturité et un taux.")
+        if len(np.unique(maturites)) != len(maturites):
+            raise ValueError("Courbe de taux : maturités en double.")
+        ordre = np.argsort(maturites)
+        self.maturites = np.asarray(maturites, dtype=np.float64)[ordre]
+        self.taux = np.asarray(taux, dtype=np.float64)[ordre]
+
+    def zero(self, t):
+        return np.interp(t, self.maturites, self.taux)
+
+    def facteurs(self, t):
+        """Facteurs d'actualisation (1 + z(t)) ** -t."""
+        t = np.asarray(t, dtype=np.float64)
+        return np.exp(-t * np.log1p(self.zero(t)))
+
+
+@dataclass
+class Echeancier:
+    """Flux aplatis : une entrée par (position, date de paiement)."""
+    position: np.ndarray
+    temps: np.ndarray
+    temps_precedent: np.ndarray
+    encours: np.ndarray
+    interets: np.ndarray
+    principal: np.ndarray
+    nb_positions: int
+
+    @property
+    def flux(self):
+        return self.interets + self.principal
+
+
+def completer_positions(positions):
+    """Ajoute les colonnes optionnelles manquantes avec leurs valeurs par défaut."""
+    positions = positions.copy()
+    for colonne, valeur in VALEURS_DEFAUT.items():
+        if colonne not in positions.columns:
+            positions[colonne] = valeur
+    return positions
+
+
+def taux_flux(courbe, position, temps):
+    """Taux zéro de chaque flux : courbe commune ou taux plat par position."""
+    if isinstance(courbe, CourbeTaux):
+        return courbe.zero(temps)
+    return np.asarray(courbe, dtype=np.float64)[position]
+
+
+def facteurs_actualisation(courbe, position, temps):
+    """Facteurs d'actualisation des flux contre ``courbe`` (CourbeTaux ou taux plat par position)."""
+    return np.exp(-temps * np.log1p(taux_flux(courbe, position, temps)))
+
+
+def generer_echeancier(positions, courbe=None):
+    """Déroule toutes les positions en flux d'intérêts et de principal.
+
+    ``courbe`` n'est utilisée que pour les jambes variables, dont le coupon
+    est le taux forward de la période augmenté de la marge.
+    """
+    positions = completer_positions(positions)
+    montant = positions["Montant"].to_numpy(dtype=np.float64)
+    taux = positions["Taux d'intérêt"].to_numpy(dtype=np.float64)
+    maturite = positions["Maturité"].to_numpy(dtype=np.float64)
+    frequence = positions["Fréquence"].to_numpy(dtype=np.float64)
+    profil = positions["Amortissement"].map(PROFILS_AMORTISSEMENT).to_numpy()
+    if pd.isna(profil).any():
+        inconnus = set(positions["Amortissement"][pd.isna(profil)])
+        raise ValueError(f"Profils d'amortissement inconnus : {sorted(map(str, inconnus))}")
+    profil = profil.astype(np.int64)
+    variable = (positions["Jambe"] == VARIABLE).to_numpy()
+    marge = positions["Marge"].to_numpy(dtype=np.float64)
+
+    # Nombre de paiements par position, le premier pouvant être une période brisée
+    nb = np.where(maturite > 0, np.ceil(maturite * frequence - 1e-9), 0).astype(np.int64)
+    position = np.repeat(np.arange(len(positions)), nb)
+    k = np.arange(nb.sum()) - np.repeat(np.cumsum(nb) - nb, nb) + 1
+    periode = 1 / frequence
+    n = nb[position]
+    temps = maturite[position] - (n - k) * periode[position]
+    temps_precedent = np.maximum(temps - periode[position], 0.0)
+    duree = temps - temps_precedent
+
+    # Encours en début de période selon le profil d'amortissement
+    encours = montant[position]
+    principal = np.where(k == n, encours, 0.0)
+    lineaire = profil[position] == PROFILS_AMORTISSEMENT[LINEAIRE]
+    if lineaire.any():
+        N_l, k_l, n_l = encours[lineaire], k[lineaire], n[lineaire]
+        encours[lineaire] = N_l * (1 - (k_l - 1) / n_l)
+        principal[lineaire] = N_l / n_l
+    annuite = profil[position] == PROFILS_AMORTISSEMENT[ANNUITE]
+    if annuite.any():
+        # Échéance constante : A = N r / (1 - (1 + r)^-n), encours après k-1 échéances
+        taux_periode = taux / frequence
+        with np.errstate(divide="ignore", invalid="ignore"):
+            echeance = np.where(
+                taux_periode != 0, montant * taux_periode / -np.expm1(-nb * np.log1p(taux_periode)), montant / nb
+            )
+        p_a = position[annuite]
+        r, A, N_a, k_a = taux_periode[p_a], echeance[p_a], encours[annuite], k[annuite]
+        croissance = np.exp((k_a - 1) * np.log1p(r))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            restant = np.where(r != 0, N_a * croissance - A * (croissance - 1) / r, N_a * (1 - (k_a - 1) / nb[p_a]))
+        encours[annuite] = restant
+        principal[annuite] = A - restant * r
+
+    # Coupon : taux fixe, ou forward de la période + marge pour les jambes variables
+    taux_coupon = taux[position]
+    if variable.any():
+        if courbe is None:
+            raise ValueError("Une courbe de taux est nécessaire pour les jambes variables.")
+        jambe_variable = variable[position]
+        p_v, debut, fin = position[jambe_variable], temps_precedent[jambe_variable], temps[jambe_variable]
+        forward = ((facteurs_actualisation(courbe, p_v, debut) / facteurs_actualisation(courbe, p_v, fin) - 1)
+                   / (fin - debut))
+        taux_coupon[jambe_variable] = forward + marge[p_v]
+    interets = encours * taux_coupon * duree
+
+    return Echeancier(position, temps, temps_precedent, encours, interets, principal, len(positions))
+
+
+def actualiser(echeancier, courbe):
+    """Valeur actualisée de chaque position (tableau aligné sur les positions)."""
+    facteurs = facteurs_actualisation(courbe, echeancier.position, echeancier.temps)
+    return np.bincount(echeancier.position, weights=echeancier.flux * facteurs, minlength=echeancier.nb_positions)
+
+
+def _tranche_courbe(courbe, debut, fin):
+    return courbe if isinstance(courbe, CourbeTaux) else np.asarray(courbe, dtype=np.float64)[debut:fin]
+
+
+def valoriser(positions, courbe=None, taille_lot=TAILLE_LOT):
+    """Ajoute la colonne "Valeur actualisée" aux positions.
+
+    Sans ``courbe``, chaque position est actualisée à son propre
+    "Taux d'actualisation". Les positions sont traitées par lots de
+    ``taille_lot`` pour que les tableaux de flux restent en cache.
+    """
+    if courbe is None:
+        courbe = positions["Taux d'actualisation"].to_numpy(dtype=np.float64)
+    valeurs = np.empty(len(positions))
+    for debut in range(0, len(positions), taille_lot):
+        fin = debut + taille_lot
+        courbe_lot = _tranche_courbe(courbe, debut, fin)
+        valeurs[debut:fin] = actualiser(generer_echeancier(positions.iloc[debut:fin], courbe_lot), courbe_lot)
+    positions = positions.copy()
+    positions["Valeur actualisée"] = valeurs
+    return positions
+
+
+def calculer_eve(positions, courbe=None):
+    """Retourne ``(actifs, passifs, eve)`` après valorisation des positions."""
+    with etape("calcul", len(positions)):
+        valorisees = valoriser(positions, courbe)
+    actifs = valorisees[valorisees["Côté"] == "actif"]
+    passifs = valorisees[valorisees["Côté"] == "passif"]
+    eve = actifs["Valeur actualisée"].sum() - passifs["Valeur actualisée"].sum()
+    return actifs, passifs, eve
+
+
+def cote_feuille(nom_feuille):
+    return "passif" if "passif" in nom_feuille.lower() else "actif"
+
+
+def extraire_blocs(df, sheet_name):
+    """Positions d'une feuille : blocs Montant / taux d'actualisation / maturité / taux d'intérêt.
+
+    Les colonnes "Montant" sont repérées d'un coup sur la première ligne et
+    les quatre valeurs de chaque bloc sont lues par indexation positionnelle
+    dans la colonne suivante.
+    """
+    premiere = df.iloc[0].astype(str).str.strip().str.lower().to_numpy() if len(df) else np.array([])
+    indices = np.flatnonzero(premiere == "montant")
+    indices = indices[indices + 1 < df.shape[1]]
+    valeurs = np.full((4, len(indices)), np.nan)
+    lignes = min(len(df), 4)
+    if lignes and len(indices):
+        brut = df.iloc[:lignes, indices + 1].to_numpy().ravel()
+        nombres = pd.to_numeric(pd.Series(brut), errors="coerce").to_numpy(dtype=np.float64)
+        valeurs[:lignes] = nombres.reshape(lignes, -1)
+    complets = ~np.isnan(valeurs).any(axis=0)
+    montant, taux_actualisation, maturite, taux_interet = valeurs[:, complets]
+    return pd.DataFrame({
+        "Feuille": sheet_name,
+        "Élément": [f"Élément {i + 1}" for i in np.flatnonzero(complets)],
+        "Côté": cote_feuille(sheet_name),
+        "Montant": montant,
+        "Taux d'intérêt": taux_interet,
+        "Taux d'actualisation": taux_actualisation,
+        "Maturité": maturite,
+    })
+
+
+def positions_depuis_classeur(fichier_excel, feuilles=FEUILLES_EVE, chronometre=None):
+    """Charge toutes les feuilles du classeur en une passe et en extrait les positions.
+
+    Le classeur n'est ouvert qu'une fois pour toutes les feuilles (actif et
+    passif) ; ``fichier_excel`` peut aussi être un dictionnaire ``{feuille:
+    fichier}`` (voir :func:`~alm.ingestion.lire_sources`). Avec un
+    :class:`~alm.instrumentation.Chronometre`, les étapes "ouverture",
+    "lecture" et "extraction" sont mesurées.
+    """
+    chronometre = chronometre if chronometre is not None else Chronometre()
+    dfs = lire_sources(fichier_excel, {feuille: None for feuille in feuilles}, chronometre=chronometre)
+    with chronometre.etape("extraction"), etape("nettoyage", sum(len(df) for df in dfs.values())):
+        blocs = [extraire_blocs(dfs[feuille], feuille) for feuille in feuilles]
+        positions = pd.concat(blocs, ignore_index=True) if blocs else pd.DataFrame(columns=COLONNES_POSITIONS[:7])
+    return completer_positions(positions)
@@ -0,0 +1,161 @@
+"""ΔEVE sous les six chocs de taux réglementaires IRRBB (Bâle) et des chocs personnalisés.
+
+Les flux de toutes les positions sont répartis dans les 19 compartiments
+temporels de Bâle (flux placés au point médian du compartiment) et regroupés
+par feuille : on obtient une matrice flux (feuilles × compartiments). Les
+facteurs d'actualisation de tous les scénarios forment une matrice
+(scénarios × compartiments) ; la valeur actualisée de chaque feuille sous
+chaque scénario est alors un seul produit matriciel. Pour un très grand
+nombre de scénarios, ce produit peut être réparti sur un pool de processus.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from alm.eve import TAILLE_LOT, VARIABLE, completer_positions, generer_echeancier
+from alm.instrumentation import etape
+
+# Bornes et points médians des 19 compartiments temporels IRRBB (en années)
+BORNES_BALE = np.array([
+    0, 1 / 365, 1 / 12, 0.25, 0.5, 0.75, 1, 1.5, 2, 3, 4, 5, 6, 7, 8, 9, 10, 15, 20, np.inf,
+])
+POINTS_MEDIANS_BALE = np.array([
+    0.0028, 0.0417, 0.1667, 0.375, 0.625, 0.875, 1.25, 1.75, 2.5, 3.5,
+    4.5, 5.5, 6.5, 7.5, 8.5, 9.5, 12.5, 17.5, 25,
+])
+
+# Amplitudes des chocs standard (EUR) : parallèle, court, long
+CHOC_PARALLELE, CHOC_COURT, CHOC_LONG = 0.02, 0.025, 0.01
+
+# Au-delà de ce nombre de scénarios, le produit matriciel peut être réparti sur un pool
+SEUIL_POOL = 5_000
+
+
+def chocs_bale(temps=POINTS_MEDIANS_BALE, parallele=CHOC_PARALLELE, court=CHOC_COURT, long=CHOC_LONG):
+    """Les six chocs standard de Bâle (scénarios × compartiments), en taux décimaux."""
+    temps = np.asarray(temps, dtype=np.float64)
+    choc_court = court * np.exp(-temps / 4)
+    choc_long = long * (1 - np.exp(-temps / 4))
+    return pd.DataFrame(
+        [
+            np.full_like(temps, parallele),
+            np.full_like(temps, -parallele),
+            -0.65 * choc_court + 0.9 * choc_long,
+            0.8 * choc_court - 0.6 * choc_long,
+            choc_court,
+            -choc_court,
+        ],
+        index=["Parallèle haussier", "Parallèle baissier", "Pentification", "Aplatissement",
+               "Hausse des taux courts", "Baisse des taux courts"],
+        columns=temps,
+    )
+
+
+def plancher_bale(temps):
+    """Plancher post-choc : -100 pb au jour le jour, relevé de 5 pb par an jusqu'à 0 %."""
+    return np.minimum(-0.01 + 0.0005 * np.asarray(temps, dtype=np.float64), 0.0)
+
+
+def courbes_choquees(courbe, chocs, temps=POINTS_MEDIANS_BALE, plancher=True):
+    """Taux zéro choqués (scénarios × compartiments).
+
+    Le plancher ne s'applique qu'aux points dont le taux de base est au-dessus
+    de lui, comme le prévoit le standard.
+    """
+    base = courbe.zero(temps)
+    choques = base[None, :] + np.asarray(chocs, dtype=np.float64)
+    if plancher:
+        limite = np.minimum(plancher_bale(temps), base)
+        choques = np.maximum(choques, limite[None, :])
+    return choques
+
+
+def facteurs_scenarios(taux, temps=POINTS_MEDIANS_BALE):
+    """Matrice des facteurs d'actualisation (scénarios × compartiments)."""
+    return np.exp(-np.asarray(temps)[None, :] * np.log1p(taux))
+
+
+def flux_revision(echeancier, variable):
+    """Flux de l'échéancier et masque des flux retenus, jambes variables refinancées à la prochaine révision.
+
+    Pour une jambe variable (``variable`` est aligné sur les positions de
+    l'échéancier), seuls le coupon courant et le remboursement de l'encours
+    à la première date de paiement sont retenus.
+    """
+    flux = echeancier.flux
+    premier = echeancier.temps_precedent == 0
+    variable = variable[echeancier.position]
+    revision = variable & premier
+    flux[revision] = (echeancier.interets + echeancier.encours)[revision]
+    return flux, ~variable | premier
+
+
+def matrice_flux(positions, courbe, bornes=BORNES_BALE, groupe="Feuille"):
+    """Flux signés (actif +, passif −) par ``groupe`` et compartiment temporel.
+
+    Les jambes variables sont traitées comme des positions qui se
+    refinancent à la prochaine date de révision (voir :func:`flux_revision`).
+    """
+    positions = completer_positions(positions).reset_index(drop=True)
+    groupes, code_groupe = np.unique(positions[groupe].astype(str).to_numpy(), return_inverse=True)
+    signe = np.where(positions["Côté"].to_numpy() == "passif", -1.0, 1.0)
+    variable = (positions["Jambe"] == VARIABLE).to_numpy()
+    nb_compartiments = len(bornes) - 1
+    matrice = np.zeros(len(groupes) * nb_compartiments)
+
+    for debut in range(0, len(positions), TAILLE_LOT):
+        lot = slice(debut, debut + TAILLE_LOT)
+        echeancier = generer_echeancier(positions.iloc[lot], courbe)
+        position = echeancier.position + debut
+        flux, garde = flux_revision(echeancier, variable[lot])
+
+        compartiment = np.clip(np.searchsorted(bornes, echeancier.temps) - 1, 0, nb_compartiments - 1)
+        cles = code_groupe[position[garde]] * nb_compartiments + compartiment[garde]
+        matrice += np.bincount(cles, weights=(flux * signe[position])[garde], minlength=len(matrice))
+
+    return pd.DataFrame(matrice.reshape(len(groupes), nb_compartiments), index=groupes, columns=bornes[:-1])
+
+
+def _valeurs_lot(flux, taux, temps):
+    return flux @ facteurs_scenarios(taux, temps).T
+
+
+def valeurs_scenarios(flux, taux, temps=POINTS_MEDIANS_BALE, processus=None, seuil_pool=SEUIL_POOL):
+    """Valeurs actualisées (groupes × scénarios) en un produit matriciel.
+
+    Avec ``processus`` et plus de ``seuil_pool`` scénarios, les scénarios
+    sont découpés en lots calculés en parallèle.
+    """
+    flux = np.asarray(flux, dtype=np.float64)
+    taux = np.asarray(taux, dtype=np.float64)
+    if not processus or len(taux) <= seuil_pool:
+        return _valeurs_lot(flux, taux, temps)
+    lots = np.array_split(taux, processus)
+    with ProcessPoolExecutor(max_workers=processus) as pool:
+        resultats = pool.map(_valeurs_lot, [flux] * len(lots), lots, [temps] * len(lots))
+        return np.hstack(list(resultats))
+
+
+def delta_eve(positions, courbe, chocs=None, plancher=True, processus=None):
+    """Table des ΔEVE par scénario (lignes) et par feuille (colonnes), avec un total.
+
+    ``chocs`` est un DataFrame (scénarios × compartiments) de chocs
+    additifs ; par défaut les six chocs de Bâle. On peut y concaténer des
+    chocs personnalisés, par exemple issus de :func:`chocs_bale` avec
+    d'autres amplitudes.
+    """
+    if chocs is None:
+        chocs = chocs_bale()
+    with etape("agrégation", len(positions)):
+        flux = matrice_flux(positions, courbe)
+    taux_base = courbe.zero(POINTS_MEDIANS_BALE)[None, :]
+    taux = np.vstack([taux_base, courbes_choquees(courbe, chocs, plancher=plancher)])
+
+    with etape("calcul"):
+        valeurs = valeurs_scenarios(flux.to_numpy(), taux, processus=processus)
+    delta = (valeurs[:, 1:] - valeurs[:, :1]).T
+    table = pd.DataFrame(delta, index=chocs.index, columns=flux.index)
+    table["Total"] = table.sum(axis=1)
+    return table
@@ -0,0 +1,130 @@
+"""Sensibilités de l'EVE aux taux : DV01 et durées aux taux clés, calculées analytiquement en une passe.
+
+La valeur actualisée d'un flux ``F`` payé en ``t`` vaut ``F (1 + z(t))^-t`` ;
+sa dérivée par rapport au taux zéro est ``-t F (1 + z(t))^-(t + 1)``. Un
+choc de taux clé au ténor ``k`` déplace ``z(t)`` selon la fonction
+triangulaire du ténor (interpolation linéaire entre ténors voisins, plate
+au-delà des extrémités) : la dérivée de chaque flux est donc répartie sur
+ses deux ténors voisins. Pour une :class:`~alm.eve.CourbeTaux`, les ténors
+par défaut sont ses points et ces poids sont exactement ceux de
+l'interpolation de la courbe ; les sensibilités sont les dérivées par
+rapport à chacun de ses points.
+
+Les positions sont déroulées par lots comme pour une valorisation ; les
+valeurs et les dérivées de tous les flux sont calculées ensemble, puis
+regroupées par (feuille, ténor) et par position avec ``np.bincount``. Le
+coût reste proche de celui d'une valorisation, quel que soit le nombre de
+ténors. Les jambes variables se refinancent à la prochaine révision, comme
+pour les chocs IRRBB.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from alm.eve import TAILLE_LOT, VARIABLE, CourbeTaux, completer_positions, generer_echeancier, taux_flux
+from alm.eve_scenarios import flux_revision
+from alm.instrumentation import etape
+
+# Ténors des taux clés (années) quand les positions sont actualisées à leur propre taux
+TENORS_CLES = np.array([0.25, 0.5, 1, 2, 3, 5, 7, 10, 15, 20, 30])
+UN_PB = 1e-4
+
+
+def poids_tenors(tenors, temps):
+    """Ténor gauche et poids du ténor droit de chaque flux (fonctions triangulaires, plates aux bornes)."""
+    if len(tenors) == 1:
+        return np.zeros(len(temps), dtype=np.int64), np.zeros(len(temps))
+    # Indice fractionnaire du flux dans la grille des ténors
+    indice = np.interp(temps, tenors, np.arange(len(tenors), dtype=np.float64))
+    gauche = np.minimum(indice.astype(np.int64), len(tenors) - 2)
+    return gauche, indice - gauche
+
+
+def libelle_tenor(tenor):
+    """Libellé d'un ténor en années : "3 mois", "1 an", "10 ans"."""
+    if tenor < 1:
+        return f"{tenor * 12:g} mois"
+    return f"{tenor:g} an" if tenor == 1 else f"{tenor:g} ans"
+
+
+@dataclass
+class SensibilitesEVE:
+    """Valeurs signées (actif +, passif −) et dérivées par rapport aux taux clés, par groupe et par position."""
+    valeurs: pd.Series
+    gradient: pd.DataFrame
+    gradient_positions: np.ndarray
+
+    @property
+    def eve(self):
+        return float(self.valeurs.sum())
+
+    def dv01(self):
+        """ΔEVE pour +1 pb sur chaque taux clé (groupes × ténors), avec le total par groupe et le portefeuille."""
+        table = (self.gradient * UN_PB).rename(columns=libelle_tenor).rename_axis(columns="Ténor")
+        table.loc["Portefeuille"] = table.sum()
+        table["Total"] = table.sum(axis=1)
+        return table
+
+    def durees_taux_cles(self):
+        """Durées aux taux clés : -dV/dz / V par groupe, et pour l'EVE du portefeuille."""
+        table = (-self.gradient.div(self.valeurs, axis=0)).rename(columns=libelle_tenor).rename_axis(columns="Ténor")
+        table.loc["Portefeuille"] = (-self.gradient.sum() / self.eve).to_numpy()
+        table["Total"] = table.sum(axis=1)
+        return table
+
+
+def sensibilites_eve(positions, courbe=None, tenors=None, groupe="Feuille", taille_lot=TAILLE_LOT):
+    """Dérivées des valeurs actualisées par rapport aux taux clés, pour toutes les positions et tous les ténors.
+
+    Sans ``courbe``, chaque position est actualisée à son propre
+    "Taux d'actualisation" et un taux clé choque les taux de tous les flux
+    de son voisinage (ténors :data:`TENORS_CLES` par défaut).
+    """
+    positions = completer_positions(positions).reset_index(drop=True)
+    if courbe is None:
+        courbe = positions["Taux d'actualisation"].to_numpy(dtype=np.float64)
+    if tenors is None:
+        tenors = courbe.maturites if isinstance(courbe, CourbeTaux) else TENORS_CLES
+    tenors = np.sort(np.asarray(tenors, dtype=np.float64))
+    nb_tenors = len(tenors)
+    groupes, code_groupe = np.unique(positions[groupe].astype(str).to_numpy(), return_inverse=True)
+    signe = np.where(positions["Côté"].to_numpy() == "passif", -1.0, 1.0)
+    variable = (positions["Jambe"] == VARIABLE).to_numpy()
+
+    valeurs = np.zeros(len(groupes))
+    gradient = np.zeros(len(groupes) * nb_tenors)
+    gradient_positions = np.zeros(len(positions))
+    with etape("calcul", len(positions)):
+        for debut in range(0, len(positions), taille_lot):
+            lot = slice(debut, debut + taille_lot)
+            courbe_lot = courbe if isinstance(courbe, CourbeTaux) else courbe[lot]
+            echeancier = generer_echeancier(positions.iloc[lot], courbe_lot)
+            flux, garde = flux_revision(echeancier, variable[lot])
+            position, temps = echeancier.position, echeancier.temps
+            if not garde.all():
+                flux, position, temps = flux[garde], position[garde], temps[garde]
+
+            z = taux_flux(courbe_lot, position, temps)
+            valeur = flux * np.exp(-temps * np.log1p(z))
+            derivee = -temps * valeur / (1 + z)
+
+            # Valeurs et dérivées parallèles par position, puis par groupe ; dérivées par taux clé au niveau des flux
+            nb = len(signe[lot])
+            valeurs += np.bincount(code_groupe[lot], weights=np.bincount(position, weights=valeur, minlength=nb)
+                                   * signe[lot], minlength=len(groupes))
+            gradient_positions[lot] = np.bincount(position, weights=derivee, minlength=nb) * signe[lot]
+            derivee *= signe[lot][position]
+            gauche, droite = poids_tenors(tenors, temps)
+            cles = code_groupe[lot][position] * nb_tenors + gauche
+            gradient += np.bincount(cles, weights=derivee * (1 - droite), minlength=len(gradient))
+            gradient += np.bincount(cles + (nb_tenors > 1), weights=derivee * droite, minlength=len(gradient))
+
+    index = pd.Index(groupes, name=groupe)
+    return SensibilitesEVE(
+        valeurs=pd.Series(valeurs, index=index, name="Valeur actualisée"),
+        gradient=pd.DataFrame(gradient.reshape(len(groupes), nb_tenors), index=index,
+                              columns=pd.Index(tenors, name="Ténor (ans)")),
+        gradient_positions=gradient_positions,
+    )
@@ -0,0 +1,343 @@
+"""Couche d'ingestion commune des fichiers Excel, avec cache Parquet sur disque.
+
+Chaque fichier est identifié par l'empreinte SHA-256 de son contenu. Seules
+les colonnes utiles au calculateur sont converties, avec le moteur
+``calamine`` lorsqu'il est installé (``openpyxl`` sinon), puis le résultat est
+écrit en Parquet. Les lectures suivantes du même fichier ne coûtent plus
+qu'une lecture Parquet. Le cache est borné en taille : les entrées les moins
+récemment utilisées sont supprimées en premier.
+"""
+
+import hashlib
+import io
+import os
+from contextlib import nullcontext, suppress
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from alm import instrumentation
+
+try:
+    import python_calamine  # noqa: F401
+    MOTEUR_EXCEL = "calamine"
+except ImportError:
+    MOTEUR_EXCEL = "openpyxl"
+
+REPERTOIRE_CACHE = Path(os.environ.get("ALM_CACHE_DIR", Path.home() / ".cache" / "alm"))
+TAILLE_MAX_CACHE = int(os.environ.get("ALM_CACHE_TAILLE_MAX", 2 * 1024 ** 3))
+# Nombre de lignes par bloc en lecture par flux
+TAILLE_BLOC = 200_000
+
+# Métadonnée Parquet listant les colonnes mixtes (ex. Level = 1 / "2a") stockées en texte
+_CLE_MIXTES = b"alm_colonnes_mixtes"
+
+# Saisies acceptées pour une colonne Oui / Non (après passage en minuscules) ; une case vide vaut Non
+VALEURS_BOOLEENNES = {
+    "oui": True, "o": True, "vrai": True, "true": True, "1": True, "x": True,
+    "non": False, "n": False, "faux": False, "false": False, "0": False, "": False,
+}
+
+
+def contenu(fichier):
+    """Octets d'un fichier téléversé, d'un chemin ou d'un objet fichier."""
+    if isinstance(fichier, (bytes, bytearray)):
+        return bytes(fichier)
+    if isinstance(fichier, (str, os.PathLike)):
+        return Path(fichier).read_bytes()
+    if hasattr(fichier, "getvalue"):
+        return fichier.getvalue()
+    position = fichier.tell()
+    fichier.seek(0)
+    donnees = fichier.read()
+    fichier.seek(position)
+    return donnees
+
+
+def empreinte(fichier):
+    """Empreinte SHA-256 du contenu du fichier."""
+    return hashlib.sha256(contenu(fichier)).hexdigest()
+
+
+def _cle(hash_fichier, feuille, colonnes):
+    selection = "*" if colonnes is None else "|".join(sorted(map(str, colonnes)))
+    suffixe = hashlib.sha1(f"{feuille}\x00{selection}".encode()).hexdigest()[:16]
+    return f"{hash_fichier}-{suffixe}"
+
+
+def _vers_arrow(df):
+    """Convertit en table Arrow ; les colonnes de types mélangés sont stockées en texte."""
+    df = df.copy(deep=False)
+    df.columns = [str(c) for c in df.columns]
+    mixtes = []
+    for nom in df.columns:
+        if df[nom].dtype == object:
+            try:
+                pa.array(df[nom], from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                df[nom] = df[nom].where(df[nom].isna(), df[nom].astype(str))
+                mixtes.append(nom)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadonnees = dict(table.schema.metadata or {})
+    metadonnees[_CLE_MIXTES] = "\x1f".join(mixtes).encode()
+    return table.replace_schema_metadata(metadonnees)
+
+
+def _restaurer_mixte(serie):
+    """Rend leur type numérique aux valeurs d'une colonne mixte stockée en texte."""
+    nombres = pd.to_numeric(serie, errors="coerce")
+    entiers = nombres.notna() & (nombres % 1 == 0)
+    resultat = serie.astype(object)
+    resultat[nombres.notna()] = nombres[nombres.notna()].astype(object)
+    resultat[entiers] = nombres[entiers].astype("int64").astype(object)
+    return resultat
+
+
+def booleens(serie):
+    """Colonne Oui / Non convertie en booléens ; les conversions ne portent que sur les valeurs distinctes.
+
+    Lève ``ValueError`` pour toute saisie absente de :data:`VALEURS_BOOLEENNES`.
+    """
+    indices, distinctes = pd.factorize(serie)
+    textes = [str(int(v)) if isinstance(v, (float, np.floating)) and float(v).is_integer() else str(v).strip().lower()
+              for v in distinctes]
+    inconnues = sorted({str(v) for v, t in zip(distinctes, textes) if t not in VALEURS_BOOLEENNES})
+    if inconnues:
+        raise ValueError(f"Valeurs non reconnues dans la colonne '{serie.name}' (Oui / Non attendu) : {inconnues}")
+    valeurs = np.array([VALEURS_BOOLEENNES[t] for t in textes] + [False])
+    return valeurs[indices]
+
+
+def _depuis_arrow(table):
+    df = table.to_pandas()
+    mixtes = (table.schema.metadata or {}).get(_CLE_MIXTES, b"").decode()
+    for nom in filter(None, mixtes.split("\x1f")):
+        df[nom] = _restaurer_mixte(df[nom])
+    return df
+
+
+class CacheParquet:
+    """Cache disque de DataFrames au format Parquet avec éviction LRU par taille."""
+
+    def __init__(self, repertoire=REPERTOIRE_CACHE, taille_max=TAILLE_MAX_CACHE):
+        self.repertoire = Path(repertoire)
+        self.taille_max = taille_max
+
+    def chemin(self, cle):
+        return self.repertoire / f"{cle}.parquet"
+
+    def lire(self, cle):
+        chemin = self.chemin(cle)
+        try:
+            table = pq.read_table(chemin)
+        except FileNotFoundError:
+            return None
+        except (OSError, pa.ArrowInvalid):
+            # Entrée tronquée ou corrompue (écriture interrompue) : traitée comme absente et supprimée
+            with suppress(OSError):
+                chemin.unlink(missing_ok=True)
+            return None
+        os.utime(chemin)  # marque l'entrée comme récemment utilisée
+        return _depuis_arrow(table)
+
+    def ecrire(self, cle, df):
+        self.repertoire.mkdir(parents=True, exist_ok=True)
+        chemin = self.chemin(cle)
+        temporaire = chemin.with_suffix(f".{os.getpid()}.tmp")
+        pq.write_table(_vers_arrow(df), temporaire)
+        os.replace(temporaire, chemin)
+        self.evincer()
+
+    def evincer(self):
+        """Supprime les entrées les moins récemment utilisées au-delà de ``taille_max``."""
+        entrees = []
+        for chemin in self.repertoire.glob("*.parquet"):
+            try:
+                etat = chemin.stat()
+            except FileNotFoundError:
+                continue
+            entrees.append((etat.st_mtime, etat.st_size, chemin))
+        total = sum(taille for _, taille, _ in entrees)
+        for _, taille, chemin in sorted(entrees):
+            if total <= self.taille_max:
+                break
+            chemin.unlink(missing_ok=True)
+            total -= taille
+
+
+_cache_defaut = CacheParquet()
+
+
+def _parser(classeur, feuille, colonnes):
+    usecols = None if colonnes is None else (lambda nom, attendues=set(colonnes): nom in attendues)
+    return classeur.parse(sheet_name=feuille, usecols=usecols)
+
+
+def lire_feuilles(fichier, feuilles, cache=None, chronometre=None):
+    """Lit plusieurs feuilles d'un classeur : ``{feuille: colonnes ou None}`` -> ``{feuille: DataFrame}``.
+
+    Les feuilles absentes du cache sont converties (le classeur n'est ouvert
+    qu'une fois) puis mises en cache ; les autres sont relues depuis Parquet
+    sans ouvrir le classeur. Un :class:`~alm.instrumentation.Chronometre`
+    éventuel reçoit les durées des étapes "ouverture" et "lecture".
+    """
+    with instrumentation.etape("chargement") as mesure:
+        resultats = _lire_feuilles(fichier, feuilles, cache, chronometre)
+        mesure.ajouter_lignes(sum(len(df) for df in resultats.values()))
+    return resultats
+
+
+def _lire_feuilles(fichier, feuilles, cache, chronometre):
+    etape = chronometre.etape if chronometre is not None else (lambda nom: nullcontext())
+    cache = _cache_defaut if cache is None else cache
+    with etape("ouverture"):
+        donnees = contenu(fichier)
+        hash_fichier = hashlib.sha256(donnees).hexdigest()
+    classeur = None
+    resultats = {}
+    for feuille, colonnes in feuilles.items():
+        cle = _cle(hash_fichier, feuille, colonnes)
+        with etape("lecture"):
+            df = cache.lire(cle)
+        if df is None:
+            if classeur is None:
+                with etape("ouverture"):
+                    classeur = pd.ExcelFile(io.BytesIO(donnees), engine=MOTEUR_EXCEL)
+            with etape("lecture"):
+                df = _parser(classeur, feuille, colonnes)
+                try:
+                    cache.ecrire(cle, df)
+                except OSError:
+                    pass  # cache indisponible (disque plein, lecture seule) : on garde le résultat parsé
+                else:
+                    # Relecture pour des types identiques aux lectures suivantes ; l'entrée peut déjà être évincée
+                    relu = cache.lire(cle)
+                    df = df if relu is None else relu
+        resultats[feuille] = df
+    return resultats
+
+
+def lire_feuille(fichier, feuille, colonnes=None, cache=None):
+    """Lit une feuille (éventuellement restreinte à ``colonnes``) via le cache Parquet."""
+    return lire_feuilles(fichier, {feuille: colonnes}, cache=cache)[feuille]
+
+
+def _format(fichier):
+    """Format d'une source ("excel", "csv" ou "parquet") d'après son nom ou sa signature."""
+    nom = str(getattr(fichier, "name", fichier if isinstance(fichier, (str, os.PathLike)) else ""))
+    suffixe = Path(nom).suffix.lower()
+    if suffixe in (".csv", ".txt"):
+        return "csv"
+    if suffixe in (".parquet", ".pq"):
+        return "parquet"
+    if suffixe in (".xlsx", ".xlsm", ".xls"):
+        return "excel"
+    if isinstance(fichier, (str, os.PathLike)):
+        with open(fichier, "rb") as flux:
+            entete = flux.read(4)
+    else:
+        entete = contenu(fichier)[:4]
+    return "parquet" if entete == b"PAR1" else "excel"
+
+
+def _source(fichier):
+    """Chemin ou objet fichier exploitable par les lecteurs par blocs."""
+    if isinstance(fichier, (str, os.PathLike)):
+        return fichier
+    return io.BytesIO(contenu(fichier))
+
+
+def _blocs_excel(source, feuille, colonnes, taille_bloc):
+    import openpyxl
+
+    classeur = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        lignes = classeur[feuille].iter_rows(values_only=True)
+        entete = next(lignes, ())
+        if colonnes is None:
+            colonnes = [c for c in entete if c is not None]
+        manquantes = [c for c in colonnes if c not in entete]
+        if manquantes:
+            raise ValueError(f"Colonnes absentes de la feuille '{feuille}' : {', '.join(map(str, manquantes))}")
+        indices = [entete.index(c) for c in colonnes]
+        bloc = []
+        for ligne in lignes:
+            bloc.append([ligne[i] if i < len(ligne) else None for i in indices])
+            if len(bloc) == taille_bloc:
+                yield pd.DataFrame(bloc, columns=colonnes)
+                bloc = []
+        if bloc:
+            yield pd.DataFrame(bloc, columns=colonnes)
+    finally:
+        classeur.close()
+
+
+def lire_par_blocs(fichier, feuille=None, colonnes=None, taille_bloc=TAILLE_BLOC):
+    """Itère sur un fichier Excel, CSV ou Parquet par blocs de ``taille_bloc`` lignes.
+
+    Seules les ``colonnes`` demandées sont matérialisées ; la mémoire utilisée
+    est bornée par la taille d'un bloc (``feuille`` ne sert que pour Excel).
+    """
+    if hasattr(fichier, "vers_dataframe"):  # jeu de l'entrepôt de positions, déjà typé
+        for lot in fichier.table(colonnes).to_batches(taille_bloc):
+            yield lot.to_pandas()
+        return
+    source = _source(fichier)
+    format_fichier = _format(fichier)
+    if format_fichier == "csv":
+        yield from pd.read_csv(source, usecols=colonnes, chunksize=taille_bloc)
+    elif format_fichier == "parquet":
+        for lot in pq.ParquetFile(source).iter_batches(batch_size=taille_bloc, columns=colonnes):
+            yield lot.to_pandas()
+    else:
+        yield from _blocs_excel(source, feuille, colonnes, taille_bloc)
+
+
+def lire_table(fichier, feuille=None, colonnes=None, cache=None):
+    """Lit entièrement un fichier Excel (via le cache Parquet), CSV ou Parquet.
+
+    Comme pour Excel, les ``colonnes`` absentes du fichier sont ignorées. Un
+    jeu de l'entrepôt de positions (:class:`alm.entrepot.JeuPositions`) est
+    lu directement, sans analyse.
+    """
+    if not hasattr(fichier, "vers_dataframe") and _format(fichier) == "excel":
+        return lire_feuille(fichier, feuille, colonnes, cache=cache)
+    with instrumentation.etape("chargement") as mesure:
+        df = _lire_table(fichier, colonnes)
+        mesure.ajouter_lignes(len(df))
+    return df
+
+
+def _lire_table(fichier, colonnes):
+    if hasattr(fichier, "vers_dataframe"):
+        return fichier.vers_dataframe(colonnes)
+    if _format(fichier) == "csv":
+        usecols = None if colonnes is None else (lambda nom, attendues=set(colonnes): nom in attendues)
+        return pd.read_csv(_source(fichier), usecols=usecols)
+    source = _source(fichier)
+    if colonnes is not None:
+        presentes = set(pq.read_schema(source).names)
+        colonnes = [c for c in colonnes if c in presentes]
+        if hasattr(source, "seek"):
+            source.seek(0)
+    return pd.read_parquet(source, columns=colonnes)
+
+
+def lire_sources(sources, feuilles, cache=None, chronometre=None):
+    """Comme :func:`lire_feuilles`, mais ``sources`` peut aussi être un dictionnaire ``{feuille: fichier}``.
+
+    Chaque feuille est alors lue dans son propre fichier Excel, CSV ou Parquet
+    (voir :func:`lire_table`) ; sinon ``sources`` est un classeur unique.
+    """
+    if not isinstance(sources, dict):
+        return lire_feuilles(sources, feuilles, cache=cache, chronometre=chronometre)
+    manquantes = [feuille for feuille in feuilles if feuille not in sources]
+    if manquantes:
+        raise ValueError(f"Fichiers absents pour les feuilles : {', '.join(manquantes)}")
+    etape = chronometre.etape if chronometre is not None else (lambda nom: nullcontext())
+    with etape("lecture"):
+        return {feuille: lire_table(sources[feuille], feuille, colonnes, cache=cache)
+                for feuille, colonnes in feuilles.items()}
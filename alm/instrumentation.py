@@ -0,0 +1,226 @@
+"""Mesure du temps passé dans chaque étape d'un calcul.
+
+:class:`Chronometre` cumule des durées nommées pour un calcul donné.
+:class:`Profil` mesure en plus le temps CPU, le pic mémoire (allocations
+Python / NumPy suivies par ``tracemalloc``) et le nombre de lignes traitées
+par étape : chargement, nettoyage, agrégation, calcul, rendu. Les modules de
+calcul annoncent leurs étapes avec :func:`etape` ; tant qu'aucun profil n'est
+actif (:meth:`Profil.activer`), cet appel renvoie un contexte vide partagé et
+ne coûte qu'une lecture de variable de contexte.
+
+``tracemalloc`` est global au processus alors que les sessions Streamlit
+s'exécutent dans des fils distincts : le suivi démarre avec le premier profil
+actif et s'arrête avec le dernier (compteur protégé par un verrou), et chaque
+relevé reporte le pic sur les étapes ouvertes de tous les profils actifs avant
+de le réinitialiser. Le pic mémoire d'une étape est donc celui du processus :
+il inclut les allocations des sessions qui calculent en même temps.
+"""
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+ETAPES = ("chargement", "nettoyage", "agrégation", "calcul", "rendu")
+# Fichier JSON lines où sont ajoutées les mesures des pages (non défini : pas d'export)
+FICHIER_PERFORMANCE = os.environ.get("ALM_PERFORMANCE_JSONL")
+
+
+class Chronometre:
+    """Cumule la durée (en secondes) de chaque étape nommée, dans l'ordre d'apparition."""
+
+    def __init__(self):
+        self.durees = {}
+
+    @contextmanager
+    def etape(self, nom):
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durees[nom] = self.durees.get(nom, 0.0) + time.perf_counter() - debut
+
+    def tableau(self):
+        """Durées par étape en DataFrame (secondes et part du total)."""
+        import pandas as pd
+
+        total = sum(self.durees.values()) or 1.0
+        return pd.DataFrame({
+            "Étape": list(self.durees),
+            "Durée (s)": list(self.durees.values()),
+            "Part (%)": [100 * d / total for d in self.durees.values()],
+        })
+
+
+class Mesure:
+    """Cumul d'une étape : durée, temps CPU, pic mémoire (octets), lignes et nombre de passages."""
+
+    __slots__ = ("duree", "cpu", "memoire_max", "lignes", "appels")
+
+    def __init__(self):
+        self.duree = self.cpu = 0.0
+        self.memoire_max = self.lignes = self.appels = 0
+
+    def ajouter_lignes(self, nombre):
+        self.lignes += int(nombre)
+
+
+class _MesureNulle:
+    __slots__ = ()
+
+    def ajouter_lignes(self, nombre):
+        pass
+
+
+_SANS_MESURE = nullcontext(_MesureNulle())
+_profil_courant = ContextVar("profil_courant", default=None)
+
+# Profils qui suivent la mémoire ; tracemalloc tourne tant que la liste n'est pas vide
+_profils_memoire = []
+_verrou_memoire = threading.Lock()
+_trace_demarree = False
+
+
+class Profil:
+    """Mesures par étape, dans l'ordre d'apparition.
+
+    Les durées et temps CPU sont exclusifs : le temps passé dans une étape
+    imbriquée est retiré de l'étape englobante, si bien que les étapes se
+    partagent le temps total. Une étape rouverte à l'intérieur d'elle-même
+    (ex. un chargement qui en appelle un autre) n'est comptée qu'une fois. Le
+    pic mémoire d'une étape est mesuré par rapport à la mémoire allouée à son
+    ouverture ; il inclut celui des étapes imbriquées et, à l'échelle du
+    processus, les allocations des autres profils actifs.
+    """
+
+    def __init__(self, memoire=True):
+        self.memoire = memoire
+        self.mesures = {}
+        self._ouvertes = []  # [nom, mémoire à l'ouverture, pic observé, durée et CPU des étapes imbriquées]
+
+    @staticmethod
+    def _pic():
+        """Reporte le pic courant sur les étapes ouvertes de tous les profils actifs puis le réinitialise."""
+        with _verrou_memoire:
+            courant, pic = tracemalloc.get_traced_memory()
+            for profil in _profils_memoire:
+                for ouverte in profil._ouvertes:
+                    ouverte[2] = max(ouverte[2], pic)
+            tracemalloc.reset_peak()
+        return courant
+
+    @contextmanager
+    def etape(self, nom, lignes=0):
+        mesure = self.mesures.get(nom)
+        if mesure is None:
+            mesure = self.mesures[nom] = Mesure()
+        if any(ouverte[0] == nom for ouverte in self._ouvertes):
+            mesure.ajouter_lignes(lignes)
+            yield mesure
+            return
+        suivi = self in _profils_memoire
+        courant = self._pic() if suivi else 0
+        self._ouvertes.append([nom, courant, courant, 0.0, 0.0])
+        debut, debut_cpu = time.perf_counter(), time.process_time()
+        try:
+            yield mesure
+        finally:
+            duree, cpu = time.perf_counter() - debut, time.process_time() - debut_cpu
+            if suivi:
+                self._pic()
+            _, depart, pic, duree_imbriquees, cpu_imbriquees = self._ouvertes.pop()
+            mesure.duree += duree - duree_imbriquees
+            mesure.cpu += cpu - cpu_imbriquees
+            mesure.appels += 1
+            mesure.ajouter_lignes(lignes)
+            mesure.memoire_max = max(mesure.memoire_max, pic - depart)
+            if self._ouvertes:
+                self._ouvertes[-1][3] += duree
+                self._ouvertes[-1][4] += cpu
+
+    @contextmanager
+    def activer(self):
+        """Rend ce profil courant : les appels à :func:`etape` du contexte y sont enregistrés."""
+        if self.memoire:
+            self._suivre_memoire(True)
+        jeton = _profil_courant.set(self)
+        try:
+            yield self
+        finally:
+            _profil_courant.reset(jeton)
+            if self.memoire:
+                self._suivre_memoire(False)
+
+    def _suivre_memoire(self, actif):
+        """Inscrit ou retire le profil ; démarre ou arrête tracemalloc au premier et au dernier profil."""
+        global _trace_demarree
+        with _verrou_memoire:
+            if actif:
+                if not _profils_memoire and not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    _trace_demarree = True
+                _profils_memoire.append(self)
+            else:
+                _profils_memoire.remove(self)
+                # Un suivi lancé hors des profils (PYTHONTRACEMALLOC) n'est pas arrêté
+                if not _profils_memoire and _trace_demarree:
+                    tracemalloc.stop()
+                    _trace_demarree = False
+
+    def tableau(self):
+        """Mesures par étape en DataFrame."""
+        import pandas as pd
+
+        lignes = [(nom, m.duree, m.cpu, m.memoire_max / 1024 ** 2, m.lignes, m.lignes / m.duree if m.duree else 0.0)
+                  for nom, m in self.mesures.items()]
+        return pd.DataFrame(lignes, columns=["Étape", "Durée (s)", "CPU (s)", "Pic mémoire (Mo)", "Lignes",
+                                             "Lignes / s"])
+
+    def enregistrements(self, **contexte):
+        """Un dictionnaire par étape, complété par ``contexte`` (page, session…)."""
+        horodatage = datetime.now(timezone.utc).isoformat()
+        return [{"horodatage": horodatage, **contexte, "etape": nom, "duree_s": m.duree, "cpu_s": m.cpu,
+                 "memoire_max_octets": m.memoire_max, "lignes": m.lignes, "appels": m.appels}
+                for nom, m in self.mesures.items()]
+
+    def jsonl(self, **contexte):
+        return "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in self.enregistrements(**contexte))
+
+    def exporter_jsonl(self, chemin=FICHIER_PERFORMANCE, **contexte):
+        """Ajoute les mesures au fichier JSON lines ``chemin``."""
+        with open(chemin, "a", encoding="utf-8") as fichier:
+            fichier.write(self.jsonl(**contexte))
+
+
+def etape(nom, lignes=0):
+    """Contexte de mesure de l'étape ``nom`` dans le profil courant (contexte vide si aucun n'est actif).
+
+    Le contexte fournit un objet dont ``ajouter_lignes(n)`` compte les lignes traitées.
+    """
+    profil = _profil_courant.get()
+    if profil is None:
+        return _SANS_MESURE
+    return profil.etape(nom, lignes)
+
+
+_FIN = object()
+
+
+def iterer(iterable, nom):
+    """Itère sur ``iterable`` (ex. des blocs de DataFrame) en comptant chaque ``next`` dans l'étape ``nom``."""
+    if _profil_courant.get() is None:
+        yield from iterable
+        return
+    iterateur = iter(iterable)
+    while True:
+        with etape(nom) as mesure:
+            element = next(iterateur, _FIN)
+            if element is not _FIN and hasattr(element, "__len__"):
+                mesure.ajouter_lignes(len(element))
+        if element is _FIN:
+            return
+        yield element
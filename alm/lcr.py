@@ -0,0 +1,203 @@
+"""Moteur de calcul du LCR (Liquidity Coverage Ratio).
+
+Chaque table de pondération est transformée en vecteurs alignés (codes, taux)
+et chaque fichier n'est parcouru qu'une seule fois : les codes sont traduits
+en positions dans ces vecteurs et les montants cumulés par catégorie en une
+passe, puis pondérés d'un seul coup au lieu de refiltrer le DataFrame
+catégorie par catégorie. Les mêmes agrégats peuvent être alimentés bloc par
+bloc pour les fichiers plus gros que la mémoire.
+"""
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from alm.ingestion import TAILLE_BLOC, lire_par_blocs
+from alm.instrumentation import etape, iterer
+from alm.sommes import SommesExactes
+
+COLONNE_MONTANT = "c/v LCY balance"
+COLONNE_CATEGORIE = "Code category"
+COLONNE_NIVEAU = "Level"
+
+# Colonnes effectivement lues dans chaque fichier d'entrée
+COLONNES_BALANCE = [COLONNE_NIVEAU, COLONNE_CATEGORIE, COLONNE_MONTANT]
+COLONNES_FLUX = [COLONNE_CATEGORIE, COLONNE_MONTANT]
+# Feuilles de la balance, de l'échéancier et des emplois interbancaires
+FEUILLES_LCR = ("Balance", "LDSCHED_20211231", "Feuil1")
+
+# Décotes appliquées aux actifs liquides de haute qualité par niveau
+DECOTES_HQLA = {1: 1.0, "2a": 0.85, "2b": 0.5}
+
+# Taux de fuite (%) des sorties de trésorerie par code catégorie
+PONDERATIONS_SORTIES = {
+    40: 100, 60: 10, 70: 15, 80: 5, 90: 3, 110: 10, 140: 5, 150: 25, 170: 25, 180: 100, 190: 25,
+    200: 25, 220: 100, 230: 100, 250: 20, 260: 40, 280: 20, 290: 10, 300: 100, 320: 100, 330: 100,
+    340: 100, 370: 100, 380: 100, 390: 100, 400: 100, 420: 100, 430: 100, 440: 100, 450: 50,
+    480: 5, 490: 10, 510: 5, 520: 10, 530: 200, 540: 200, 560: 75, 590: 5, 600: 30, 610: 200,
+    630: 10, 640: 100, 660: 5, 670: 30, 680: 200, 700: 75, 710: 100, 900: 100, 910: 100, 1040: 7,
+    1050: 15, 1060: 25, 1070: 30, 1080: 35, 1090: 50, 1110: 25, 1120: 100
+}
+
+# Taux d'entrée (%) des entrées de trésorerie par code catégorie
+PONDERATIONS_ENTREES = {
+    40: 100, 60: 50, 70: 50, 80: 50, 90: 50, 130: 5, 150: 100, 160: 100, 170: 100, 180: 100, 190: 100,
+    200: 20, 210: 100, 220: 100, 230: 100, 260: 100, 290: 100, 300: 93, 310: 85, 320: 75, 330: 70,
+    340: 65, 350: 50, 380: 50, 390: 100, 400: 100
+}
+
+# Les entrées ne peuvent couvrir que 75 % des sorties
+PLAFOND_ENTREES = 0.75
+
+
+@dataclass
+class ResultatLCR:
+    hqla_par_niveau: dict
+    total_hqla: float
+    sorties: float
+    entrees: float
+    sorties_nettes: float
+    lcr: float
+    detail_sorties: pd.DataFrame = field(repr=False)
+    detail_entrees: pd.DataFrame = field(repr=False)
+
+
+def table_ponderations(ponderations):
+    """Convertit un dictionnaire {code: %} en vecteurs (codes, taux décimaux)."""
+    codes = np.fromiter(ponderations.keys(), dtype=np.int64, count=len(ponderations))
+    taux = np.fromiter(ponderations.values(), dtype=np.float64, count=len(ponderations)) / 100
+    return codes, taux
+
+
+def _detail(codes, taux, montants):
+    return pd.DataFrame({
+        COLONNE_CATEGORIE: codes,
+        "Pondération (%)": taux * 100,
+        "Montant": montants,
+        "Montant pondéré": montants * taux,
+    })
+
+
+class AccumulateurLCR:
+    """Agrégats courants du LCR (HQLA par niveau, flux par catégorie), alimentés bloc par bloc.
+
+    Les codes sont traduits en positions dans les tables de pondération avec
+    ``Index.get_indexer`` (même égalité que ``df["Code category"] == code`` :
+    40 et 40.0 correspondent, "40" non) et les montants absolus sont cumulés
+    par des sommes exactes. Le résultat est donc identique quel que soit le
+    découpage des fichiers en blocs.
+    """
+
+    def __init__(self):
+        self.codes_sorties, self.taux_sorties = table_ponderations(PONDERATIONS_SORTIES)
+        self.codes_entrees, self.taux_entrees = table_ponderations(PONDERATIONS_ENTREES)
+        # Le niveau 1 arrive en texte ("1") depuis les fichiers CSV / Parquet
+        self._index_niveaux = pd.Index(list(DECOTES_HQLA) + ["1"], dtype=object)
+        self._positions_niveaux = np.array([*range(len(DECOTES_HQLA)), 0, -1])
+        self._index_sorties = pd.Index(self.codes_sorties)
+        self._index_entrees = pd.Index(self.codes_entrees)
+        self.hqla = SommesExactes(len(DECOTES_HQLA))
+        self.sorties = SommesExactes(len(self.codes_sorties))
+        self.entrees = SommesExactes(len(self.codes_entrees))
+
+    def ajouter_balance(self, bloc, signe=1):
+        """Intègre (ou retire si ``signe=-1``) un bloc de la balance (HQLA et sorties)."""
+        montants = bloc[COLONNE_MONTANT].abs().to_numpy(dtype=np.float64)
+        niveaux = self._positions_niveaux[self._index_niveaux.get_indexer(bloc[COLONNE_NIVEAU])]
+        self.hqla.ajouter(niveaux, montants, signe)
+        self.sorties.ajouter(self._index_sorties.get_indexer(bloc[COLONNE_CATEGORIE]), montants, signe)
+
+    def ajouter_flux(self, bloc, signe=1):
+        """Intègre (ou retire) un bloc de l'échéancier ou des emplois interbancaires (entrées)."""
+        montants = bloc[COLONNE_MONTANT].abs().to_numpy(dtype=np.float64)
+        self.entrees.ajouter(self._index_entrees.get_indexer(bloc[COLONNE_CATEGORIE]), montants, signe)
+
+    def resultat(self):
+        """LCR correspondant aux blocs intégrés jusqu'ici."""
+        return resultat_lcr(self.hqla.valeurs(), self.sorties.valeurs(), self.entrees.valeurs())
+
+
+def resultat_lcr(montants_hqla, montants_sorties, montants_entrees):
+    """LCR à partir des montants bruts par niveau HQLA et par catégorie (ordre des tables de pondération)."""
+    hqla = {niveau: float(somme) * decote for (niveau, decote), somme in zip(DECOTES_HQLA.items(), montants_hqla)}
+    total_hqla = sum(hqla.values())
+
+    detail_sorties = _detail(*table_ponderations(PONDERATIONS_SORTIES), np.asarray(montants_sorties, dtype=np.float64))
+    detail_entrees = _detail(*table_ponderations(PONDERATIONS_ENTREES), np.asarray(montants_entrees, dtype=np.float64))
+    sorties = float(detail_sorties["Montant pondéré"].sum())
+    entrees = float(detail_entrees["Montant pondéré"].sum())
+
+    nettes = sorties_nettes(sorties, entrees)
+    return ResultatLCR(
+        hqla_par_niveau=hqla,
+        total_hqla=total_hqla,
+        sorties=sorties,
+        entrees=entrees,
+        sorties_nettes=nettes,
+        lcr=ratio_lcr(total_hqla, nettes),
+        detail_sorties=detail_sorties,
+        detail_entrees=detail_entrees,
+    )
+
+
+def ventiler_flux(dfs, ponderations):
+    """Ventilation pondérée par catégorie d'un ou plusieurs fichiers de flux."""
+    if isinstance(dfs, pd.DataFrame):
+        dfs = [dfs]
+    codes, taux = table_ponderations(ponderations)
+    index = pd.Index(codes)
+    sommes = SommesExactes(len(codes))
+    for df in dfs:
+        sommes.ajouter(index.get_indexer(df[COLONNE_CATEGORIE]), df[COLONNE_MONTANT].abs().to_numpy(dtype=np.float64))
+    return _detail(codes, taux, sommes.valeurs())
+
+
+def calculer_hqla(df_balance):
+    """HQLA après décote, par niveau (1, 2a, 2b)."""
+    accumulateur = AccumulateurLCR()
+    accumulateur.ajouter_balance(df_balance)
+    return accumulateur.resultat().hqla_par_niveau
+
+
+def sorties_nettes(sorties, entrees):
+    """Sorties nettes après application du plafond de 75 % sur les entrées."""
+    if entrees > PLAFOND_ENTREES * sorties:
+        return sorties * (1 - PLAFOND_ENTREES)
+    return sorties - entrees
+
+
+def ratio_lcr(total_hqla, sorties_nettes_lcr):
+    """LCR en pourcentage (0 si les sorties nettes sont nulles)."""
+    return (total_hqla / sorties_nettes_lcr) * 100 if sorties_nettes_lcr != 0 else 0
+
+
+def calculer_lcr(df_balance, df_echeancier, df_emplois):
+    """Calcule le LCR complet à partir de la balance, de l'échéancier et des emplois interbancaires."""
+    accumulateur = AccumulateurLCR()
+    with etape("agrégation", len(df_balance) + len(df_echeancier) + len(df_emplois)):
+        accumulateur.ajouter_balance(df_balance)
+        accumulateur.ajouter_flux(df_echeancier)
+        accumulateur.ajouter_flux(df_emplois)
+    with etape("calcul"):
+        return accumulateur.resultat()
+
+
+def calculer_lcr_par_blocs(fichier_balance, fichier_echeancier, fichier_emplois,
+                           feuilles=FEUILLES_LCR, taille_bloc=TAILLE_BLOC):
+    """Calcule le LCR en lisant les fichiers par blocs de ``taille_bloc`` lignes.
+
+    La mémoire utilisée est bornée par la taille d'un bloc et non par celle
+    des fichiers ; le résultat est identique à :func:`calculer_lcr`.
+    """
+    feuille_balance, feuille_echeancier, feuille_emplois = feuilles
+    accumulateur = AccumulateurLCR()
+    for bloc in iterer(lire_par_blocs(fichier_balance, feuille_balance, COLONNES_BALANCE, taille_bloc), "chargement"):
+        with etape("agrégation", len(bloc)):
+            accumulateur.ajouter_balance(bloc)
+    for fichier, feuille in [(fichier_echeancier, feuille_echeancier), (fichier_emplois, feuille_emplois)]:
+        for bloc in iterer(lire_par_blocs(fichier, feuille, COLONNES_FLUX, taille_bloc), "chargement"):
+            with etape("agrégation", len(bloc)):
+                accumulateur.ajouter_flux(bloc)
+    with etape("calcul"):
+        return accumulateur.resultat()
@@ -0,0 +1,93 @@
+"""Mise à jour incrémentale du LCR à partir de deltas de balance.
+
+L'état conserve les agrégats exacts du dernier calcul (HQLA par niveau,
+sorties et entrées par ``Code category``) ainsi que les lignes de la balance
+indexées par compte. Un delta (lignes ajoutées, supprimées ou modifiées)
+retire l'ancienne contribution des lignes touchées et ajoute la nouvelle :
+seuls les compartiments concernés bougent, puis le ratio et le plafond de
+75 % sur les entrées sont réévalués. Les sommes étant exactes, le résultat
+est identique à un recalcul complet sur la balance mise à jour.
+"""
+
+import pandas as pd
+
+from alm.lcr import COLONNE_CATEGORIE, COLONNE_MONTANT, COLONNE_NIVEAU, AccumulateurLCR
+
+COLONNE_COMPTE = "Account"
+COLONNE_ACTION = "Action"
+AJOUT, SUPPRESSION, MODIFICATION = "ajout", "suppression", "modification"
+
+
+class LCRIncremental:
+    """État du LCR mis à jour par deltas de balance, indexé par ``cle`` (compte)."""
+
+    def __init__(self, df_balance, df_echeancier, df_emplois, cle=COLONNE_COMPTE):
+        colonnes = [COLONNE_NIVEAU, COLONNE_CATEGORIE, COLONNE_MONTANT]
+        if cle not in df_balance.columns:
+            raise ValueError(f"La colonne '{cle}' est absente dans le fichier de balance.")
+        lignes = df_balance.set_index(cle)[colonnes]
+        if not lignes.index.is_unique:
+            doublons = lignes.index[lignes.index.duplicated()].unique()[:5].tolist()
+            raise ValueError(f"Comptes en double dans la balance : {doublons}")
+        self.cle = cle
+        self.lignes = lignes
+        self.accumulateur = AccumulateurLCR()
+        self.accumulateur.ajouter_balance(lignes)
+        self.accumulateur.ajouter_flux(df_echeancier)
+        self.accumulateur.ajouter_flux(df_emplois)
+
+    def resultat(self):
+        return self.accumulateur.resultat()
+
+    def appliquer_delta(self, delta):
+        """Applique un delta de balance et retourne le LCR mis à jour.
+
+        ``delta`` contient la colonne compte, une colonne ``Action``
+        (ajout / suppression / modification) et, pour les ajouts et
+        modifications, les nouvelles valeurs de ``Level``, ``Code category``
+        et ``c/v LCY balance``. Le delta est entièrement contrôlé et converti
+        avant la mise à jour : un delta refusé laisse l'état inchangé.
+        """
+        actions = delta[COLONNE_ACTION].astype(str).str.strip().str.lower()
+        inconnues = set(actions) - {AJOUT, SUPPRESSION, MODIFICATION}
+        if inconnues:
+            raise ValueError(f"Actions inconnues dans le delta : {sorted(inconnues)}")
+        delta = delta.set_index(self.cle)
+        if not delta.index.is_unique:
+            raise ValueError("Un compte apparaît plusieurs fois dans le delta.")
+
+        ajouts = delta[(actions == AJOUT).to_numpy()][self.lignes.columns]
+        modifications = delta[(actions == MODIFICATION).to_numpy()][self.lignes.columns]
+        suppressions = delta.index[(actions == SUPPRESSION).to_numpy()]
+        retraits = modifications.index.append(suppressions)
+
+        deja_presents = ajouts.index.intersection(self.lignes.index)
+        if len(deja_presents):
+            raise ValueError(f"Comptes ajoutés déjà présents : {deja_presents[:5].tolist()}")
+        absents = retraits.difference(self.lignes.index)
+        if len(absents):
+            raise ValueError(f"Comptes supprimés ou modifiés absents de la balance : {absents[:5].tolist()}")
+        modifications, ajouts = self._convertir(modifications), self._convertir(ajouts)
+        anciennes = self.lignes.loc[retraits]
+
+        self.accumulateur.ajouter_balance(anciennes, signe=-1)
+        self.accumulateur.ajouter_balance(modifications)
+        self.accumulateur.ajouter_balance(ajouts)
+
+        # Les modifications sont faites sur place ; seuls ajouts et suppressions recopient l'index
+        if len(modifications):
+            self.lignes.loc[modifications.index, modifications.columns] = modifications
+        if len(suppressions):
+            self.lignes = self.lignes.drop(index=suppressions)
+        if len(ajouts):
+            self.lignes = pd.concat([self.lignes, ajouts])
+        return self.resultat()
+
+    @staticmethod
+    def _convertir(lignes):
+        """Lignes du delta avec des montants numériques ; ``ValueError`` si un montant n'est pas un nombre."""
+        montants = pd.to_numeric(lignes[COLONNE_MONTANT], errors="coerce")
+        invalides = lignes.index[montants.isna() & lignes[COLONNE_MONTANT].notna()]
+        if len(invalides):
+            raise ValueError(f"Montants non numériques dans le delta : {invalides[:5].tolist()}")
+        return lignes.assign(**{COLONNE_MONTANT: montants.astype("float64")})
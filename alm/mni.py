@@ -0,0 +1,161 @@
+"""Modèle de banque pour la MNI : positions stockées en tableaux NumPy et gap de taux.
+
+Les positions ne sont plus des dictionnaires {catégorie: montant} mais des
+tableaux contigus (notionnel, taux, compartiment de révision, indicateur
+taux variable, code catégorie) : un portefeuille de millions de contrats
+n'a pas de surcoût objet Python, et la MNI sous choc se calcule comme un
+gap de révision vectorisé par compartiment temporel.
+"""
+
+import numpy as np
+import pandas as pd
+
+from alm.mni_simulation import TAUX_DEFAUT
+
+# Colonnes lues dans les feuilles Actifs / Passifs du classeur MNI
+COLONNES_MNI = ["Catégorie", "Montant (€)", "Taux", "Sensibilité", "Volatilité spécifique", "Révision (mois)",
+                "Type de taux"]
+
+# Colonnes du gap de révision ; absentes, le modèle applique ses valeurs par défaut
+COLONNES_REVISION = ("Taux", "Révision (mois)", "Type de taux")
+
+# Compartiments de révision (en mois) : [0-1[, [1-3[, [3-6[, [6-12[, [12-24[, 24 et plus
+BORNES_REVISION = np.array([0, 1, 3, 6, 12, 24, np.inf])
+LIBELLES_REVISION = ["0-1 mois", "1-3 mois", "3-6 mois", "6-12 mois", "1-2 ans", "> 2 ans"]
+# Date de révision retenue pour chaque compartiment (point médian, en mois)
+POINTS_REVISION = np.array([0.5, 2, 4.5, 9, 18, 36])
+# Compartiment des positions à taux fixe sans date de révision : hors de tout horizon de choc
+SANS_REVISION = len(LIBELLES_REVISION)
+
+
+class PositionsMNI:
+    """Positions d'un côté du bilan sous forme de tableaux alignés."""
+
+    __slots__ = ("notionnels", "taux", "compartiments", "variable", "codes", "categories")
+
+    def __init__(self, notionnels, taux, compartiments=None, variable=None, categories=None):
+        self.notionnels = np.asarray(notionnels, dtype=np.float64)
+        self.taux = np.asarray(taux, dtype=np.float64)
+        n = len(self.notionnels)
+        self.compartiments = (np.zeros(n, dtype=np.int8) if compartiments is None
+                              else np.asarray(compartiments, dtype=np.int8))
+        self.variable = np.zeros(n, dtype=bool) if variable is None else np.asarray(variable, dtype=bool)
+        if categories is None:
+            categories = np.arange(n)
+        self.codes, self.categories = pd.factorize(np.asarray(categories))
+
+    @classmethod
+    def depuis_interets(cls, interets, taux=TAUX_DEFAUT):
+        """Positions à partir d'un dictionnaire {catégorie: intérêts annuels} (encours implicite)."""
+        montants = np.fromiter(interets.values(), dtype=np.float64, count=len(interets))
+        return cls(montants / taux, np.full(len(montants), taux), categories=list(interets))
+
+    @classmethod
+    def depuis_dataframe(cls, df):
+        """Positions à partir d'une feuille Catégorie / Montant (€) et colonnes optionnelles.
+
+        "Montant (€)" est le montant d'intérêts annuel ; "Taux" le taux
+        courant (3 % par défaut, un taux nul est refusé : l'encours implicite
+        serait indéterminé) ; "Révision (mois)" le délai avant la prochaine
+        révision du taux ; "Type de taux" vaut "fixe" (par défaut) ou
+        "variable". Sans délai de révision, une position à taux variable est
+        révisée immédiatement et une position à taux fixe ne l'est pas avant
+        l'horizon : elle n'est pas exposée au choc.
+        """
+        taux = (df["Taux"].fillna(TAUX_DEFAUT).to_numpy(dtype=np.float64) if "Taux" in df
+                else np.full(len(df), TAUX_DEFAUT))
+        if (taux == 0).any():
+            nulles = sorted(map(str, set(df["Catégorie"][taux == 0])))
+            raise ValueError(f"Taux nul pour les catégories {nulles} : "
+                             "l'encours ne peut pas être déduit des intérêts.")
+        montants = df["Montant (€)"].to_numpy(dtype=np.float64)
+        variable = (df["Type de taux"].astype(str).str.lower() == "variable").to_numpy() if "Type de taux" in df \
+            else np.zeros(len(df), dtype=bool)
+        revision = (df["Révision (mois)"].to_numpy(dtype=np.float64) if "Révision (mois)" in df
+                    else np.full(len(df), np.nan))
+        compartiments = compartiment_revision(np.where(np.isnan(revision) & variable, 0.0, revision))
+        compartiments[np.isnan(revision) & ~variable] = SANS_REVISION
+        return cls(montants / taux, taux, compartiments, variable, df["Catégorie"].to_numpy())
+
+    def __len__(self):
+        return len(self.notionnels)
+
+    def interets(self):
+        return self.notionnels * self.taux
+
+    def par_categorie(self):
+        """Intérêts annuels agrégés par catégorie (dictionnaire, comme l'ancien modèle)."""
+        sommes = np.bincount(self.codes, weights=self.interets(), minlength=len(self.categories))
+        return dict(zip(self.categories, sommes))
+
+    def gap(self, variable_seulement=False):
+        """Notionnel révisé par compartiment (éventuellement limité aux positions à taux variable).
+
+        Les positions à taux fixe sans date de révision n'apparaissent dans aucun compartiment.
+        """
+        poids = np.where(self.variable, self.notionnels, 0.0) if variable_seulement else self.notionnels
+        return np.bincount(self.compartiments, weights=poids, minlength=SANS_REVISION + 1)[:SANS_REVISION]
+
+
+def valeurs_par_defaut(*dfs):
+    """Messages décrivant les valeurs par défaut appliquées faute des colonnes de :data:`COLONNES_REVISION`."""
+    absentes = [colonne for colonne in COLONNES_REVISION
+                if any(colonne not in df or df[colonne].isna().all() for df in dfs)]
+    messages = []
+    if "Taux" in absentes:
+        messages.append(f"sans colonne « Taux », les encours sont déduits des intérêts au taux de {TAUX_DEFAUT:.0%}")
+    if "Révision (mois)" in absentes:
+        if "Type de taux" in absentes:
+            messages.append("sans colonnes « Révision (mois) » ni « Type de taux », toutes les positions sont à taux "
+                            "fixe sans révision : le gap et l'impact du choc sont nuls")
+        else:
+            messages.append("sans colonne « Révision (mois) », seules les positions à taux variable sont révisées "
+                            "(immédiatement)")
+    return messages
+
+
+def compartiment_revision(mois):
+    """Indice du compartiment de révision pour des délais exprimés en mois."""
+    indices = np.searchsorted(BORNES_REVISION, np.asarray(mois, dtype=np.float64), side="right") - 1
+    return indices.clip(0, len(LIBELLES_REVISION) - 1)
+
+
+class Banque:
+    __slots__ = ("actifs", "passifs")
+
+    def __init__(self, actifs, passifs):
+        self.actifs = actifs if isinstance(actifs, PositionsMNI) else PositionsMNI.depuis_interets(actifs)
+        self.passifs = passifs if isinstance(passifs, PositionsMNI) else PositionsMNI.depuis_interets(passifs)
+
+    def calcul_mni(self):
+        interets_produits = self.actifs.interets().sum()
+        interets_charges = self.passifs.interets().sum()
+        return round(float(interets_produits - interets_charges), 3)
+
+    def ajuster_taux_interet(self, rng=None):
+        rng = np.random.default_rng() if rng is None else rng
+        self.actifs.taux = self.actifs.taux * rng.uniform(1, 3, len(self.actifs)).round(2)
+        self.passifs.taux = self.passifs.taux * rng.uniform(0.1, 2, len(self.passifs)).round(2)
+
+    def gap_de_taux(self, choc=0.01, horizon=12):
+        """Gap de révision par compartiment et impact d'un choc de taux sur la MNI à ``horizon`` mois.
+
+        ``choc`` est un choc parallèle (décimal) ou un choc par compartiment.
+        Un encours révisé au mois t porte le choc pendant ``horizon - t`` mois ;
+        les positions à taux fixe sans date de révision ne le portent pas.
+        """
+        actifs, passifs = self.actifs.gap(), self.passifs.gap()
+        gap = actifs - passifs
+        duree_exposee = np.clip(horizon - POINTS_REVISION, 0, None) / 12
+        return pd.DataFrame({
+            "Actifs révisés (€)": actifs,
+            "Passifs révisés (€)": passifs,
+            "Gap (€)": gap,
+            "Gap cumulé (€)": np.cumsum(gap),
+            "dont taux variable (€)": self.actifs.gap(True) - self.passifs.gap(True),
+            "Impact MNI (€)": gap * np.broadcast_to(choc, gap.shape) * duree_exposee,
+        }, index=pd.Index(LIBELLES_REVISION, name="Révision"))
+
+    def mni_choc(self, choc=0.01, horizon=12):
+        """MNI sur ``horizon`` mois après un choc de taux immédiat."""
+        return self.calcul_mni() * horizon / 12 + float(self.gap_de_taux(choc, horizon)["Impact MNI (€)"].sum())
@@ -0,0 +1,115 @@
+"""Simulation Monte Carlo de la MNI (marge nette d'intérêt) sur un horizon de 12 à 36 mois.
+
+Chaque catégorie porte un montant d'intérêts annuel, un taux courant (d'où
+son encours implicite), une sensibilité au facteur de taux commun et une
+volatilité spécifique. Le facteur commun suit un processus de Vasicek
+(discrétisation exacte, pas mensuel) ; les aléas spécifiques des catégories
+sont des marches aléatoires indépendantes, dont la somme pondérée est
+elle-même une marche aléatoire : il suffit donc de simuler deux trajectoires
+par scénario, quel que soit le nombre de catégories. La MNI mensuelle est
+linéaire en ces deux trajectoires, ce qui rend le calcul entièrement
+vectorisé. Les scénarios sont générés par lots pour borner la mémoire.
+"""
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+TAUX_DEFAUT = 0.03
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+TAILLE_LOT = 20_000
+
+
+@dataclass
+class ResultatSimulationMNI:
+    mni: np.ndarray = field(repr=False)
+    mni_base: float
+    horizon: int
+    percentiles: dict
+    trajectoires: pd.DataFrame = field(repr=False)
+
+    @property
+    def moyenne(self):
+        return float(self.mni.mean())
+
+    @property
+    def ecart_type(self):
+        return float(self.mni.std(ddof=1)) if len(self.mni) > 1 else 0.0
+
+    def mni_at_risk(self, niveau=0.95):
+        """Perte de MNI par rapport au scénario central au quantile ``1 - niveau``."""
+        return self.mni_base - float(np.percentile(self.mni, 100 * (1 - niveau)))
+
+
+def parametres_categories(actifs, passifs):
+    """Regroupe actifs et passifs (Catégorie, Montant (€) et colonnes optionnelles) avec un signe.
+
+    Colonnes optionnelles : "Taux" (taux courant), "Sensibilité" au facteur
+    commun (1 par défaut) et "Volatilité spécifique" annuelle (0 par défaut).
+    """
+    categories = pd.concat([actifs.assign(Signe=1.0), passifs.assign(Signe=-1.0)], ignore_index=True)
+    for colonne, valeur in {"Taux": TAUX_DEFAUT, "Sensibilité": 1.0, "Volatilité spécifique": 0.0}.items():
+        if colonne not in categories.columns:
+            categories[colonne] = valeur
+        categories[colonne] = categories[colonne].fillna(valeur)
+    return categories
+
+
+def _vasicek(rng, nb, horizon, sigma, kappa, theta):
+    """Trajectoires mensuelles (nb × horizon) du facteur commun, partant de 0."""
+    dt = 1 / 12
+    amortissement = np.exp(-kappa * dt)
+    ecart = sigma * np.sqrt((1 - amortissement ** 2) / (2 * kappa)) if kappa > 0 else sigma * np.sqrt(dt)
+    chocs = rng.standard_normal((nb, horizon)) * ecart
+    trajectoires = np.empty((nb, horizon))
+    niveau = np.zeros(nb)
+    for mois in range(horizon):
+        niveau = niveau * amortissement + theta * (1 - amortissement) + chocs[:, mois]
+        trajectoires[:, mois] = niveau
+    return trajectoires
+
+
+def simuler_mni(categories, horizon=12, nb_simulations=10_000, sigma=0.01, kappa=0.1, theta=0.0,
+                graine=None, taille_lot=TAILLE_LOT):
+    """Distribution de la MNI cumulée sur ``horizon`` mois.
+
+    ``categories`` provient de :func:`parametres_categories`. Les résultats
+    sont reproductibles pour une même ``graine`` et une même ``taille_lot``.
+    """
+    montant = categories["Montant (€)"].to_numpy(dtype=np.float64)
+    taux = categories["Taux"].to_numpy(dtype=np.float64)
+    signe = categories["Signe"].to_numpy(dtype=np.float64)
+    encours = np.divide(montant, taux, out=np.zeros_like(montant), where=taux != 0)
+
+    # MNI mensuelle = base + (B · facteur commun + aléa spécifique agrégé) / 12
+    base_mensuelle = (signe * montant).sum() / 12
+    sensibilite = (signe * encours * categories["Sensibilité"].to_numpy(dtype=np.float64)).sum()
+    vol_specifique = np.sqrt(((encours * categories["Volatilité spécifique"].to_numpy(dtype=np.float64)) ** 2).sum())
+
+    rng = np.random.default_rng(graine)
+    mois = np.arange(1, horizon + 1)
+    mni = np.empty(nb_simulations)
+    cumuls = []
+    for debut in range(0, nb_simulations, taille_lot):
+        nb = min(taille_lot, nb_simulations - debut)
+        facteur = _vasicek(rng, nb, horizon, sigma, kappa, theta)
+        specifique = np.cumsum(rng.standard_normal((nb, horizon)), axis=1) * (vol_specifique * np.sqrt(1 / 12))
+        cumul = base_mensuelle * mois + np.cumsum(sensibilite * facteur + specifique, axis=1) / 12
+        mni[debut:debut + nb] = cumul[:, -1]
+        cumuls.append(np.percentile(cumul, PERCENTILES, axis=0))
+
+    # Percentiles mensuels moyennés sur les lots (exacts avec un seul lot)
+    poids = np.array([min(taille_lot, nb_simulations - d) for d in range(0, nb_simulations, taille_lot)])
+    trajectoires = pd.DataFrame(
+        np.average(np.stack(cumuls), axis=0, weights=poids).T,
+        index=pd.Index(mois, name="Mois"),
+        columns=[f"P{p}" for p in PERCENTILES],
+    )
+    return ResultatSimulationMNI(
+        mni=mni,
+        mni_base=base_mensuelle * horizon,
+        horizon=horizon,
+        percentiles={p: float(v) for p, v in zip(PERCENTILES, np.percentile(mni, PERCENTILES))},
+        trajectoires=trajectoires,
+    )
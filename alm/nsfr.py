@@ -0,0 +1,184 @@
+"""Calcul du NSFR (Net Stable Funding Ratio) à partir des feuilles Actifs et Passifs.
+
+Les pondérations ASF / RSF proviennent d'une table réglementaire CRR2
+(catégorie × maturité résiduelle × charge) : chaque ligne d'un extrait brut
+reçoit sa pondération par un code entier (catégorie, compartiment)
+indexant un tableau de pondérations, sans jointure ligne à ligne ; les
+actifs grevés sont ensuite portés au plancher de la durée restante de leur
+charge ("Durée de la charge (mois)", à défaut la maturité de l'actif). Les
+fichiers qui portent déjà une colonne "Pondération ASF" / "Pondération RSF"
+sont calculés avec ces pondérations, comme auparavant.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from alm.ingestion import booleens
+from alm.instrumentation import etape
+
+COLONNE_CATEGORIE = "Catégorie"
+COLONNE_MONTANT = "Montant (€)"
+COLONNE_MATURITE = "Maturité résiduelle (mois)"
+COLONNE_GREVE = "Grevé"
+COLONNE_DUREE_CHARGE = "Durée de la charge (mois)"
+COLONNES_PASSIFS = [COLONNE_CATEGORIE, COLONNE_MONTANT, "Pondération ASF", COLONNE_MATURITE]
+COLONNES_ACTIFS = [COLONNE_CATEGORIE, COLONNE_MONTANT, "Pondération RSF", COLONNE_MATURITE, COLONNE_GREVE,
+                   COLONNE_DUREE_CHARGE]
+
+# Compartiments de maturité résiduelle (bornes en mois) ; maturité inconnue : ≥ 1 an
+BORNES_NSFR = (6, 12)
+LIBELLES_NSFR = ("< 6 mois", "6 mois - 1 an", "≥ 1 an")
+
+# Pondérations CRR2 (art. 428k à 428ba) par compartiment, actifs non grevés
+PONDERATIONS_ASF = {
+    "Fonds propres": (1.0, 1.0, 1.0),
+    "Dépôts stables de la clientèle de détail": (0.95, 0.95, 1.0),
+    "Dépôts moins stables de la clientèle de détail": (0.9, 0.9, 1.0),
+    "Financements des entreprises non financières": (0.5, 0.5, 1.0),
+    "Financements des banques centrales": (0.0, 0.5, 1.0),
+    "Financements des établissements financiers": (0.0, 0.5, 1.0),
+    "Autres passifs": (0.0, 0.0, 1.0),
+}
+PONDERATIONS_RSF = {
+    "Trésorerie et réserves en banque centrale": (0.0, 0.0, 0.0),
+    "Actifs de niveau 1": (0.0, 0.0, 0.0),
+    "Obligations sécurisées de niveau 1": (0.07, 0.07, 0.07),
+    "Actifs de niveau 2A": (0.15, 0.15, 0.15),
+    "Actifs de niveau 2B": (0.5, 0.5, 0.5),
+    "Prêts aux établissements financiers": (0.15, 0.5, 1.0),
+    "Prêts hypothécaires résidentiels": (0.5, 0.5, 0.65),
+    "Prêts à la clientèle de détail et PME": (0.5, 0.5, 0.85),
+    "Prêts aux entreprises non financières": (0.5, 0.5, 0.85),
+    "Autres actifs": (1.0, 1.0, 1.0),
+}
+# Actifs grevés : pondération minimale selon le compartiment de la durée restante de la charge
+# (colonne COLONNE_DUREE_CHARGE ; à défaut, la maturité résiduelle de l'actif)
+PLANCHERS_GREVES = (0.0, 0.5, 1.0)
+
+
+@dataclass
+class ResultatNSFR:
+    asf_par_categorie: pd.Series
+    rsf_par_categorie: pd.Series
+    total_asf: float
+    total_rsf: float
+    nsfr: float
+    ventilation: pd.DataFrame = None
+
+
+def table_ponderations():
+    """Table CRR2 complète : Côté, Catégorie, Compartiment, Grevé, Pondération.
+
+    Pour les actifs grevés, la table suppose une charge de même durée que la
+    maturité de l'actif ; sinon le plancher suit la durée de la charge.
+    """
+    lignes = []
+    for cote, table in (("ASF", PONDERATIONS_ASF), ("RSF", PONDERATIONS_RSF)):
+        for categorie, ponderations in table.items():
+            for compartiment, (libelle, ponderation) in enumerate(zip(LIBELLES_NSFR, ponderations)):
+                for greve in (False, True):
+                    if greve and cote == "RSF":
+                        ponderation_greve = max(ponderation, PLANCHERS_GREVES[compartiment])
+                    else:
+                        ponderation_greve = ponderation
+                    lignes.append((cote, categorie, libelle, greve, ponderation_greve))
+    return pd.DataFrame(lignes, columns=["Côté", "Catégorie", "Compartiment", "Grevé", "Pondération"])
+
+
+def _mois(df, colonne):
+    if colonne not in df:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[colonne], errors="coerce").to_numpy(dtype=np.float64)
+
+
+def _compartiments(mois):
+    mois = np.where(np.isnan(mois), np.inf, mois)
+    return np.searchsorted(np.asarray(BORNES_NSFR, dtype=np.float64), mois, side="right").astype(np.int8)
+
+
+def compartiments_nsfr(df):
+    """Indice du compartiment de maturité résiduelle de chaque ligne."""
+    return _compartiments(_mois(df, COLONNE_MATURITE))
+
+
+def compartiments_charge(df):
+    """Indice du compartiment de la durée restante de la charge ; la maturité de l'actif si la durée manque."""
+    charge = _mois(df, COLONNE_DUREE_CHARGE)
+    return _compartiments(np.where(np.isnan(charge), _mois(df, COLONNE_MATURITE), charge))
+
+
+def ponderations_crr2(df, cote):
+    """Pondération CRR2 de chaque ligne, par indexation dans la table (catégorie, compartiment).
+
+    La colonne "Grevé" est lue par :func:`alm.ingestion.booleens` (Oui / Non,
+    O / N, 1 / 0, vide = non grevé) ; une autre saisie lève ``ValueError``.
+    Un actif grevé reçoit au moins le plancher de :data:`PLANCHERS_GREVES`
+    du compartiment de la durée restante de sa charge.
+    """
+    table = PONDERATIONS_ASF if cote == "ASF" else PONDERATIONS_RSF
+    indices, distinctes = pd.factorize(df[COLONNE_CATEGORIE])
+    positions = pd.Index(list(table)).get_indexer(distinctes)
+    if (positions < 0).any() or (indices < 0).any():
+        inconnues = sorted(map(str, distinctes[positions < 0])) + (["(vide)"] if (indices < 0).any() else [])
+        raise ValueError(f"Catégories {cote} absentes de la table CRR2 : {inconnues}")
+
+    nb = len(LIBELLES_NSFR)
+    valeurs = np.array(list(table.values()), dtype=np.float64).ravel()
+    ponderations = valeurs[positions[indices].astype(np.int64) * nb + compartiments_nsfr(df)]
+    if cote == "RSF" and COLONNE_GREVE in df:
+        greve = booleens(df[COLONNE_GREVE])
+        planchers = np.where(greve, np.asarray(PLANCHERS_GREVES)[compartiments_charge(df)], 0.0)
+        ponderations = np.maximum(ponderations, planchers)
+    return ponderations
+
+
+def financement_pondere(df, colonne_ponderation):
+    """Montant pondéré de chaque ligne (Montant × pondération de la colonne ou de la table CRR2)."""
+    if colonne_ponderation in df:
+        ponderations = df[colonne_ponderation].to_numpy(dtype=np.float64)
+    else:
+        ponderations = ponderations_crr2(df, colonne_ponderation.split()[-1])
+    return df[COLONNE_MONTANT].to_numpy(dtype=np.float64) * ponderations
+
+
+def ratio_nsfr(total_asf, total_rsf):
+    return total_asf / total_rsf if total_rsf != 0 else float("nan")
+
+
+def _agreger(df, ponderes, cote):
+    """Montant pondéré par catégorie et ventilation (catégorie × compartiment) par ``bincount``."""
+    indices, categories = pd.factorize(df[COLONNE_CATEGORIE])
+    valide = indices >= 0
+    nb = len(LIBELLES_NSFR)
+    cles = indices[valide].astype(np.int64) * nb + compartiments_nsfr(df)[valide]
+    taille = len(categories) * nb
+    montants = np.bincount(cles, weights=df[COLONNE_MONTANT].to_numpy(dtype=np.float64)[valide], minlength=taille)
+    sommes = np.bincount(cles, weights=ponderes[valide], minlength=taille)
+    presents = np.flatnonzero(np.bincount(cles, minlength=taille))
+
+    par_categorie = pd.Series(sommes.reshape(-1, nb).sum(axis=1),
+                              index=pd.Index(np.asarray(categories), name=COLONNE_CATEGORIE), name=cote)
+    ventilation = pd.DataFrame({"Montant (€)": montants[presents], "Montant pondéré": sommes[presents]},
+                               index=pd.MultiIndex.from_arrays([
+                                   np.full(len(presents), cote),
+                                   categories[presents // nb],
+                                   pd.Categorical.from_codes(presents % nb, categories=list(LIBELLES_NSFR)),
+                               ], names=["Côté", "Catégorie", "Compartiment"]))
+    return par_categorie, ventilation
+
+
+def calculer_nsfr(passifs_df, actifs_df):
+    """ASF et RSF par catégorie, ventilation par compartiment de maturité, totaux et ratio NSFR."""
+    lignes = len(passifs_df) + len(actifs_df)
+    with etape("nettoyage", lignes):
+        asf = financement_pondere(passifs_df, "Pondération ASF")
+        rsf = financement_pondere(actifs_df, "Pondération RSF")
+    with etape("agrégation", lignes):
+        asf_par_categorie, ventilation_asf = _agreger(passifs_df, asf, "ASF")
+        rsf_par_categorie, ventilation_rsf = _agreger(actifs_df, rsf, "RSF")
+    with etape("calcul"):
+        total_asf, total_rsf = float(asf.sum()), float(rsf.sum())
+        return ResultatNSFR(asf_par_categorie, rsf_par_categorie, total_asf, total_rsf,
+                            ratio_nsfr(total_asf, total_rsf), pd.concat([ventilation_asf, ventilation_rsf]))
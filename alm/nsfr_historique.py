@@ -0,0 +1,154 @@
+"""Historique du NSFR : calcul parallèle des instantanés et stockage Parquet incrémental.
+
+Chaque instantané est un classeur ``nsfr_<AAAAMMJJ>.<xlsx|xlsm>`` avec les
+feuilles "Actifs" et "Passifs". L'ASF et le RSF par catégorie de chaque date
+sont stockés dans un fichier Parquet par date d'arrêté
+(``<historique>/nsfr_<AAAAMMJJ>.parquet``, catégories encodées en
+dictionnaire) ; l'ensemble forme un jeu de données que Parquet relit en une
+fois. Ajouter un mois ne calcule et n'écrit que ce mois : les dates déjà
+présentes dans l'historique sont ignorées, sauf demande explicite.
+
+Usage : python -m alm.nsfr_historique REPERTOIRE [--historique DIR] [--processus N] [--recalculer]
+"""
+
+import argparse
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from alm.ingestion import lire_feuilles
+from alm.nsfr import COLONNES_ACTIFS, COLONNES_PASSIFS, calculer_nsfr, ratio_nsfr
+
+REPERTOIRE_HISTORIQUE = Path(os.environ.get("ALM_HISTORIQUE_NSFR", Path.home() / ".cache" / "alm" / "historique_nsfr"))
+
+_MOTIF_INSTANTANE = re.compile(r"^nsfr_(\d{8})\.(xlsx|xlsm)$", re.IGNORECASE)
+_MOTIF_HISTORIQUE = re.compile(r"^nsfr_(\d{8})\.parquet$")
+
+
+def lignes_historique(date, resultat):
+    """ASF et RSF par catégorie d'un instantané, au format long de l'historique."""
+    lignes = pd.concat([
+        pd.DataFrame({"Côté": "ASF", "Catégorie": resultat.asf_par_categorie.index.astype(str),
+                      "Montant pondéré": resultat.asf_par_categorie.to_numpy()}),
+        pd.DataFrame({"Côté": "RSF", "Catégorie": resultat.rsf_par_categorie.index.astype(str),
+                      "Montant pondéré": resultat.rsf_par_categorie.to_numpy()}),
+    ], ignore_index=True)
+    lignes.insert(0, "Date", pd.Timestamp(date))
+    return lignes.astype({"Côté": "category", "Catégorie": "category"})
+
+
+class HistoriqueNSFR:
+    """Jeu de données Parquet de l'ASF / RSF par catégorie, un fichier par date d'arrêté."""
+
+    def __init__(self, repertoire=REPERTOIRE_HISTORIQUE):
+        self.repertoire = Path(repertoire)
+
+    def chemin(self, date):
+        return self.repertoire / f"nsfr_{pd.Timestamp(date):%Y%m%d}.parquet"
+
+    def dates(self):
+        """Dates présentes, lues dans les noms de fichiers sans ouvrir les données."""
+        if not self.repertoire.is_dir():
+            return []
+        return sorted(pd.Timestamp(m.group(1)) for f in self.repertoire.iterdir()
+                      if (m := _MOTIF_HISTORIQUE.match(f.name)))
+
+    def ajouter(self, date, resultat):
+        """Écrit (ou remplace) la date ``date`` ; écriture atomique par renommage."""
+        self.repertoire.mkdir(parents=True, exist_ok=True)
+        chemin = self.chemin(date)
+        temporaire = chemin.with_suffix(".tmp")
+        lignes_historique(date, resultat).to_parquet(temporaire, index=False)
+        os.replace(temporaire, chemin)
+
+    def lire(self, debut=None, fin=None):
+        """Historique au format long (Date, Côté, Catégorie, Montant pondéré), filtré par dates."""
+        fichiers = [self.chemin(d) for d in self.dates()
+                    if (debut is None or d >= pd.Timestamp(debut)) and (fin is None or d <= pd.Timestamp(fin))]
+        if not fichiers:
+            return pd.DataFrame(columns=["Date", "Côté", "Catégorie", "Montant pondéré"])
+        return pd.concat([pd.read_parquet(f) for f in fichiers], ignore_index=True)
+
+    def serie(self, debut=None, fin=None):
+        """Totaux ASF, RSF et NSFR par date."""
+        historique = self.lire(debut, fin)
+        totaux = historique.pivot_table(index="Date", columns="Côté", values="Montant pondéré",
+                                        aggfunc="sum", observed=True).reindex(columns=["ASF", "RSF"]).fillna(0.0)
+        totaux["NSFR"] = [ratio_nsfr(a, r) for a, r in zip(totaux["ASF"], totaux["RSF"])]
+        return totaux
+
+
+def lister_instantanes(repertoire):
+    """Classeurs ``nsfr_<AAAAMMJJ>`` du répertoire, triés par date : [(date, chemin)]."""
+    instantanes = [(pd.Timestamp(m.group(1)), chemin) for chemin in Path(repertoire).iterdir()
+                   if (m := _MOTIF_INSTANTANE.match(chemin.name))]
+    return sorted(instantanes)
+
+
+def calculer_instantane(fichier):
+    feuilles = lire_feuilles(fichier, {"Passifs": COLONNES_PASSIFS, "Actifs": COLONNES_ACTIFS})
+    return calculer_nsfr(feuilles["Passifs"], feuilles["Actifs"])
+
+
+def mettre_a_jour(repertoire, historique=None, processus=None, recalculer=False):
+    """Calcule en parallèle les instantanés absents de l'historique et les y ajoute.
+
+    Retourne un dictionnaire : dates ajoutées, dates ignorées (déjà
+    présentes), erreurs par date et durée.
+    """
+    historique = historique if historique is not None else HistoriqueNSFR()
+    presentes = set(historique.dates())
+    instantanes = lister_instantanes(repertoire)
+    a_calculer = [(d, f) for d, f in instantanes if recalculer or d not in presentes]
+
+    debut = time.perf_counter()
+    if processus == 1 or len(a_calculer) <= 1:
+        resultats = [_calculer_sans_erreur(f) for _, f in a_calculer]
+    else:
+        with ProcessPoolExecutor(max_workers=processus) as pool:
+            resultats = list(pool.map(_calculer_sans_erreur, [f for _, f in a_calculer]))
+
+    ajoutees, erreurs = [], {}
+    for (date, _), resultat in zip(a_calculer, resultats):
+        if isinstance(resultat, str):
+            erreurs[date] = resultat
+        else:
+            historique.ajouter(date, resultat)
+            ajoutees.append(date)
+    return {
+        "ajoutees": ajoutees,
+        "ignorees": len(instantanes) - len(a_calculer),
+        "erreurs": erreurs,
+        "duree_s": time.perf_counter() - debut,
+    }
+
+
+def _calculer_sans_erreur(fichier):
+    try:
+        return calculer_instantane(fichier)
+    except Exception as e:
+        return str(e)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mise à jour de l'historique NSFR à partir des instantanés.")
+    parser.add_argument("repertoire", help="répertoire des classeurs nsfr_<AAAAMMJJ>.xlsx")
+    parser.add_argument("--historique", default=REPERTOIRE_HISTORIQUE, help="répertoire de l'historique Parquet")
+    parser.add_argument("--processus", type=int, default=None, help="taille du pool (défaut : nombre de CPU)")
+    parser.add_argument("--recalculer", action="store_true", help="recalcule aussi les dates déjà présentes")
+    args = parser.parse_args(argv)
+
+    bilan = mettre_a_jour(args.repertoire, HistoriqueNSFR(args.historique), args.processus, args.recalculer)
+    print(f"{len(bilan['ajoutees'])} dates ajoutées, {bilan['ignorees']} déjà présentes, "
+          f"{len(bilan['erreurs'])} en erreur ({bilan['duree_s']:.2f} s)")
+    for date, erreur in bilan["erreurs"].items():
+        print(f"  {date:%Y-%m-%d} : {erreur}")
+    return 1 if bilan["erreurs"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,68 @@
+"""Sommes exactes de flottants par compartiment.
+
+Chaque flottant est décomposé en mantisse entière et exposant
+(``np.frexp``) ; les mantisses sont cumulées par (compartiment, exposant)
+avec ``np.bincount`` puis reportées dans un entier Python exact par
+compartiment. Le total ne dépend donc ni de l'ordre des lignes ni du
+découpage en blocs : un calcul en mémoire et un calcul par blocs donnent
+exactement le même flottant (arrondi correct de la somme exacte). Les
+retraits sont exacts eux aussi, ce qui permet les mises à jour incrémentales.
+"""
+
+import numpy as np
+
+# Unité des totaux entiers : 2**-1126 (plus petit sous-normal 2**-1074, mantisse 53 bits)
+_DECALAGE_UNITE = 1126
+_DECALAGE_EXPOSANT = 1100  # exposants frexp des flottants finis : [-1073, 1024]
+_NB_EXPOSANTS = 2200
+# Lignes traitées par bincount : exact tant que < 2**26 (demi-mantisses < 2**27),
+# et assez petit pour que les temporaires restent en cache
+_TRANCHE = 1 << 20
+
+
+class SommesExactes:
+    """Totaux exacts pour ``nb_compartiments`` compartiments numérotés 0..n-1."""
+
+    __slots__ = ("totaux",)
+
+    def __init__(self, nb_compartiments):
+        self.totaux = [0] * nb_compartiments
+
+    def __len__(self):
+        return len(self.totaux)
+
+    def ajouter(self, positions, valeurs, signe=1):
+        """Ajoute (ou retire si ``signe=-1``) ``valeurs`` dans les compartiments ``positions``.
+
+        Les positions négatives (valeur hors compartiments) et les valeurs
+        non finies sont ignorées, comme les NaN dans ``Series.sum``.
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        valeurs = np.asarray(valeurs, dtype=np.float64)
+        for debut in range(0, len(valeurs), _TRANCHE):
+            self._ajouter_tranche(positions[debut:debut + _TRANCHE], valeurs[debut:debut + _TRANCHE], signe)
+
+    def _ajouter_tranche(self, positions, valeurs, signe):
+        garde = (positions >= 0) & np.isfinite(valeurs) & (valeurs != 0)
+        if not garde.all():
+            positions, valeurs = positions[garde], valeurs[garde]
+        mantisses, exposants = np.frexp(valeurs)
+        entiers = (mantisses * 2.0 ** 53).astype(np.int64)
+        cles = positions * _NB_EXPOSANTS + (exposants + _DECALAGE_EXPOSANT)
+        taille = len(self.totaux) * _NB_EXPOSANTS
+        hauts = np.bincount(cles, weights=entiers >> 26, minlength=taille)
+        bas = np.bincount(cles, weights=entiers & ((1 << 26) - 1), minlength=taille)
+        for cle in np.flatnonzero((hauts != 0) | (bas != 0)):
+            position, exposant = divmod(int(cle), _NB_EXPOSANTS)
+            entier = (int(hauts[cle]) << 26) + int(bas[cle])
+            decalage = exposant - _DECALAGE_EXPOSANT - 53 + _DECALAGE_UNITE
+            self.totaux[position] += signe * (entier << decalage)
+
+    def fusionner(self, autres):
+        """Ajoute les totaux d'un autre accumulateur de même taille."""
+        for i, total in enumerate(autres.totaux):
+            self.totaux[i] += total
+
+    def valeurs(self):
+        """Totaux arrondis au flottant le plus proche."""
+        return np.array([total / (1 << _DECALAGE_UNITE) for total in self.totaux], dtype=np.float64)
@@ -0,0 +1,134 @@
+"""Grille de scénarios de stress de change sur les expositions devise × maturité.
+
+Les expositions forment une matrice (devises × compartiments de maturité),
+convertie en devise locale. Un scénario est une variation relative du taux de
+change de chaque devise, éventuellement différenciée par compartiment : les
+chocs forment donc un tableau (scénarios × devises) ou (scénarios × devises
+× compartiments), et l'impact de tous les scénarios est un seul produit
+diffusé. Trois familles de scénarios se combinent :
+
+* chocs unitaires : chaque devise seule, sur une grille d'amplitudes ;
+* épisodes historiques : variations corrélées observées sur toutes les
+  fenêtres de l'historique (ou sur des périodes nommées) ;
+* matrices définies par l'utilisateur (DataFrame scénarios × devises).
+"""
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from alm.change import COLONNE_DEVISE
+
+AMPLITUDES = (-0.2, -0.1, -0.05, 0.05, 0.1, 0.2)
+HORIZON_HISTORIQUE = 10
+PERCENTILES_STRESS = (1, 5, 50, 95, 99)
+
+
+@dataclass
+class ResultatStress:
+    """Impacts en devise locale (scénarios × devises × compartiments)."""
+    impacts: np.ndarray = field(repr=False)
+    scenarios: pd.Index
+    devises: pd.Index
+    compartiments: pd.Index
+
+    def total(self):
+        return pd.Series(self.impacts.sum(axis=(1, 2)), index=self.scenarios, name="Impact total")
+
+    def par_devise(self):
+        return pd.DataFrame(self.impacts.sum(axis=2), index=self.scenarios, columns=self.devises)
+
+    def _exiger_scenarios(self):
+        if not len(self.scenarios):
+            raise ValueError("Aucun scénario de stress : choisir des amplitudes, un historique "
+                             "ou des chocs personnalisés.")
+
+    def pire_cas(self, n=10):
+        """Les ``n`` scénarios les plus défavorables, détaillés par devise."""
+        self._exiger_scenarios()
+        total = self.total()
+        pires = total.nsmallest(n).index
+        return self.par_devise().loc[pires].assign(**{"Impact total": total.loc[pires]})
+
+    def pire_cas_par_exposition(self):
+        """Perte maximale et scénario associé pour chaque devise × compartiment."""
+        self._exiger_scenarios()
+        plat = self.impacts.reshape(len(self.scenarios), -1)
+        indices = plat.argmin(axis=0)
+        cles = pd.MultiIndex.from_product([self.devises, self.compartiments])
+        return pd.DataFrame({
+            "Pire impact": plat[indices, np.arange(plat.shape[1])],
+            "Scénario": self.scenarios[indices],
+        }, index=cles)
+
+    def percentiles(self, percentiles=PERCENTILES_STRESS):
+        """Percentiles des impacts par devise et au total, sur l'ensemble des scénarios."""
+        self._exiger_scenarios()
+        table = self.par_devise().assign(Total=self.total())
+        return pd.DataFrame(np.percentile(table.to_numpy(), percentiles, axis=0),
+                            index=[f"P{p}" for p in percentiles], columns=table.columns)
+
+
+def matrice_expositions(gap_par_periode_df, taux=None, colonne_maturite="Maturity Category",
+                        colonne_gap="Gap de Change"):
+    """Expositions (devises × compartiments), converties en devise locale avec ``taux`` par devise."""
+    expositions = gap_par_periode_df.pivot_table(
+        index=COLONNE_DEVISE, columns=colonne_maturite, values=colonne_gap, aggfunc="sum", observed=True,
+    ).fillna(0.0)
+    if taux is not None:
+        expositions = expositions.mul(taux.reindex(expositions.index).fillna(1.0), axis=0)
+    return expositions
+
+
+def chocs_unitaires(devises, amplitudes=AMPLITUDES):
+    """Une devise choquée à la fois, pour chaque amplitude (scénarios × devises)."""
+    devises = list(devises)
+    amplitudes = np.asarray(amplitudes, dtype=np.float64)
+    chocs = np.kron(amplitudes[:, None], np.eye(len(devises))) if len(devises) else np.empty((0, 0))
+    noms = [f"{devise} {a:+.0%}" for a in amplitudes for devise in devises]
+    return pd.DataFrame(chocs, index=noms, columns=devises)
+
+
+def chocs_historiques(taux, horizon=HORIZON_HISTORIQUE, episodes=None):
+    """Variations relatives observées sur ``horizon`` jours (scénarios × devises).
+
+    ``taux`` est un historique (dates × devises), par exemple issu de
+    :func:`alm.var_change.historique_taux`. Sans ``episodes``, chaque fenêtre
+    glissante est un scénario ; sinon ``episodes`` est un dictionnaire
+    ``{nom: (début, fin)}`` de périodes dont on prend la variation totale.
+    """
+    logs = np.log(taux.to_numpy(dtype=np.float64))
+    if episodes is None:
+        variations = np.expm1(logs[horizon:] - logs[:-horizon])
+        noms = [f"Historique {d:%Y-%m-%d}" for d in taux.index[horizon:]]
+    else:
+        positions = [(taux.index.searchsorted(pd.Timestamp(debut)),
+                      taux.index.searchsorted(pd.Timestamp(fin), "right") - 1) for debut, fin in episodes.values()]
+        variations = np.array([np.expm1(logs[fin] - logs[debut]) for debut, fin in positions])
+        variations = variations.reshape(-1, logs.shape[1])
+        noms = list(episodes)
+    return pd.DataFrame(np.nan_to_num(variations), index=noms, columns=taux.columns)
+
+
+def appliquer_chocs(expositions, *familles):
+    """Impacts de toutes les familles de chocs sur les expositions.
+
+    Chaque famille est un DataFrame (scénarios × devises), les devises
+    absentes n'étant pas choquées, ou un tableau (scénarios × devises ×
+    compartiments) aligné sur ``expositions``.
+    """
+    devises, compartiments = expositions.index, expositions.columns
+    blocs, noms = [], []
+    for chocs in familles:
+        if isinstance(chocs, pd.DataFrame):
+            noms.extend(chocs.index)
+            chocs = chocs.reindex(columns=devises).fillna(0.0).to_numpy(dtype=np.float64)
+        else:
+            chocs = np.asarray(chocs, dtype=np.float64)
+            noms.extend(f"Scénario {len(noms) + i + 1}" for i in range(len(chocs)))
+        blocs.append(chocs[:, :, None] if chocs.ndim == 2 else chocs)
+    chocs = np.concatenate([np.broadcast_to(b, (len(b), len(devises), len(compartiments))) for b in blocs]) if blocs \
+        else np.empty((0, len(devises), len(compartiments)))
+    impacts = chocs * expositions.to_numpy(dtype=np.float64)[None, :, :]
+    return ResultatStress(impacts, pd.Index(noms, name="Scénario"), devises, compartiments)
@@ -0,0 +1,264 @@
+"""Stress inverse : plus petit choc qui fait passer le LCR sous 100 % ou le NSFR sous 1.
+
+Chaque ratio est décomposé en termes pondérés (HQLA par niveau, sorties et
+entrées par catégorie pour le LCR ; ASF et RSF par catégorie × compartiment
+pour le NSFR). Un scénario est une direction de choc ``d`` (un poids positif
+par terme, de norme euclidienne 1) et une intensité ``λ`` : chaque terme
+devient ``p × (1 ± λ d)``, le signe aggravant le ratio (taux de fuite et
+pondérations RSF multipliés, taux d'entrée, HQLA et pondérations ASF
+décotés), borné à 0 et, pour le RSF, au montant brut (pondération de 100 %).
+L'intensité est ainsi la norme du vecteur des chocs relatifs, comparable
+d'un scénario à l'autre : le scénario d'intensité minimale est le
+franchissement de moindre coût, et non celui qui choque tous les termes.
+
+Sans ces bornes, numérateur et dénominateur sont affines en ``λ`` : le seuil
+est franchi à une intensité donnée par une formule fermée. Le plafond de
+75 % sur les entrées rend le dénominateur du LCR non linéaire, mais il vaut
+``max(S - E, 0,25 S)`` : le LCR passe sous le seuil dès que l'une des deux
+branches affines le fait, et l'intensité critique est la plus petite des
+deux. Pour chaque branche, la direction de moindre choc est connue : elle
+est proportionnelle à la contribution de chaque terme à la pente de la
+branche (le vecteur des coefficients, par l'inégalité de Cauchy-Schwarz).
+Elle figure parmi les scénarios, avec les directions uniformes, par groupe,
+terme par terme et aléatoires.
+
+Les scénarios dont un terme atteint sa borne avant le seuil sont résolus
+par dichotomie, vectorisée sur tous ces scénarios à la fois. Les sommes de
+tous les scénarios sont chaque fois un seul produit matriciel.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from alm.lcr import PLAFOND_ENTREES
+
+SEUIL_LCR = 100.0
+SEUIL_NSFR = 1.0
+NB_SCENARIOS_ALEATOIRES = 5_000
+# Intensité maximale explorée (norme du vecteur des chocs relatifs) et itérations de la dichotomie
+INTENSITE_MAX = 20.0
+ITERATIONS_DICHOTOMIE = 60
+
+HQLA, SORTIES, ENTREES = "HQLA", "Sorties", "Entrées"
+ASF, RSF = "ASF", "RSF"
+
+
+@dataclass
+class Composantes:
+    """Termes pondérés d'un ratio : groupe, valeur, sens du choc aggravant et borne haute de chaque terme."""
+    index: pd.MultiIndex
+    groupes: tuple
+    code_groupe: np.ndarray
+    ponderes: np.ndarray
+    sens: np.ndarray
+    plafonds: np.ndarray
+
+    def __len__(self):
+        return len(self.ponderes)
+
+    def sommes(self, intensites, directions):
+        """Sommes par groupe (scénarios × groupes) des termes choqués, bornes comprises."""
+        choques = self.ponderes * (1 + self.sens * intensites[:, None] * directions)
+        choques = np.clip(choques, 0.0, self.plafonds)
+        return choques @ self._indicatrices()
+
+    def sommes_affines(self, directions):
+        """``(base, pente)`` : sommes par groupe sans les bornes, affines en l'intensité."""
+        indicatrices = self._indicatrices()
+        return self.ponderes @ indicatrices, directions @ (indicatrices * (self.sens * self.ponderes)[:, None])
+
+    def _indicatrices(self):
+        return np.eye(len(self.groupes))[self.code_groupe]
+
+
+def _composantes(termes):
+    """Composantes à partir de ``[(groupe, éléments, pondérés, sens, plafonds), ...]`` ; les termes nuls sont omis."""
+    groupes = tuple(groupe for groupe, *_ in termes)
+    cles, codes, ponderes, sens, plafonds = [], [], [], [], []
+    for code, (groupe, elements, valeurs, signe, bornes) in enumerate(termes):
+        valeurs = np.asarray(valeurs, dtype=np.float64)
+        garde = valeurs > 0
+        cles.extend((groupe, element) for element in np.asarray(elements, dtype=object)[garde])
+        codes.append(np.full(garde.sum(), code))
+        ponderes.append(valeurs[garde])
+        sens.append(np.full(garde.sum(), signe, dtype=np.float64))
+        plafonds.append(np.broadcast_to(np.asarray(bornes, dtype=np.float64), valeurs.shape)[garde])
+    return Composantes(pd.MultiIndex.from_tuples(cles, names=["Groupe", "Terme"]), groupes,
+                       np.concatenate(codes), np.concatenate(ponderes), np.concatenate(sens), np.concatenate(plafonds))
+
+
+def composantes_lcr(resultat):
+    """Termes du LCR d'un :class:`~alm.lcr.ResultatLCR` : HQLA décotés, sorties et entrées pondérées."""
+    return _composantes([
+        (HQLA, [f"Niveau {niveau}" for niveau in resultat.hqla_par_niveau], list(resultat.hqla_par_niveau.values()),
+         -1.0, np.inf),
+        (SORTIES, resultat.detail_sorties["Code category"], resultat.detail_sorties["Montant pondéré"], 1.0, np.inf),
+        (ENTREES, resultat.detail_entrees["Code category"], resultat.detail_entrees["Montant pondéré"], -1.0, np.inf),
+    ])
+
+
+def composantes_nsfr(resultat):
+    """Termes du NSFR d'un :class:`~alm.nsfr.ResultatNSFR` : ASF et RSF par catégorie × compartiment."""
+    termes = []
+    for cote, signe in ((ASF, -1.0), (RSF, 1.0)):
+        ventilation = resultat.ventilation.xs(cote, level="Côté")
+        elements = [f"{categorie} · {compartiment}" for categorie, compartiment in ventilation.index]
+        # Une pondération RSF ne dépasse pas 100 % du montant
+        plafonds = ventilation["Montant (€)"].to_numpy() if cote == RSF else np.inf
+        termes.append((cote, elements, ventilation["Montant pondéré"], signe, plafonds))
+    return _composantes(termes)
+
+
+def ratio_lcr(sommes):
+    """LCR (%) de chaque scénario à partir des sommes (scénarios × [HQLA, sorties, entrées])."""
+    hqla, sorties, entrees = sommes.T
+    nettes = sorties - np.minimum(entrees, PLAFOND_ENTREES * sorties)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(nettes != 0, 100 * hqla / nettes, 0.0)
+
+
+def ratio_nsfr(sommes):
+    asf, rsf = sommes.T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(rsf != 0, asf / rsf, np.nan)
+
+
+def branches_lcr(seuil=SEUIL_LCR):
+    """Coefficients des branches affines du LCR sur [HQLA, sorties, entrées] : LCR < seuil ⇔ une branche < 0."""
+    # 100 H < seuil × max(S - E, (1 - plafond) S) : l'une des deux branches suffit
+    return pd.DataFrame([[100.0, -seuil, seuil], [100.0, -seuil * (1 - PLAFOND_ENTREES), 0.0]],
+                        index=["entrées non plafonnées", "entrées plafonnées"], columns=[HQLA, SORTIES, ENTREES])
+
+
+def branches_nsfr(seuil=SEUIL_NSFR):
+    """Coefficients de la branche affine du NSFR sur [ASF, RSF]."""
+    return pd.DataFrame([[1.0, -seuil]], index=["NSFR"], columns=[ASF, RSF])
+
+
+def _franchissement(constante, pente):
+    """Plus petite intensité ``λ ≥ 0`` telle que ``constante + pente × λ ≤ 0`` (inf si jamais)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        intensites = np.where(pente < 0, -constante / pente, np.inf)
+    return np.where(constante <= 0, 0.0, intensites)
+
+
+def intensites_critiques(composantes, directions, ratio, branches, seuil,
+                         intensite_max=INTENSITE_MAX, iterations=ITERATIONS_DICHOTOMIE):
+    """Intensité du plus petit choc qui amène ``ratio`` au ``seuil``, pour chaque direction.
+
+    ``branches`` donne les coefficients (branches × groupes) des conditions
+    affines de franchissement. L'intensité vaut inf si le seuil n'est pas
+    atteint avant ``intensite_max``.
+
+    Les bornes ne font qu'atténuer les chocs : l'intensité de la formule
+    fermée est donc un minorant, exact si aucun terme n'a atteint sa borne.
+    Sinon, l'intensité est cherchée par dichotomie entre ce minorant et
+    ``intensite_max``, pour tous ces scénarios ensemble.
+    """
+    directions = np.asarray(directions, dtype=np.float64)
+    branches = np.asarray(branches, dtype=np.float64)
+    base, pente = composantes.sommes_affines(directions)
+    intensites = _franchissement(branches @ base, pente @ branches.T).min(axis=1)
+    intensites[intensites > intensite_max] = np.inf
+
+    finies = np.flatnonzero(np.isfinite(intensites) & (intensites > 0))
+    ratios = ratio(composantes.sommes(intensites[finies], directions[finies]))
+    restantes = finies[~np.isclose(ratios, seuil, rtol=1e-9, atol=0.0)]
+    if not len(restantes):
+        return intensites
+
+    # Dichotomie : le ratio décroît avec λ ; bas au-dessus du seuil, haut en dessous
+    sous_directions = directions[restantes]
+    bas = intensites[restantes]
+    haut = np.full(len(restantes), float(intensite_max))
+    atteint = ratio(composantes.sommes(haut, sous_directions)) <= seuil
+    for _ in range(iterations):
+        milieu = (bas + haut) / 2
+        dessous = ratio(composantes.sommes(milieu, sous_directions)) <= seuil
+        haut = np.where(dessous, milieu, haut)
+        bas = np.where(dessous, bas, milieu)
+    intensites[restantes] = np.where(atteint, haut, np.inf)
+    return intensites
+
+
+def normaliser(directions):
+    """Directions ramenées à une norme euclidienne de 1 (les directions nulles restent nulles)."""
+    normes = np.linalg.norm(directions, axis=1, keepdims=True)
+    return np.divide(directions, normes, out=np.zeros_like(directions, dtype=np.float64), where=normes > 0)
+
+
+def directions_moindre_choc(composantes, branches):
+    """Direction de plus petite norme qui franchit chaque branche affine (sans les bornes), une ligne par branche."""
+    contributions = -np.asarray(branches)[:, composantes.code_groupe] * composantes.sens * composantes.ponderes
+    return np.maximum(contributions, 0.0)
+
+
+def directions_types(composantes, branches=None, nb_aleatoires=NB_SCENARIOS_ALEATOIRES, graine=0):
+    """Directions de choc (scénarios × termes) : moindre choc, uniformes, par groupe, terme par terme, aléatoires.
+
+    Chaque direction est de norme euclidienne 1 : l'intensité critique est
+    la norme du choc, quel que soit le nombre de termes choqués.
+    """
+    n = len(composantes)
+    lignes, noms = [], []
+    if branches is not None:
+        lignes.extend(directions_moindre_choc(composantes, branches))
+        noms.extend("Moindre choc" if len(branches) == 1 else f"Moindre choc ({branche})" for branche in branches.index)
+    lignes.append(np.ones(n))
+    noms.append("Tous les termes")
+    for code, groupe in enumerate(composantes.groupes):
+        lignes.append((composantes.code_groupe == code).astype(np.float64))
+        noms.append(f"{groupe} (uniforme)")
+    lignes.extend(np.eye(n))
+    noms.extend(f"{groupe} · {terme}" for groupe, terme in composantes.index)
+    lignes.extend(np.random.default_rng(graine).random((nb_aleatoires, n)))
+    noms.extend(f"Aléatoire {i + 1}" for i in range(nb_aleatoires))
+    return pd.DataFrame(normaliser(np.array(lignes).reshape(-1, n)), index=pd.Index(noms, name="Scénario"),
+                        columns=composantes.index)
+
+
+@dataclass
+class ResultatStressInverse:
+    """Intensités critiques par scénario, de la plus petite à la plus grande."""
+    ratio_base: float
+    seuil: float
+    intensites: pd.Series
+    directions: pd.DataFrame
+
+    def plus_petit_choc(self):
+        """Choc (λ × direction) de chaque terme dans le scénario le plus sévère."""
+        scenario = self.intensites.index[0]
+        return (self.directions.loc[scenario] * self.intensites.iloc[0]).rename("Choc")
+
+    def tableau(self, n=20):
+        """Les ``n`` scénarios les plus sévères : intensité critique (norme du choc) et choc du terme le plus choqué."""
+        tete = self.intensites.head(n)
+        maximum = self.directions.loc[tete.index].max(axis=1).to_numpy()
+        return pd.DataFrame({"Intensité critique": tete, "Choc max par terme (%)": 100 * tete * maximum})
+
+
+def _stress_inverse(composantes, ratio, branches, seuil, directions, nb_aleatoires, graine):
+    if directions is None:
+        directions = directions_types(composantes, branches, nb_aleatoires, graine)
+    else:
+        directions = directions.reindex(columns=composantes.index, fill_value=0.0)
+        directions = pd.DataFrame(normaliser(directions.to_numpy(dtype=np.float64)), index=directions.index,
+                                  columns=directions.columns)
+    intensites = intensites_critiques(composantes, directions.to_numpy(), ratio, branches, seuil)
+    ratio_base = float(ratio(composantes.sommes(np.zeros(1), np.zeros((1, len(composantes)))))[0])
+    serie = pd.Series(intensites, index=directions.index, name="Intensité critique").sort_values(kind="stable")
+    return ResultatStressInverse(ratio_base, seuil, serie, directions)
+
+
+def stress_inverse_lcr(resultat, seuil=SEUIL_LCR, directions=None, nb_aleatoires=NB_SCENARIOS_ALEATOIRES, graine=0):
+    """Stress inverse du LCR : taux de fuite ×(1 + λd), taux d'entrée et HQLA ×(1 - λd)."""
+    return _stress_inverse(composantes_lcr(resultat), ratio_lcr, branches_lcr(seuil), seuil, directions,
+                           nb_aleatoires, graine)
+
+
+def stress_inverse_nsfr(resultat, seuil=SEUIL_NSFR, directions=None, nb_aleatoires=NB_SCENARIOS_ALEATOIRES, graine=0):
+    """Stress inverse du NSFR : pondérations ASF ×(1 - λd), pondérations RSF ×(1 + λd) dans la limite de 100 %."""
+    return _stress_inverse(composantes_nsfr(resultat), ratio_nsfr, branches_nsfr(seuil), seuil, directions,
+                           nb_aleatoires, graine)
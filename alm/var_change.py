@@ -0,0 +1,163 @@
+"""VaR et Expected Shortfall de change à partir d'historiques de taux par devise.
+
+Les taux de change forment un tableau (dates × devises). Les rendements
+logarithmiques de chaque devise, multipliés par l'ENC convertie en devise
+locale, donnent le vecteur de P&L du portefeuille en un produit matriciel.
+Trois méthodes sont disponibles à plusieurs niveaux de confiance :
+
+* historique : quantile empirique des P&L ;
+* paramétrique : variance-covariance gaussienne, ``σ² = eᵀ Σ e`` ;
+* bootstrap filtré (FHS) : P&L standardisés par une volatilité EWMA,
+  rééchantillonnés puis remis à l'échelle de la volatilité courante.
+
+Sur fenêtres glissantes (backtesting), la VaR paramétrique se met à jour en
+O(1) par pas grâce aux sommes cumulées de P&L et de P&L². Une statistique
+d'ordre exacte ne se met pas à jour en O(1) : la VaR historique tient les
+pertes de la fenêtre triées et, à chaque pas, retire la plus ancienne et
+insère la nouvelle par recherche dichotomique (O(log w) comparaisons et un
+décalage mémoire), puis lit la queue en fin de liste. La mémoire reste en
+O(w), sans matrice (fenêtres × w).
+"""
+
+from bisect import bisect_left, insort
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+NIVEAUX = (0.95, 0.99)
+FENETRE = 250
+LAMBDA_EWMA = 0.94
+NB_BOOTSTRAP = 10_000
+
+
+def historique_taux(df, date="Date", devise="currency", taux="Exchange RATE"):
+    """Tableau (dates × devises) à partir d'un historique en format long ou déjà large.
+
+    Un format large a une colonne ``date`` et une colonne par devise. Les
+    trous sont comblés par le dernier taux connu.
+    """
+    if devise in df.columns and taux in df.columns:
+        df = df.pivot_table(index=date, columns=devise, values=taux, aggfunc="last")
+    else:
+        df = df.set_index(date)
+    df.index = pd.to_datetime(df.index)
+    return df.sort_index().apply(pd.to_numeric, errors="coerce").ffill()
+
+
+def rendements(taux):
+    """Rendements logarithmiques journaliers (dates × devises), première date exclue."""
+    valeurs = np.log(taux.to_numpy(dtype=np.float64))
+    return pd.DataFrame(np.diff(valeurs, axis=0), index=taux.index[1:], columns=taux.columns).fillna(0.0)
+
+
+def expositions(enc, taux):
+    """ENC de chaque devise de l'historique convertie au dernier taux (0 si absente)."""
+    enc = enc.reindex(taux.columns).fillna(0.0).to_numpy(dtype=np.float64)
+    return enc * taux.iloc[-1].to_numpy(dtype=np.float64)
+
+
+def pnl_portefeuille(rendements, expositions):
+    """P&L journaliers du portefeuille en devise locale."""
+    return pd.Series(rendements.to_numpy() @ expositions, index=rendements.index, name="P&L")
+
+
+def _taille_queue(nb, niveau):
+    return min(max(int(np.ceil(nb * (1 - niveau))), 1), nb)
+
+
+def _var_es_historique(pnl, niveau):
+    """VaR = k-ième plus grande perte, ES = moyenne des k plus grandes, k = ⌈n (1 - niveau)⌉."""
+    pertes = -np.asarray(pnl, dtype=np.float64)
+    k = len(pertes) - _taille_queue(len(pertes), niveau)
+    queue = np.partition(pertes, k)[k:]
+    return float(queue[0]), float(queue.mean())
+
+
+def _queues_glissantes(pertes, fenetre, taille_queue):
+    """VaR et ES historiques de chaque fenêtre ``pertes[t:t + fenetre]``, fenêtre triée tenue à jour pas à pas."""
+    nb = len(pertes) - fenetre + 1
+    var, es = np.empty(nb), np.empty(nb)
+    valeurs = pertes.tolist()
+    triees = sorted(valeurs[:fenetre])
+    for t in range(nb):
+        if t:
+            del triees[bisect_left(triees, valeurs[t - 1])]
+            insort(triees, valeurs[t + fenetre - 1])
+        queue = triees[fenetre - taille_queue:]
+        var[t] = queue[0]
+        es[t] = sum(queue) / taille_queue
+    return var, es
+
+
+def _var_es_gaussienne(moyenne, ecart_type, niveau):
+    loi = NormalDist()
+    z = loi.inv_cdf(niveau)
+    return -moyenne + z * ecart_type, -moyenne + ecart_type * loi.pdf(z) / (1 - niveau)
+
+
+def volatilite_ewma(pnl, lam=LAMBDA_EWMA):
+    """Volatilité conditionnelle EWMA de chaque date (connue la veille au soir)."""
+    variance = pd.Series(np.asarray(pnl, dtype=np.float64) ** 2).ewm(alpha=1 - lam, adjust=False).mean().to_numpy()
+    return np.sqrt(np.concatenate([[variance[0]], variance[:-1]]))
+
+
+def var_es(rendements, expositions, niveaux=NIVEAUX, nb_bootstrap=NB_BOOTSTRAP, lam=LAMBDA_EWMA, graine=None):
+    """Table VaR / ES (pertes positives) par méthode et niveau de confiance."""
+    pnl = rendements.to_numpy() @ expositions
+    covariance = np.cov(rendements.to_numpy(), rowvar=False, ddof=1).reshape(len(expositions), len(expositions))
+    ecart_type = float(np.sqrt(max(expositions @ covariance @ expositions, 0.0)))
+
+    # Bootstrap filtré : résidus standardisés tirés avec remise, remis à la volatilité du lendemain
+    vol = volatilite_ewma(pnl, lam)
+    vol_suivante = np.sqrt(lam * vol[-1] ** 2 + (1 - lam) * pnl[-1] ** 2)
+    residus = np.divide(pnl, vol, out=np.zeros_like(pnl), where=vol > 0)
+    rng = np.random.default_rng(graine)
+    simules = residus[rng.integers(0, len(residus), nb_bootstrap)] * vol_suivante
+
+    lignes = {"Historique": {}, "Paramétrique": {}, "Bootstrap filtré": {}}
+    for niveau in niveaux:
+        pct = f"{100 * niveau:g} %"
+        for methode, (var, es) in {
+            "Historique": _var_es_historique(pnl, niveau),
+            "Paramétrique": _var_es_gaussienne(float(pnl.mean()), ecart_type, niveau),
+            "Bootstrap filtré": _var_es_historique(simules, niveau),
+        }.items():
+            lignes[methode][f"VaR {pct}"] = var
+            lignes[methode][f"ES {pct}"] = es
+    return pd.DataFrame.from_dict(lignes, orient="index").rename_axis("Méthode")
+
+
+def var_glissante(pnl, fenetre=FENETRE, niveau=0.99):
+    """VaR et ES historiques et paramétriques sur fenêtres glissantes.
+
+    La valeur datée t n'utilise que les ``fenetre`` P&L précédents : elle se
+    compare directement au P&L de t pour le backtesting (colonne "Exception").
+    """
+    index = pnl.index
+    pnl = np.asarray(pnl, dtype=np.float64)
+    nb = len(pnl) - fenetre
+    if nb <= 0:
+        raise ValueError(f"Historique trop court : {len(pnl)} P&L pour une fenêtre de {fenetre}.")
+
+    # Paramétrique : moments glissants en O(1) par pas à partir des sommes cumulées
+    cumul = np.concatenate([[0.0], np.cumsum(pnl)])
+    cumul_carres = np.concatenate([[0.0], np.cumsum(pnl * pnl)])
+    somme = cumul[fenetre:-1] - cumul[:nb]
+    somme_carres = cumul_carres[fenetre:-1] - cumul_carres[:nb]
+    moyenne = somme / fenetre
+    ecart_type = np.sqrt(np.maximum(somme_carres - fenetre * moyenne ** 2, 0.0) / (fenetre - 1))
+    var_param, es_param = _var_es_gaussienne(moyenne, ecart_type, niveau)
+
+    # Historique : fenêtre des pertes triée, mise à jour par une suppression et une insertion par pas
+    var_hist, es_hist = _queues_glissantes(-pnl[:-1], fenetre, _taille_queue(fenetre, niveau))
+
+    realise = pnl[fenetre:]
+    return pd.DataFrame({
+        "P&L": realise,
+        "VaR historique": var_hist,
+        "ES historique": es_hist,
+        "VaR paramétrique": var_param,
+        "ES paramétrique": es_param,
+        "Exception": -realise > var_hist,
+    }, index=index[fenetre:])
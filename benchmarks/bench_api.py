@@ -0,0 +1,124 @@
+"""Test de charge du service HTTP (alm.api) : latences p50 / p99 et requêtes par seconde.
+
+Le serveur est lancé dans un sous-processus, puis chaque point d'entrée
+reçoit ``--requetes`` requêtes envoyées par ``--concurrence`` clients
+simultanés. Les fichiers (Parquet) sont tirés parmi ``--variantes`` jeux
+synthétiques distincts : avec une seule variante, on mesure surtout le cache
+de résultats des processus du pool.
+
+Usage : python -m benchmarks.bench_api [--lignes 200000] [--requetes 200] [--concurrence 16]
+        [--variantes 8] [--processus N] [--port 8765]
+"""
+
+import argparse
+import http.client
+import io
+import subprocess
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.synthetique import balance_change, balance_lcr, flux_lcr
+
+DATE_ARRETE = "2024-12-31"
+
+
+def _parquet(df, nom):
+    tampon = io.BytesIO()
+    df.to_parquet(tampon, index=False)
+    return nom, tampon.getvalue()
+
+
+def multipart(champs, fichiers):
+    """Corps ``multipart/form-data`` et type de contenu pour ``champs`` et ``fichiers`` ({nom: (fichier, octets)})."""
+    separateur = uuid.uuid4().hex
+    parties = []
+    for nom, valeur in champs.items():
+        parties.append(f'--{separateur}\r\nContent-Disposition: form-data; name="{nom}"\r\n\r\n{valeur}\r\n'.encode())
+    for nom, (nom_fichier, donnees) in fichiers.items():
+        parties.append(f'--{separateur}\r\nContent-Disposition: form-data; name="{nom}"; filename="{nom_fichier}"\r\n'
+                       f'Content-Type: application/octet-stream\r\n\r\n'.encode() + donnees + b"\r\n")
+    parties.append(f"--{separateur}--\r\n".encode())
+    return b"".join(parties), f"multipart/form-data; boundary={separateur}"
+
+
+def charges(n_lignes, variantes):
+    """Corps de requête par point d'entrée : {chemin: [(corps, type de contenu), ...]}."""
+    requetes = {"/lcr": [], "/change": []}
+    for graine in range(variantes):
+        balance = balance_lcr(n_lignes, graine)
+        balance["Level"] = balance["Level"].astype("string")  # niveaux mixtes (1, "2a") : texte en Parquet
+        requetes["/lcr"].append(multipart({}, {
+            "balance": _parquet(balance, "balance.parquet"),
+            "echeancier": _parquet(flux_lcr(n_lignes, graine + 1000), "echeancier.parquet"),
+            "emplois": _parquet(flux_lcr(n_lignes, graine + 2000), "emplois.parquet"),
+        }))
+        requetes["/change"].append(multipart({"date_arrete": DATE_ARRETE}, {
+            "fichier": _parquet(balance_change(n_lignes, graine=graine), "change.parquet"),
+        }))
+    return requetes
+
+
+def envoyer(port, chemin, corps, type_contenu):
+    connexion = http.client.HTTPConnection("127.0.0.1", port, timeout=300)
+    try:
+        debut = time.perf_counter()
+        connexion.request("POST", chemin, body=corps, headers={"Content-Type": type_contenu})
+        reponse = connexion.getresponse()
+        reponse.read()
+        return time.perf_counter() - debut, reponse.status
+    finally:
+        connexion.close()
+
+
+def attendre_serveur(port, delai=60):
+    fin = time.monotonic() + delai
+    while time.monotonic() < fin:
+        try:
+            connexion = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connexion.request("GET", "/sante")
+            if connexion.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("Le serveur n'a pas démarré.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lignes", type=int, default=200_000)
+    parser.add_argument("--requetes", type=int, default=200)
+    parser.add_argument("--concurrence", type=int, default=16)
+    parser.add_argument("--variantes", type=int, default=8)
+    parser.add_argument("--processus", type=int, default=None)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    requetes = charges(args.lignes, args.variantes)
+    commande = [sys.executable, "-m", "alm.api", "--port", str(args.port)]
+    if args.processus:
+        commande += ["--processus", str(args.processus)]
+    serveur = subprocess.Popen(commande)
+    try:
+        attendre_serveur(args.port)
+        print(f"{'point d’entrée':<16}{'p50 (ms)':>10}{'p99 (ms)':>10}{'req/s':>9}{'erreurs':>9}")
+        for chemin, corps in requetes.items():
+            with ThreadPoolExecutor(max_workers=args.concurrence) as clients:
+                debut = time.perf_counter()
+                mesures = list(clients.map(lambda i: envoyer(args.port, chemin, *corps[i % len(corps)]),
+                                           range(args.requetes)))
+                duree = time.perf_counter() - debut
+            latences = np.array([latence for latence, _ in mesures]) * 1000
+            erreurs = sum(statut != 200 for _, statut in mesures)
+            print(f"{chemin:<16}{np.percentile(latences, 50):>10.1f}{np.percentile(latences, 99):>10.1f}"
+                  f"{args.requetes / duree:>9.1f}{erreurs:>9}")
+    finally:
+        serveur.terminate()
+        serveur.wait()
+
+
+if __name__ == "__main__":
+    main()
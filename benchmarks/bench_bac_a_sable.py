@@ -0,0 +1,139 @@
+"""Latence des modifications du bac à sable contre un recalcul complet des quatre indicateurs.
+
+Les états sont construits une fois à partir de balances synthétiques, puis
+``--modifications`` modifications tirées au hasard (déplacements LCR, NSFR et
+change, maturités EVE, chocs de taux et de change) sont appliquées, chacune
+suivie de la lecture des résultats. Quelques modifications sont vérifiées
+contre un recalcul complet sur les données modifiées.
+
+Usage : python -m benchmarks.bench_bac_a_sable [--lignes 2000000] [--positions-eve 100000] [--modifications 200]
+"""
+
+import argparse
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+from alm.bac_a_sable import (ENTREES, HQLA, SORTIES, BacASable, ChocChange, ChocTaux, DeplacementChange,
+                             DeplacementLCR, DeplacementNSFR, EtatChange, EtatEVE, EtatLCR, EtatNSFR, MaturiteEVE)
+from alm.change import derniers_taux, sommes_change, ventiler_change
+from alm.eve import valoriser
+from alm.lcr import PONDERATIONS_SORTIES, calculer_lcr
+from alm.nsfr import LIBELLES_NSFR, PONDERATIONS_ASF, calculer_nsfr
+from benchmarks.synthetique import balance_change, balance_lcr, feuilles_nsfr, flux_lcr, positions_eve
+
+DATE_ARRETE = pd.Timestamp("2024-12-31")
+SEUIL_MS = 200
+
+
+def chronometrer(fonction, *args):
+    debut = time.perf_counter()
+    resultat = fonction(*args)
+    return resultat, time.perf_counter() - debut
+
+
+def modification_aleatoire(rng, bac):
+    """Une modification valide tirée au hasard parmi les six familles."""
+    famille = rng.integers(0, 6)
+    if famille == 0:
+        etat = bac.etats["LCR"]
+        cote = [HQLA, SORTIES, ENTREES][rng.integers(0, 3)]
+        montants = etat.montants[cote]
+        source = int(np.argmax(montants))
+        return DeplacementLCR(cote, etat.index[cote][source], etat.index[cote][rng.integers(0, len(montants))],
+                              float(montants[source]) * 0.01)
+    if famille == 1:
+        cote, categorie, compartiment = max(bac.etats["NSFR"].cases.items(), key=lambda c: c[1][0])[0]
+        cible = list(PONDERATIONS_ASF)[rng.integers(0, len(PONDERATIONS_ASF))] if cote == "ASF" else categorie
+        return DeplacementNSFR(cote, categorie, compartiment, cible, LIBELLES_NSFR[rng.integers(0, len(LIBELLES_NSFR))],
+                               bac.etats["NSFR"].cases[(cote, categorie, compartiment)][0] * 0.01)
+    if famille == 2:
+        nb = len(bac.etats["EVE"].positions)
+        return MaturiteEVE(tuple(rng.integers(0, nb, size=10).tolist()), float(rng.uniform(0.5, 20)))
+    if famille == 3:
+        return ChocTaux(float(rng.choice([-0.02, -0.01, 0.01, 0.02])))
+    etat = bac.etats["Change"]
+    devise = etat.devises[rng.integers(0, len(etat.devises))]
+    if famille == 4:
+        return ChocChange(devise, float(rng.uniform(-0.2, 0.2)))
+    libelle = etat.libelles[0]
+    solde = abs(etat.sommes[etat.devises.get_loc(devise), 1, 1])
+    return DeplacementChange("actif", devise, libelle, etat.devises[0], etat.libelles[-1], solde * 0.01 or 1.0)
+
+
+def verifier(df_balance, df_echeancier, df_emplois, positions):
+    """Déplacement LCR et choc / maturité EVE comparés à un recalcul complet."""
+    source, cible = list(PONDERATIONS_SORTIES)[0], list(PONDERATIONS_SORTIES)[-1]
+    resultat = calculer_lcr(df_balance, df_echeancier, df_emplois)
+    bac = BacASable(lcr=EtatLCR.depuis_resultat(resultat), eve=EtatEVE(positions))
+    montant = float(resultat.detail_sorties.set_index("Code category").loc[source, "Montant"])
+    bac.appliquer(DeplacementLCR(SORTIES, source, cible, montant))
+    reclassee = df_balance.assign(**{"Code category": df_balance["Code category"].replace(source, cible)})
+    attendu = calculer_lcr(reclassee, df_echeancier, df_emplois).lcr
+    assert math.isclose(bac.resultats()["LCR"].lcr, attendu, rel_tol=1e-9), (bac.resultats()["LCR"].lcr, attendu)
+
+    bac.appliquer(ChocTaux(0.01))
+    bac.appliquer(MaturiteEVE((0, 1, 2), 7.0))
+    modifiees = positions.copy()
+    modifiees.loc[[0, 1, 2], "Maturité"] = 7.0
+    valeurs = valoriser(modifiees, modifiees["Taux d'actualisation"].to_numpy() + 0.01)
+    signe = np.where(valeurs["Côté"] == "passif", -1.0, 1.0)
+    attendu = float((valeurs["Valeur actualisée"] * signe).sum())
+    assert math.isclose(bac.resultats()["EVE"].eve, attendu, rel_tol=1e-9), (bac.resultats()["EVE"].eve, attendu)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lignes", type=int, default=2_000_000)
+    parser.add_argument("--positions-eve", type=int, default=100_000)
+    parser.add_argument("--modifications", type=int, default=200)
+    args = parser.parse_args()
+
+    df_balance = balance_lcr(args.lignes)
+    df_echeancier, df_emplois = flux_lcr(args.lignes // 2), flux_lcr(args.lignes // 10, graine=2)
+    passifs, actifs = feuilles_nsfr(args.lignes // 2)
+    positions = positions_eve(args.positions_eve)
+    df_change = balance_change(args.lignes)
+
+    verifier(df_balance.head(200_000), df_echeancier.head(100_000), df_emplois, positions.head(2_000))
+
+    def recalcul_complet():
+        calculer_lcr(df_balance, df_echeancier, df_emplois)
+        calculer_nsfr(passifs, actifs)
+        valoriser(positions)
+        ventiler_change(df_change, DATE_ARRETE)
+
+    _, duree_complete = chronometrer(recalcul_complet)
+
+    def construire():
+        return BacASable(
+            lcr=EtatLCR.depuis_resultat(calculer_lcr(df_balance, df_echeancier, df_emplois)),
+            nsfr=EtatNSFR.depuis_resultat(calculer_nsfr(passifs, actifs)),
+            eve=EtatEVE(positions),
+            change=EtatChange(*sommes_change(df_change, DATE_ARRETE), derniers_taux(df_change)),
+        )
+
+    bac, duree_construction = chronometrer(construire)
+
+    rng = np.random.default_rng(0)
+    latences = {}
+    for _ in range(args.modifications):
+        modification = modification_aleatoire(rng, bac)
+        debut = time.perf_counter()
+        bac.appliquer(modification)
+        bac.synthese()
+        latences.setdefault(type(modification).__name__, []).append((time.perf_counter() - debut) * 1000)
+
+    print(f"{args.lignes:,} lignes par balance, {args.positions_eve:,} positions EVE")
+    print(f"recalcul complet {duree_complete:.2f} s | construction du bac à sable {duree_construction:.2f} s")
+    print(f"{'modification':<20}{'nombre':>8}{'p50 (ms)':>10}{'max (ms)':>10}")
+    for nom, mesures in latences.items():
+        print(f"{nom:<20}{len(mesures):>8}{np.median(mesures):>10.1f}{max(mesures):>10.1f}")
+    pire = max(max(mesures) for mesures in latences.values())
+    print(f"pire latence {pire:.1f} ms ({'<' if pire < SEUIL_MS else '≥'} {SEUIL_MS} ms)")
+
+
+if __name__ == "__main__":
+    main()
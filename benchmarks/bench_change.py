@@ -0,0 +1,57 @@
+"""Benchmark de la ventilation ENC / gap de change contre l'ancien pipeline de la page.
+
+Usage : python -m benchmarks.bench_change [--lignes 5000000]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from alm.change import ventiler_change
+from benchmarks.synthetique import balance_change
+
+DATE_ARRETE = pd.Timestamp("2024-12-31")
+
+
+def change_ancien(df, date_arrete):
+    """Reprise de l'ancien calcul de pages/RISQUE_DE_CHANGE.py, date du jour remplacée par ``date_arrete``."""
+    df = df.copy()
+    df["Classe"] = df["PCEC Code"].astype(str).str[:1]
+    actifs = df[df["Classe"].isin(["3", "4", "5"])].groupby("currency")["CCY balance"].sum()
+    passifs = df[df["Classe"].isin(["1", "2"])].groupby("currency")["CCY balance"].sum()
+    enc = (actifs - passifs).fillna(0)
+
+    df["Maturity Date"] = df["Maturity Date"].replace("//", "2040-12-31")
+    df["Maturity Date"] = pd.to_datetime(df["Maturity Date"], errors="coerce")
+    df["Maturity Category"] = pd.cut(
+        (df["Maturity Date"] - date_arrete).dt.days / 365,
+        bins=[-1, 1, 5, 100],
+        labels=["Court Terme", "Moyen Terme", "Long Terme"],
+    )
+    gap = df.groupby(["currency", "Maturity Category"])["CCY balance"].sum().reset_index()
+    return enc, gap
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lignes", type=int, default=5_000_000)
+    args = parser.parse_args()
+
+    df = balance_change(args.lignes)
+    debut = time.perf_counter()
+    enc_ancien, gap_ancien = change_ancien(df, DATE_ARRETE)
+    ancien = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    enc, gap = ventiler_change(df, DATE_ARRETE)
+    nouveau = time.perf_counter() - debut
+
+    assert np.allclose(enc.reindex(enc_ancien.index).to_numpy(), enc_ancien.to_numpy(), rtol=1e-9)
+    print(f"{args.lignes:,} lignes, {len(enc)} devises, {len(gap)} couples devise × maturité")
+    print(f"ancien {ancien:.2f} s | nouveau {nouveau:.2f} s | gain ×{ancien / nouveau:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Temps jusqu'au premier rendu de chaque page Streamlit, à froid et à chaud.
+
+Chaque page est exécutée avec ``streamlit.testing.v1.AppTest`` dans un
+interpréteur neuf (premier rendu : imports compris), puis réexécutée dans le
+même processus (rerun : modules déjà chargés), comme sur le serveur partagé.
+
+Usage : python -m benchmarks.bench_demarrage [--repetitions 3]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+RACINE = Path(__file__).resolve().parent.parent
+PAGES = [
+    "streamlit_app.py",
+    "pages/LCR.py",
+    "pages/NSFR.py",
+    "pages/EVE.py",
+    "pages/MNI.py",
+    "pages/RISQUE_DE_CHANGE.py",
+    "pages/BAC_A_SABLE.py",
+]
+
+_SCRIPT = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file(sys.argv[1], default_timeout=120)
+debut = time.perf_counter()
+app.run()
+froid = time.perf_counter() - debut
+debut = time.perf_counter()
+app.run()
+chaud = time.perf_counter() - debut
+print(json.dumps({"froid": froid, "chaud": chaud, "erreurs": len(app.exception)}))
+"""
+
+
+def mesurer(page):
+    sortie = subprocess.run(
+        [sys.executable, "-c", _SCRIPT, str(RACINE / page)],
+        cwd=RACINE, capture_output=True, text=True, check=True,
+    )
+    return json.loads(sortie.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repetitions", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'page':<28}{'1er rendu (s)':>15}{'rerun (s)':>12}{'erreurs':>9}")
+    for page in PAGES:
+        mesures = [mesurer(page) for _ in range(args.repetitions)]
+        froid = statistics.median(m["froid"] for m in mesures)
+        chaud = statistics.median(m["chaud"] for m in mesures)
+        print(f"{page:<28}{froid:>15.3f}{chaud:>12.3f}{max(m['erreurs'] for m in mesures):>9}")
+
+
+if __name__ == "__main__":
+    main()
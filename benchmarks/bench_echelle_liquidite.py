@@ -0,0 +1,93 @@
+"""Échelle des maturités et horizon de survie : comptage par jour + cumuls contre une boucle flux par flux.
+
+La référence range chaque flux dans sa tranche et dans son jour par une
+boucle Python, puis cherche l'horizon de survie jour après jour ; elle ne
+traite que ``--lignes-reference`` flux, le temps total est extrapolé. Le
+résultat vectorisé sur ces mêmes flux doit être identique.
+
+Usage : python -m benchmarks.bench_echelle_liquidite [--flux 5000000] [--lignes-balance 1000000]
+        [--lignes-reference 200000]
+"""
+
+import argparse
+import bisect
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+from alm.change import jours_restants
+from alm.echelle_liquidite import CONTRACTUELLES, HORIZON_MAX, STRESSEES, echelle_liquidite
+from alm.lcr import PONDERATIONS_ENTREES
+from benchmarks.synthetique import balance_lcr, flux_lcr
+
+DATE_ARRETE = pd.Timestamp("2024-12-31")
+MULTIPLICATEURS = (0.1, 0.25, 0.5, 1.0, 2.0)
+
+
+def reference(echelle, dfs_flux):
+    """Entrées par tranche et horizons de survie, flux par flux puis jour par jour."""
+    entrees = [[0.0, 0.0] for _ in range(len(echelle.bornes) + 1)]
+    par_jour = [0.0] * HORIZON_MAX
+    bornes = list(echelle.bornes)
+    for df in dfs_flux:
+        jours = jours_restants(df["Maturity Date"], DATE_ARRETE)
+        for code, montant, j in zip(df["Code category"], df["c/v LCY balance"], jours):
+            if math.isnan(j) or j < 0:
+                continue
+            montant = abs(montant)
+            stresse = montant * PONDERATIONS_ENTREES.get(code, 0) / 100
+            tranche = bisect.bisect_left(bornes, j)
+            entrees[tranche][CONTRACTUELLES] += montant
+            entrees[tranche][STRESSEES] += stresse
+            if j <= HORIZON_MAX:
+                par_jour[max(int(j), 1) - 1] += stresse
+
+    horizons = []
+    for multiplicateur in MULTIPLICATEURS:
+        position, horizon = echelle.hqla, math.inf
+        for jour in range(HORIZON_MAX):
+            position += par_jour[jour] - echelle.sorties_journalieres * multiplicateur
+            if position < 0:
+                horizon = jour
+                break
+        horizons.append(horizon)
+    return np.array(entrees), np.array(horizons)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--flux", type=int, default=5_000_000)
+    parser.add_argument("--lignes-balance", type=int, default=1_000_000)
+    parser.add_argument("--lignes-reference", type=int, default=200_000)
+    args = parser.parse_args()
+
+    df_balance = balance_lcr(args.lignes_balance)
+    dfs_flux = [flux_lcr(args.flux * 5 // 6, 1, DATE_ARRETE), flux_lcr(args.flux // 6, 2, DATE_ARRETE)]
+
+    debut = time.perf_counter()
+    echelle = echelle_liquidite(df_balance, dfs_flux, DATE_ARRETE)
+    duree = time.perf_counter() - debut
+    debut = time.perf_counter()
+    horizons = echelle.horizons_survie(MULTIPLICATEURS)
+    duree_horizons = time.perf_counter() - debut
+
+    extraits = [df.head(args.lignes_reference * len(df) // args.flux) for df in dfs_flux]
+    attendue = echelle_liquidite(df_balance, extraits, DATE_ARRETE)
+    debut = time.perf_counter()
+    entrees, horizons_reference = reference(attendue, extraits)
+    duree_reference = (time.perf_counter() - debut) * args.flux / args.lignes_reference
+    assert np.allclose(attendue.entrees, entrees, rtol=1e-9, atol=1e-3)
+    assert (attendue.horizons_survie(MULTIPLICATEURS).to_numpy() == horizons_reference).all()
+
+    print(f"{echelle.nb_flux:,} flux à venir ({echelle.illisibles:,} illisibles, {echelle.echus:,.0f} € échus)")
+    print(f"échelle + profil de survie {duree:.2f} s | horizons pour {len(MULTIPLICATEURS)} multiplicateurs "
+          f"{duree_horizons * 1000:.1f} ms | boucle de référence ~{duree_reference:.0f} s (extrapolée)")
+    print(echelle.tableau()[["Entrées contractuelles", "Entrées stressées", "Sorties stressées",
+                             "Position de liquidité"]].to_string(float_format="{:,.0f}".format))
+    print(horizons.to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Lecture d'une balance depuis l'entrepôt de positions contre une relecture Parquet du fichier importé.
+
+Mesure, pour la balance multidevise, le temps de lecture et le calcul ENC /
+gap de change, ainsi que la mémoire supplémentaire allouée par lecture : la
+projection de l'entrepôt n'alloue que les colonnes catégorielles, les
+colonnes numériques restant dans les pages du fichier.
+
+Usage : python -m benchmarks.bench_entrepot [--lignes 5000000] [--lectures 4]
+"""
+
+import argparse
+import io
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+import pyarrow as pa
+
+from alm.change import COLONNES_CHANGE, ventiler_change
+from alm.entrepot import EntrepotPositions
+from alm.ingestion import lire_table
+from benchmarks.synthetique import balance_change
+
+DATE_ARRETE = pd.Timestamp("2024-12-31")
+
+
+def mesurer(lire, lectures):
+    """(durée moyenne de lecture, durée du calcul, Mo alloués par lecture) pour ``lectures`` lectures."""
+    tracemalloc.start()  # allocations NumPy ; celles d'Arrow sont comptées par son pool
+    avant = tracemalloc.get_traced_memory()[0] + pa.total_allocated_bytes()
+    debut = time.perf_counter()
+    tables = [lire() for _ in range(lectures)]
+    lecture = (time.perf_counter() - debut) / lectures
+    alloue = (tracemalloc.get_traced_memory()[0] + pa.total_allocated_bytes() - avant) / lectures / 1024 ** 2
+    tracemalloc.stop()
+    debut = time.perf_counter()
+    ventiler_change(tables[0], DATE_ARRETE)
+    return lecture, time.perf_counter() - debut, alloue
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lignes", type=int, default=5_000_000)
+    parser.add_argument("--lectures", type=int, default=4, help="lectures simultanées (sessions ouvertes)")
+    args = parser.parse_args()
+
+    fichier = io.BytesIO()
+    balance_change(args.lignes).to_parquet(fichier, index=False)
+    fichier.name = "balance.parquet"
+    with tempfile.TemporaryDirectory() as repertoire:
+        debut = time.perf_counter()
+        jeu = EntrepotPositions(repertoire).ingerer(DATE_ARRETE, "change", fichier)
+        ingestion = time.perf_counter() - debut
+
+        print(f"{args.lignes:,} lignes, ingestion unique {ingestion:.2f} s")
+        print(f"{'source':<12}{'lecture (s)':>13}{'ENC / gap (s)':>15}{'Mo / lecture':>14}")
+        for nom, lire in (("Parquet", lambda: lire_table(fichier, colonnes=COLONNES_CHANGE)),
+                          ("entrepôt", lambda: jeu.vers_dataframe(COLONNES_CHANGE))):
+            lecture, calcul, alloue = mesurer(lire, args.lectures)
+            print(f"{nom:<12}{lecture:>13.3f}{calcul:>15.3f}{alloue:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Sensibilités de l'EVE aux taux clés : dérivées analytiques contre des revalorisations choquées.
+
+La référence choque chaque point de la courbe de ±``--choc`` et revalorise
+toutes les positions avec :func:`alm.eve.valoriser` (2 valorisations par
+ténor) ; la DV01 parallèle des positions actualisées à leur propre taux est
+vérifiée de la même façon.
+
+Les temps de la valorisation seule et du calcul analytique sont les
+meilleurs de trois appels.
+
+Usage : python -m benchmarks.bench_eve_sensibilites [--positions 200000] [--choc 1e-6]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from alm.eve import CourbeTaux, valoriser
+from alm.eve_sensibilites import sensibilites_eve
+from benchmarks.synthetique import positions_eve
+
+MATURITES = np.array([0.25, 0.5, 1, 2, 3, 5, 7, 10, 15, 20, 30])
+TAUX = np.array([0.030, 0.031, 0.032, 0.033, 0.034, 0.035, 0.036, 0.037, 0.038, 0.039, 0.040])
+
+
+def valeurs_par_feuille(positions, courbe):
+    valorisees = valoriser(positions, courbe)
+    signe = np.where(valorisees["Côté"] == "passif", -1.0, 1.0)
+    return (valorisees["Valeur actualisée"] * signe).groupby(valorisees["Feuille"]).sum()
+
+
+def chronometrer(fonction, *args, repetitions=3):
+    """Résultat et meilleur temps sur ``repetitions`` appels."""
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        resultat = fonction(*args)
+        durees.append(time.perf_counter() - debut)
+    return resultat, min(durees)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--positions", type=int, default=200_000)
+    parser.add_argument("--choc", type=float, default=1e-6)
+    args = parser.parse_args()
+
+    positions = positions_eve(args.positions)
+    courbe = CourbeTaux(MATURITES, TAUX)
+    h = args.choc
+
+    base, duree_valorisation = chronometrer(valeurs_par_feuille, positions, courbe)
+    sensibilites, duree_analytique = chronometrer(sensibilites_eve, positions, courbe)
+
+    debut = time.perf_counter()
+    reference = {}
+    for k, tenor in enumerate(MATURITES):
+        choc = np.zeros(len(MATURITES))
+        choc[k] = h
+        hausse = valeurs_par_feuille(positions, CourbeTaux(MATURITES, TAUX + choc))
+        baisse = valeurs_par_feuille(positions, CourbeTaux(MATURITES, TAUX - choc))
+        reference[tenor] = (hausse - baisse) / (2 * h)
+    duree_reference = time.perf_counter() - debut
+
+    assert np.allclose(sensibilites.valeurs.to_numpy(), base.to_numpy(), rtol=1e-12)
+    ecart_courbe = max(np.abs(sensibilites.gradient[tenor].to_numpy() - reference[tenor].to_numpy()).max()
+                       / np.abs(sensibilites.gradient.to_numpy()).max() for tenor in MATURITES)
+
+    # Positions actualisées à leur propre taux : choc parallèle de tous les taux d'actualisation
+    propres = sensibilites_eve(positions)
+    taux_propres = positions["Taux d'actualisation"].to_numpy()
+    hausse, baisse = valeurs_par_feuille(positions, taux_propres + h), valeurs_par_feuille(positions, taux_propres - h)
+    parallele = (hausse - baisse) / (2 * h)
+    ecart_propres = (np.abs(propres.gradient.sum(axis=1).to_numpy() - parallele.to_numpy()).max()
+                     / np.abs(parallele.to_numpy()).max())
+    assert ecart_courbe < 1e-6 and ecart_propres < 1e-6, (ecart_courbe, ecart_propres)
+
+    print(f"{args.positions:,} positions, {len(MATURITES)} ténors")
+    print(f"valorisation seule {duree_valorisation:.2f} s | sensibilités analytiques {duree_analytique:.2f} s | "
+          f"revalorisations choquées ({2 * len(MATURITES)}) {duree_reference:.2f} s")
+    print(f"écart relatif max aux différences finies : courbe {ecart_courbe:.1e}, taux propres {ecart_propres:.1e}")
+    print((sensibilites.dv01()).to_string(float_format="{:,.0f}".format))
+    print(sensibilites.durees_taux_cles()["Total"].to_string(float_format="{:.3f}".format))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Rendu des graphiques de la page change : ancien tracé pyplot contre images en cache.
+
+L'ancien chemin redessine à chaque rerun une barre par devise avec
+``pyplot`` sans fermer les figures (comme ``st.pyplot(fig)``) ; le nouveau
+réduit la série aux principales devises et réutilise le PNG en cache. On
+mesure la durée de chaque rerun et la mémoire résidente (RSS) du processus.
+
+Usage : python -m benchmarks.bench_graphiques [--lignes 1000000] [--devises 300] [--reruns 20]
+"""
+
+import argparse
+import io
+import time
+
+import numpy as np
+import pandas as pd
+
+from alm.change import ventiler_change
+from benchmarks.synthetique import balance_change
+from interface.graphiques import barres, image, top_n
+
+DATE_ARRETE = pd.Timestamp("2024-12-31")
+
+
+def rss_mo():
+    """Mémoire résidente courante du processus (Linux), en Mo."""
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * 4096 / 1024 ** 2
+
+
+def rendu_ancien(enc):
+    """Reprise de l'ancien graphique ENC de pages/RISQUE_DE_CHANGE.py (figure pyplot jamais fermée)."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(10, 5))
+    enc = enc.sort_values()
+    bars = ax.bar(enc.index.astype(str), enc.to_numpy(), color="skyblue", edgecolor="black")
+    ax.axhline(0, color="red", linestyle="--", linewidth=1.5)
+    for bar in bars:
+        yval = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width() / 2, yval, f"{yval:.2e}",
+                ha="center", va="bottom" if yval > 0 else "top", fontsize=8)
+    ax.tick_params(axis="x", rotation=45)
+    tampon = io.BytesIO()
+    fig.savefig(tampon, format="png")
+    return tampon.getvalue()
+
+
+def rendu_nouveau(enc):
+    return image(barres, top_n(enc).sort_values(), "Exposition Nette de Change par Devise", "Devise", "ENC",
+                 annotations=True)
+
+
+def mesurer(rendu, enc, reruns):
+    durees, rss = [], [rss_mo()]
+    for _ in range(reruns):
+        debut = time.perf_counter()
+        rendu(enc)
+        durees.append(time.perf_counter() - debut)
+        rss.append(rss_mo())
+    return np.array(durees) * 1000, np.array(rss)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lignes", type=int, default=1_000_000)
+    parser.add_argument("--devises", type=int, default=300)
+    parser.add_argument("--reruns", type=int, default=20)
+    args = parser.parse_args()
+
+    enc, _ = ventiler_change(balance_change(args.lignes, nb_devises=args.devises), DATE_ARRETE)
+    print(f"{len(enc)} devises, {args.reruns} reruns")
+    print(f"{'chemin':<10}{'1er (ms)':>10}{'suivants (ms)':>15}{'RSS début (Mo)':>16}{'RSS fin (Mo)':>14}")
+    for nom, rendu in (("nouveau", rendu_nouveau), ("ancien", rendu_ancien)):
+        durees, rss = mesurer(rendu, enc, args.reruns)
+        print(f"{nom:<10}{durees[0]:>10.1f}{np.median(durees[1:]):>15.1f}{rss[0]:>16.0f}{rss[-1]:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
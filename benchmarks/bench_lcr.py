@@ -0,0 +1,66 @@
+"""Benchmark du moteur LCR vectorisé contre les boucles par catégorie d'origine.
+
+Usage : python -m benchmarks.bench_lcr [--tailles 1000000 5000000 10000000]
+"""
+
+import argparse
+import math
+import time
+
+from alm.lcr import PONDERATIONS_ENTREES, PONDERATIONS_SORTIES, calculer_lcr
+from benchmarks.synthetique import balance_lcr, flux_lcr
+
+
+def lcr_boucles(df_balance, df_echeancier, df_emplois):
+    """Reprise fidèle de l'ancien calcul de pages/LCR.py (un filtre par catégorie)."""
+    df_balance = df_balance.copy()
+    df_balance["c/v LCY balance"] = df_balance["c/v LCY balance"].abs()
+    list_1 = df_balance[df_balance["Level"] == 1]["c/v LCY balance"].sum()
+    list_2a = df_balance[df_balance["Level"] == "2a"]["c/v LCY balance"].sum() * 0.85
+    list_2b = df_balance[df_balance["Level"] == "2b"]["c/v LCY balance"].sum() * 0.5
+    total_HQLA = list_1 + list_2a + list_2b
+
+    sorties_treso = sum(
+        df_balance[df_balance["Code category"] == cat]["c/v LCY balance"].sum() * (weight / 100)
+        for cat, weight in PONDERATIONS_SORTIES.items()
+    )
+
+    entree_treso = 0
+    for df in [df_echeancier.copy(), df_emplois.copy()]:
+        df["c/v LCY balance"] = df["c/v LCY balance"].abs()
+        for cat, weight in PONDERATIONS_ENTREES.items():
+            entree_treso += df[df["Code category"] == cat]["c/v LCY balance"].sum() * (weight / 100)
+
+    if entree_treso > 0.75 * sorties_treso:
+        sorties_nettes_LCR = sorties_treso * 0.25
+    else:
+        sorties_nettes_LCR = sorties_treso - entree_treso
+    return (total_HQLA / sorties_nettes_LCR) * 100 if sorties_nettes_LCR != 0 else 0
+
+
+def chronometrer(fonction, *args):
+    debut = time.perf_counter()
+    resultat = fonction(*args)
+    return resultat, time.perf_counter() - debut
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tailles", type=int, nargs="+", default=[1_000_000, 5_000_000, 10_000_000])
+    args = parser.parse_args(argv)
+
+    print(f"{'lignes':>12} {'boucles (s)':>12} {'vectorisé (s)':>14} {'gain':>7}  LCR")
+    for n in args.tailles:
+        df_balance = balance_lcr(n)
+        df_echeancier = flux_lcr(n // 2, graine=1)
+        df_emplois = flux_lcr(n // 10, graine=2)
+
+        lcr_ref, t_boucles = chronometrer(lcr_boucles, df_balance, df_echeancier, df_emplois)
+        resultat, t_vecto = chronometrer(calculer_lcr, df_balance, df_echeancier, df_emplois)
+        assert math.isclose(resultat.lcr, lcr_ref, rel_tol=1e-9), (resultat.lcr, lcr_ref)
+
+        print(f"{n:>12,} {t_boucles:>12.2f} {t_vecto:>14.2f} {t_boucles / t_vecto:>6.1f}x  {resultat.lcr:.4f} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Stress inverse du LCR et du NSFR : solveur vectorisé contre une dichotomie scénario par scénario.
+
+La référence cherche l'intensité critique de chaque scénario par dichotomie,
+en recalculant le ratio avec les fonctions scalaires de alm.lcr / alm.nsfr ;
+elle ne traite que ``--scenarios-reference`` scénarios, le temps total est
+extrapolé.
+
+Usage : python -m benchmarks.bench_stress_inverse [--lignes 1000000] [--scenarios 5000]
+        [--scenarios-reference 200] [--seuil-lcr 100]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from alm import lcr, nsfr
+from alm.lcr import calculer_lcr
+from alm.nsfr import calculer_nsfr
+from alm.stress_inverse import (ASF, ENTREES, HQLA, INTENSITE_MAX, SEUIL_NSFR, branches_lcr, branches_nsfr,
+                                composantes_lcr, composantes_nsfr, directions_types, stress_inverse_lcr,
+                                stress_inverse_nsfr)
+from benchmarks.synthetique import balance_lcr, feuilles_nsfr, flux_lcr
+
+
+def lcr_choque(composantes, intensite, direction):
+    """LCR d'un scénario, terme par terme, avec les fonctions scalaires du module LCR."""
+    hqla = sorties = entrees = 0.0
+    termes = zip(composantes.index, composantes.ponderes, direction, composantes.plafonds)
+    for (groupe, _), pondere, d, plafond in termes:
+        signe = -1.0 if groupe in (HQLA, ENTREES) else 1.0
+        valeur = min(max(pondere * (1 + signe * intensite * d), 0.0), plafond)
+        if groupe == HQLA:
+            hqla += valeur
+        elif groupe == ENTREES:
+            entrees += valeur
+        else:
+            sorties += valeur
+    return lcr.ratio_lcr(hqla, lcr.sorties_nettes(sorties, entrees))
+
+
+def nsfr_choque(composantes, intensite, direction):
+    asf = rsf = 0.0
+    termes = zip(composantes.index, composantes.ponderes, direction, composantes.plafonds)
+    for (groupe, _), pondere, d, plafond in termes:
+        if groupe == ASF:
+            asf += max(pondere * (1 - intensite * d), 0.0)
+        else:
+            rsf += min(pondere * (1 + intensite * d), plafond)
+    return nsfr.ratio_nsfr(asf, rsf)
+
+
+def dichotomie(ratio, composantes, direction, seuil, iterations=60):
+    if ratio(composantes, 0.0, direction) <= seuil:
+        return 0.0
+    if ratio(composantes, INTENSITE_MAX, direction) > seuil:
+        return np.inf
+    bas, haut = 0.0, INTENSITE_MAX
+    for _ in range(iterations):
+        milieu = (bas + haut) / 2
+        bas, haut = (bas, milieu) if ratio(composantes, milieu, direction) <= seuil else (milieu, haut)
+    return haut
+
+
+def comparer(nom, resultat, composantes, ratio, seuil, n_reference):
+    debut = time.perf_counter()
+    directions = resultat.directions.iloc[:n_reference]
+    reference = np.array([dichotomie(ratio, composantes, d, seuil) for d in directions.to_numpy()])
+    duree_reference = (time.perf_counter() - debut) * len(resultat.directions) / n_reference
+    obtenues = resultat.intensites.reindex(directions.index).to_numpy()
+    finies = np.isfinite(reference)
+    assert (np.isfinite(obtenues) == finies).all()
+    ecart = np.abs(obtenues[finies] - reference[finies]).max(initial=0.0)
+    assert ecart < 1e-9, ecart
+    return duree_reference, ecart
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lignes", type=int, default=1_000_000)
+    parser.add_argument("--scenarios", type=int, default=5_000)
+    parser.add_argument("--scenarios-reference", type=int, default=200)
+    parser.add_argument("--seuil-lcr", type=float, default=100.0)
+    args = parser.parse_args()
+
+    resultat_lcr = calculer_lcr(balance_lcr(args.lignes), flux_lcr(args.lignes // 2), flux_lcr(args.lignes // 10, 2))
+    resultat_nsfr = calculer_nsfr(*feuilles_nsfr(args.lignes // 2))
+
+    print(f"{'ratio':<6}{'base':>10}{'scénarios':>11}{'vectorisé (s)':>15}{'référence (s)':>15}{'écart max':>11}"
+          f"  plus petit choc")
+    for nom, resultat_base, composantes, stress, ratio, seuil, branches in (
+        ("LCR", resultat_lcr, composantes_lcr(resultat_lcr), stress_inverse_lcr, lcr_choque, args.seuil_lcr,
+         branches_lcr(args.seuil_lcr)),
+        ("NSFR", resultat_nsfr, composantes_nsfr(resultat_nsfr), stress_inverse_nsfr, nsfr_choque, SEUIL_NSFR,
+         branches_nsfr()),
+    ):
+        directions = directions_types(composantes, branches, args.scenarios)
+        debut = time.perf_counter()
+        resultat = stress(resultat_base, seuil, directions)
+        duree = time.perf_counter() - debut
+        duree_reference, ecart = comparer(nom, resultat, composantes, ratio, seuil, args.scenarios_reference)
+        print(f"{nom:<6}{resultat.ratio_base:>10.3f}{len(directions):>11,}{duree:>15.3f}{duree_reference:>15.1f}"
+              f"{ecart:>11.1e}  {resultat.intensites.index[0]} : λ = {resultat.intensites.iloc[0]:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Générateurs de données synthétiques pour les benchmarks."""
+
+import numpy as np
+import pandas as pd
+
+from alm.lcr import PONDERATIONS_ENTREES, PONDERATIONS_SORTIES
+from alm.nsfr import PONDERATIONS_ASF, PONDERATIONS_RSF
+
+
+def balance_lcr(n_lignes, graine=0):
+    """Balance synthétique au format "Balance Globale" (Level, Code category, c/v LCY balance)."""
+    rng = np.random.default_rng(graine)
+    codes = np.array(sorted(set(PONDERATIONS_SORTIES) | {10, 20, 30, 9999}), dtype=np.int64)
+    niveaux = np.array([1, "2a", "2b", None], dtype=object)
+    return pd.DataFrame({
+        "Level": niveaux[rng.choice(4, size=n_lignes, p=[0.05, 0.03, 0.02, 0.90])],
+        "Code category": codes[rng.integers(0, len(codes), size=n_lignes)],
+        "c/v LCY balance": rng.normal(0, 1e6, size=n_lignes).round(2),
+    })
+
+
+def flux_lcr(n_lignes, graine=1, date_arrete=None):
+    """Échéancier / emplois interbancaires synthétiques (Code category, c/v LCY balance).
+
+    Avec ``date_arrete``, ajoute une colonne "Maturity Date" : échéances
+    quotidiennes d'un mois avant à cinq ans après l'arrêté, quelques "//".
+    """
+    rng = np.random.default_rng(graine)
+    codes = np.array(sorted(set(PONDERATIONS_ENTREES) | {10, 9999}), dtype=np.int64)
+    df = pd.DataFrame({
+        "Code category": codes[rng.integers(0, len(codes), size=n_lignes)],
+        "c/v LCY balance": rng.normal(0, 1e6, size=n_lignes).round(2),
+    })
+    if date_arrete is not None:
+        date_arrete = pd.Timestamp(date_arrete)
+        echeances = np.concatenate([
+            pd.date_range(date_arrete - pd.DateOffset(months=1), date_arrete + pd.DateOffset(years=5))
+            .strftime("%Y-%m-%d").to_numpy(dtype=object),
+            ["//"],
+        ])
+        # Échéances plus denses à court terme, comme un échéancier de prêts
+        rang = np.minimum((rng.exponential(0.15, size=n_lignes) * len(echeances)).astype(np.int64), len(echeances) - 1)
+        df["Maturity Date"] = echeances[rang]
+    return df
+
+
+def balance_change(n_lignes, nb_devises=40, graine=2):
+    """Balance multidevise synthétique au format "Feuil1" du module de change."""
+    rng = np.random.default_rng(graine)
+    codes = rng.integers(100_000, 600_000, size=2_000)
+    devises = np.array([f"D{i:02d}" for i in range(nb_devises)], dtype=object)
+    echeances = np.concatenate([
+        pd.date_range("2020-01-01", "2045-12-31", freq="MS").strftime("%Y-%m-%d").to_numpy(dtype=object),
+        ["//"],
+    ])
+    return pd.DataFrame({
+        "PCEC Code": codes[rng.integers(0, len(codes), size=n_lignes)],
+        "currency": devises[rng.integers(0, nb_devises, size=n_lignes)],
+        "CCY balance": rng.normal(0, 1e6, size=n_lignes).round(2),
+        "Maturity Date": echeances[rng.integers(0, len(echeances), size=n_lignes)],
+        "Exchange RATE": rng.uniform(0.5, 700, size=n_lignes).round(4),
+    })
+
+
+def feuilles_nsfr(n_lignes, graine=3):
+    """Feuilles "Passifs" et "Actifs" synthétiques du NSFR (pondérations CRR2 déduites des catégories)."""
+    rng = np.random.default_rng(graine)
+    passifs_categories = np.array(list(PONDERATIONS_ASF), dtype=object)
+    actifs_categories = np.array(list(PONDERATIONS_RSF), dtype=object)
+    passifs = pd.DataFrame({
+        "Catégorie": passifs_categories[rng.integers(0, len(passifs_categories), size=n_lignes)],
+        "Montant (€)": rng.lognormal(12, 1.5, size=n_lignes).round(2),
+        "Maturité résiduelle (mois)": rng.integers(0, 360, size=n_lignes).astype(np.float64),
+    })
+    actifs = pd.DataFrame({
+        "Catégorie": actifs_categories[rng.integers(0, len(actifs_categories), size=n_lignes)],
+        "Montant (€)": rng.lognormal(12, 1.5, size=n_lignes).round(2),
+        "Maturité résiduelle (mois)": rng.integers(0, 360, size=n_lignes).astype(np.float64),
+        "Grevé": rng.random(n_lignes) < 0.1,
+    })
+    return passifs, actifs
+
+
+def positions_eve(n_positions, graine=4):
+    """Positions EVE synthétiques (actif / passif, maturités de 1 mois à 30 ans, paiements annuels à mensuels)."""
+    rng = np.random.default_rng(graine)
+    feuilles = np.array(["Crédits", "B et EF", "B et EF Passif", "Compte créditeur Passif"], dtype=object)
+    feuille = feuilles[rng.integers(0, len(feuilles), size=n_positions)]
+    amortissements = np.array(["in_fine", "lineaire", "annuite"], dtype=object)
+    return pd.DataFrame({
+        "Feuille": feuille,
+        "Élément": [f"Élément {i + 1}" for i in range(n_positions)],
+        "Côté": np.where(pd.Series(feuille).str.contains("Passif").to_numpy(), "passif", "actif"),
+        "Montant": rng.lognormal(12, 1.5, size=n_positions).round(2),
+        "Taux d'intérêt": rng.uniform(0.0, 0.06, size=n_positions).round(4),
+        "Taux d'actualisation": rng.uniform(0.01, 0.05, size=n_positions).round(4),
+        "Maturité": rng.uniform(1 / 12, 30, size=n_positions).round(2),
+        "Fréquence": np.array([1, 2, 4, 12])[rng.integers(0, 4, size=n_positions)],
+        "Amortissement": amortissements[rng.integers(0, len(amortissements), size=n_positions)],
+    })
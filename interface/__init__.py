@@ -0,0 +1 @@
+"""Composants Streamlit communs aux pages de l'application."""
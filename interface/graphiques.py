@@ -0,0 +1,101 @@
+"""Graphiques matplotlib des pages : données réduites à ce qui est dessiné, images en cache.
+
+Les séries sont ramenées aux ``TOP_N`` plus grandes valeurs (en absolu), le
+reste étant regroupé sous "Autres". Chaque figure est dessinée sur une
+:class:`matplotlib.figure.Figure` indépendante de ``pyplot`` (aucune figure
+n'est conservée par matplotlib), convertie en PNG puis mise en cache, indexée
+par le hachage des données et des options : un rerun ou une autre session qui
+affiche les mêmes données réutilise l'image sans la redessiner.
+"""
+
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from alm.cache import CacheResultats, cle_argument
+
+TOP_N = 15
+AUTRES = "Autres"
+TAILLE_MAX_IMAGES = int(os.environ.get("ALM_CACHE_IMAGES_TAILLE_MAX", 64 * 1024 ** 2))
+
+cache_images = CacheResultats(taille_max=TAILLE_MAX_IMAGES)
+
+
+def top_n(serie, n=TOP_N, autres=AUTRES):
+    """Les ``n`` valeurs de ``serie`` les plus grandes en absolu, plus la somme des autres sous ``autres``."""
+    if len(serie) <= n:
+        return serie
+    ordre = serie.abs().sort_values(ascending=False).index
+    reste = pd.Series([serie.loc[ordre[n:]].sum()], index=[autres])
+    return pd.concat([serie.loc[ordre[:n]], reste]).rename(serie.name)
+
+
+def top_n_colonnes(tableau, n=TOP_N, autres=AUTRES):
+    """Tableau (lignes × séries) réduit aux ``n`` lignes de plus grand total absolu, les autres sommées."""
+    if len(tableau) <= n:
+        return tableau
+    ordre = tableau.abs().sum(axis=1).sort_values(ascending=False).index
+    reste = tableau.loc[ordre[n:]].sum().to_frame(autres).T
+    return pd.concat([tableau.loc[ordre[:n]], reste])
+
+
+def image(dessiner, *donnees, taille=(10, 5), **options):
+    """PNG de ``dessiner(axes, *donnees, **options)``, mis en cache selon les données et les options."""
+    cle = (dessiner.__module__, dessiner.__qualname__, cle_argument(donnees), cle_argument(options), taille)
+    png = cache_images.lire(cle)
+    if png is None:
+        from matplotlib.figure import Figure
+
+        figure = Figure(figsize=taille)
+        dessiner(figure.subplots(), *donnees, **options)
+        figure.tight_layout()
+        tampon = io.BytesIO()
+        figure.savefig(tampon, format="png")
+        png = tampon.getvalue()
+        cache_images.ecrire(cle, png)
+    return png
+
+
+def afficher(dessiner, *donnees, taille=(10, 5), **options):
+    st.image(image(dessiner, *donnees, taille=taille, **options))
+
+
+# Fonctions de dessin : (axes, données, options) -> None
+
+def barres(ax, serie, titre, libelle_x, libelle_y, annotations=False):
+    """Une barre par valeur de ``serie``, dégradé viridis ; valeurs annotées si ``annotations``."""
+    from matplotlib import colormaps
+
+    couleurs = colormaps["viridis"](np.linspace(0, 1, max(len(serie), 1)))
+    rectangles = ax.bar(serie.index.astype(str), serie.to_numpy(), color=couleurs, edgecolor="black")
+    ax.axhline(0, color="red", linestyle="--", linewidth=1.5)
+    if annotations:
+        for rectangle, valeur in zip(rectangles, serie.to_numpy()):
+            ax.text(rectangle.get_x() + rectangle.get_width() / 2, valeur, f"{valeur:.2e}",
+                    ha="center", va="bottom" if valeur > 0 else "top", fontsize=8)
+    ax.set_title(titre, fontsize=14)
+    ax.set_xlabel(libelle_x)
+    ax.set_ylabel(libelle_y)
+    ax.tick_params(axis="x", rotation=45)
+
+
+def barres_groupees(ax, tableau, titre, libelle_x, libelle_y):
+    """Barres groupées : une série par colonne de ``tableau``, un groupe par ligne."""
+    from matplotlib import colormaps
+
+    positions = np.arange(len(tableau))
+    largeur = 0.8 / max(tableau.shape[1], 1)
+    couleurs = colormaps["viridis"](np.linspace(0, 1, max(tableau.shape[1], 1)))
+    for i, (colonne, couleur) in enumerate(zip(tableau.columns, couleurs)):
+        ax.bar(positions + (i - (tableau.shape[1] - 1) / 2) * largeur, tableau[colonne].to_numpy(), largeur,
+               label=str(colonne), color=couleur, edgecolor="black")
+    ax.axhline(0, color="red", linestyle="--", linewidth=1.5)
+    ax.set_xticks(positions, tableau.index.astype(str))
+    ax.legend()
+    ax.set_title(titre, fontsize=14)
+    ax.set_xlabel(libelle_x)
+    ax.set_ylabel(libelle_y)
+    ax.tick_params(axis="x", rotation=45)
@@ -0,0 +1,92 @@
+"""Configuration, style et barre latérale de navigation partagés par toutes les pages."""
+
+from contextlib import contextmanager
+
+import streamlit as st
+
+from alm.instrumentation import FICHIER_PERFORMANCE, Profil, etape
+
+STYLE = """
+<style>
+h1 { font-size: 3rem !important; }
+h2 { font-size: 2rem !important; }
+h3 { font-size: 1.5rem !important; }
+p, li, div, .stMarkdown { font-size: 1.3rem !important; }
+button[kind="primary"] { font-size: 1.2rem !important; padding: 0.8rem 1.5rem; }
+</style>
+"""
+
+ACCUEIL = "streamlit_app.py"
+NAVIGATION = {
+    "📘 Risque de liquidité": [("📊 LCR", "pages/LCR.py"), ("🏦 NSFR", "pages/NSFR.py")],
+    "📙 Risque de taux": [("📈 EVE", "pages/EVE.py"), ("📊 MNI", "pages/MNI.py")],
+    "📗 Risque de change": [("💱 Risque de change", "pages/RISQUE_DE_CHANGE.py")],
+    "🧪 Simulation": [("🧪 Bac à sable", "pages/BAC_A_SABLE.py")],
+}
+
+
+def barre_laterale(accueil=True):
+    with st.sidebar:
+        if accueil and st.button("🏠 Accueil", key="accueil", help="Revenir à l'accueil"):
+            st.switch_page(ACCUEIL)
+
+        st.title("📁 Navigation")
+        for rubrique, pages in NAVIGATION.items():
+            with st.expander(rubrique):
+                for libelle, page in pages:
+                    if st.button(libelle, key=f"navigation_{page}"):
+                        st.switch_page(page)
+
+        st.toggle("⏱️ Mesures de performance", key="performance",
+                  help="Temps, CPU, pic mémoire et lignes par étape du calcul")
+
+
+def date_entrepot(jeux, cle):
+    """Choix de la source des données : None pour les fichiers importés, sinon une date de l'entrepôt.
+
+    Le choix n'est proposé que si l'entrepôt de positions contient tous les ``jeux`` à au moins une date.
+    """
+    # Import différé : l'entrepôt charge les moteurs de calcul, inutiles à la page d'accueil
+    from alm.entrepot import EntrepotPositions
+
+    dates = EntrepotPositions().dates_completes(jeux)
+    if not dates:
+        return None
+    source = st.radio("Source des données", ["📂 Fichiers importés", "🗄️ Entrepôt de positions"],
+                      horizontal=True, key=f"source_{cle}")
+    if source == "📂 Fichiers importés":
+        return None
+    return st.selectbox("Date d'arrêté des positions", dates[::-1], format_func=lambda d: f"{d:%d/%m/%Y}",
+                        key=f"date_entrepot_{cle}")
+
+
+@contextmanager
+def mesurer_page(page):
+    """Mesure les étapes du bloc si les mesures de performance sont activées, puis affiche l'expander "Performance".
+
+    Le temps du bloc qui n'appartient à aucune étape de calcul (graphiques,
+    tableaux, widgets) est compté dans l'étape "rendu". Les mesures sont
+    ajoutées au fichier ``ALM_PERFORMANCE_JSONL`` s'il est défini.
+    """
+    if not st.session_state.get("performance"):
+        yield
+        return
+    profil = Profil()
+    with profil.activer(), etape("rendu"):
+        yield
+    with st.expander("⏱️ Performance"):
+        st.dataframe(profil.tableau(), hide_index=True)
+        st.download_button("📥 Exporter les mesures (JSON lines)", profil.jsonl(page=page),
+                           file_name="performance.jsonl", mime="application/x-ndjson")
+    if FICHIER_PERFORMANCE:
+        try:
+            profil.exporter_jsonl(FICHIER_PERFORMANCE, page=page)
+        except OSError as e:
+            st.warning(f"⚠️ Mesures non exportées : {e}")
+
+
+def mise_en_page(titre_onglet, accueil=True):
+    """À appeler en tête de page : configuration, style commun et barre latérale."""
+    st.set_page_config(page_title=titre_onglet, layout="wide")
+    st.markdown(STYLE, unsafe_allow_html=True)
+    barre_laterale(accueil)
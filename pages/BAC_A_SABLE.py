@@ -0,0 +1,151 @@
+import time
+
+import streamlit as st
+import pandas as pd
+from alm.bac_a_sable import (ENTREES, HQLA, SORTIES, ChocChange, ChocTaux, DeplacementChange, DeplacementLCR,
+                             DeplacementNSFR, MaturiteEVE, creer_bac_a_sable)
+from alm.change import BORNES_MATURITE
+from alm.entrepot import JEUX_CHANGE, JEUX_LCR, JEUX_NSFR, EntrepotPositions
+from alm.nsfr import LIBELLES_NSFR
+from interface.mise_en_page import date_entrepot, mesurer_page, mise_en_page
+
+mise_en_page("Bac à sable ALM")
+
+st.title("🧪 Bac à sable : scénarios what-if sur le LCR, le NSFR, l'EVE et le change")
+st.markdown("Déplacer des encours entre catégories ou niveaux, modifier des maturités, choquer les taux : "
+            "tous les indicateurs chargés sont recalculés ensemble à chaque modification.")
+
+st.subheader("📂 Données de départ")
+date_positions = date_entrepot([*JEUX_LCR, *JEUX_NSFR, *JEUX_CHANGE], "bac_a_sable")
+col1, col2 = st.columns(2)
+if date_positions is None:
+    with col1:
+        fichier_balance = st.file_uploader("LCR : Balance Globale", type="xlsx")
+        fichier_echeancier = st.file_uploader("LCR : Échéancier", type="xlsx")
+        fichier_emplois = st.file_uploader("LCR : Emplois Interbancaires", type="xlsx")
+    with col2:
+        fichier_nsfr = st.file_uploader("NSFR : classeur Actifs / Passifs", type="xlsx")
+        fichier_change = st.file_uploader("Change : balance multidevise", type="xlsx")
+    fichiers_lcr = (fichier_balance, fichier_echeancier, fichier_emplois)
+    fichiers_lcr = fichiers_lcr if all(fichiers_lcr) else None
+else:
+    entrepot = EntrepotPositions()
+    fichiers_lcr = tuple(entrepot.jeu(date_positions, jeu) for jeu in JEUX_LCR)
+    fichier_nsfr = entrepot.sources(date_positions, JEUX_NSFR)
+    fichier_change = entrepot.jeu(date_positions, "change")
+fichier_eve = col2.file_uploader("EVE : classeur des positions", type="xlsx")
+date_arrete = col1.date_input("Date d'arrêté (change)", value=(date_positions or pd.Timestamp.today()).date())
+
+if st.button("🧪 Initialiser le bac à sable"):
+    with mesurer_page("Bac à sable"):
+        try:
+            st.session_state["bac_a_sable"] = creer_bac_a_sable(
+                fichiers_lcr, fichier_nsfr, fichier_eve, fichier_change, date_arrete, BORNES_MATURITE,
+            )
+            st.session_state.pop("bac_a_sable_duree", None)
+        except Exception as e:
+            st.error(f"❌ Une erreur est survenue : {e}")
+
+bac = st.session_state.get("bac_a_sable")
+if bac is None or not bac.etats:
+    st.info("⬆️ Charge au moins un jeu de données, puis initialise le bac à sable.")
+    st.stop()
+
+
+def appliquer(modification):
+    """Applique la modification et chronomètre la modification et le recalcul des indicateurs."""
+    try:
+        debut = time.perf_counter()
+        bac.appliquer(modification)
+        bac.resultats()
+        st.session_state["bac_a_sable_duree"] = time.perf_counter() - debut
+    except ValueError as e:
+        st.error(f"❌ Modification refusée : {e}")
+
+
+st.subheader("✏️ Modifications")
+onglets = dict(zip(bac.etats, st.tabs(list(bac.etats))))
+
+if "LCR" in onglets:
+    etat_lcr = bac.etats["LCR"]
+    cote = onglets["LCR"].radio("Déplacer entre", [HQLA, SORTIES, ENTREES], horizontal=True, key="cote_lcr",
+                                format_func={HQLA: "Niveaux HQLA", SORTIES: "Catégories de sorties",
+                                             ENTREES: "Catégories d'entrées"}.get)
+    with onglets["LCR"].form("lcr"):
+        c1, c2, c3 = st.columns(3)
+        source = c1.selectbox("Niveau / catégorie source", list(etat_lcr.index[cote]))
+        cible = c2.selectbox("Niveau / catégorie cible", list(etat_lcr.index[cote]))
+        montant = c3.number_input("Montant (€)", min_value=0.0, step=1e6, format="%.2f", key="montant_lcr")
+        if st.form_submit_button("Appliquer"):
+            appliquer(DeplacementLCR(cote, source, cible, montant))
+
+if "NSFR" in onglets:
+    etat_nsfr = bac.etats["NSFR"]
+    cote = onglets["NSFR"].radio("Côté", ["ASF", "RSF"], horizontal=True, key="cote_nsfr")
+    with onglets["NSFR"].form("nsfr"):
+        categories = sorted({categorie for c, categorie, _ in etat_nsfr.cases if c == cote})
+        c1, c2, c3 = st.columns(3)
+        categorie_source = c1.selectbox("Catégorie source", categories)
+        compartiment_source = c1.selectbox("Compartiment source", LIBELLES_NSFR)
+        categorie_cible = c2.selectbox("Catégorie cible", categories)
+        compartiment_cible = c2.selectbox("Compartiment cible", LIBELLES_NSFR)
+        montant = c3.number_input("Montant (€)", min_value=0.0, step=1e6, format="%.2f", key="montant_nsfr")
+        if st.form_submit_button("Appliquer"):
+            appliquer(DeplacementNSFR(cote, categorie_source, compartiment_source, categorie_cible,
+                                      compartiment_cible, montant))
+
+if "EVE" in onglets:
+    etat_eve = bac.etats["EVE"]
+    with onglets["EVE"].form("eve_choc"):
+        choc = st.slider("Choc parallèle des taux d'actualisation (pb)", -300, 300, int(round(etat_eve.choc * 1e4)),
+                         step=25)
+        if st.form_submit_button("Appliquer le choc"):
+            appliquer(ChocTaux(choc / 1e4))
+    with onglets["EVE"].form("eve_maturite"):
+        libelles = etat_eve.positions["Feuille"] + " · " + etat_eve.positions["Élément"]
+        choisies = st.multiselect("Positions", range(len(libelles)), format_func=lambda i: libelles.iloc[i])
+        maturite = st.number_input("Nouvelle maturité (années)", min_value=0.01, value=1.0, step=0.5)
+        if st.form_submit_button("Modifier la maturité") and choisies:
+            appliquer(MaturiteEVE(tuple(choisies), maturite))
+
+if "Change" in onglets:
+    etat_change = bac.etats["Change"]
+    devises = list(etat_change.devises)
+    with onglets["Change"].form("change_choc"):
+        c1, c2 = st.columns(2)
+        devise = c1.selectbox("Devise", devises)
+        variation = c2.slider("Variation du taux de change (%)", -30, 30, 0)
+        if st.form_submit_button("Appliquer le choc"):
+            appliquer(ChocChange(devise, variation / 100))
+    with onglets["Change"].form("change_deplacement"):
+        sens = st.radio("Sens", ["actif", "passif"], horizontal=True)
+        c1, c2, c3 = st.columns(3)
+        devise_source = c1.selectbox("Devise source", devises)
+        compartiment_source = c1.selectbox("Compartiment source", etat_change.libelles)
+        devise_cible = c2.selectbox("Devise cible", devises)
+        compartiment_cible = c2.selectbox("Compartiment cible", etat_change.libelles)
+        montant = c3.number_input("Montant (devise)", min_value=0.0, step=1e6, format="%.2f", key="montant_change")
+        if st.form_submit_button("Appliquer"):
+            appliquer(DeplacementChange(sens, devise_source, compartiment_source, devise_cible, compartiment_cible,
+                                        montant))
+
+st.subheader("📊 Indicateurs : base et scénario")
+if "bac_a_sable_duree" in st.session_state:
+    st.caption(f"⏱️ Dernière modification recalculée en {st.session_state['bac_a_sable_duree'] * 1000:.0f} ms")
+st.dataframe(bac.synthese().style.format({"Base": "{:,.2f}", "Scénario": "{:,.2f}", "Écart": "{:+,.2f}"}),
+             hide_index=True)
+
+resultats = bac.resultats()
+if "Change" in resultats:
+    with st.expander("💱 ENC par devise (devise locale, chocs compris)"):
+        st.dataframe(resultats["Change"].enc_devise_locale)
+if "EVE" in resultats:
+    with st.expander("📈 Valeur actualisée nette par feuille"):
+        st.dataframe(resultats["EVE"].par_feuille)
+
+with st.expander(f"📝 Journal des modifications ({len(bac.journal)})"):
+    st.dataframe(pd.DataFrame([{"Indicateur": m.indicateur, "Modification": repr(m)} for m in bac.journal]),
+                 hide_index=True)
+if st.button("↩️ Réinitialiser le scénario"):
+    del st.session_state["bac_a_sable"]
+    st.rerun()
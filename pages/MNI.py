@@ -1,114 +1,71 @@
 import streamlit as st
 import pandas as pd
-import random
-from PIL import Image
-import os
+import numpy as np
+from alm.calculs import feuilles_mni, gap_mni_fichier, simulation_mni_fichier
+from alm.entrepot import JEUX_MNI, EntrepotPositions
+from alm.mni import valeurs_par_defaut
+from interface.mise_en_page import date_entrepot, mesurer_page, mise_en_page
 
-st.set_page_config(page_title="Calcul de la MNI", layout="wide")
-st.markdown("""
-<style>
-h1 { font-size: 3rem !important; }
-h2 { font-size: 2rem !important; }
-h3 { font-size: 1.5rem !important; }
-p, li, div, .stMarkdown { font-size: 1.3rem !important; }
-button[kind="primary"] { font-size: 1.2rem !important; padding: 0.8rem 1.5rem; }
-</style>
-""", unsafe_allow_html=True)
-
-with st.sidebar:
-    st.markdown("""
-        <style>
-        .accueil-btn {
-            font-size: 1.4rem;
-            font-weight: bold;
-            color: white;
-            background-color: #F63366;
-            border: none;
-            padding: 0.6rem 1.2rem;
-            border-radius: 5px;
-            display: block;
-            text-align: center;
-            text-decoration: none;
-            margin-bottom: 1rem;
-        }
-        .accueil-btn:hover {
-            background-color: #ff4b80;
-        }
-        </style>
-    """, unsafe_allow_html=True)
-
-    if st.button("🏠 Accueil", key="accueil", help="Revenir à l'accueil"):
-        st.switch_page("streamlit_app.py")
-
-    st.title("📁 Navigation")
-
-    with st.expander("📘 Risque de liquidité"):
-        if st.button("📊 LCR"):
-            st.switch_page("pages/LCR.py")
-        if st.button("🏦 NSFR"):
-            st.switch_page("pages/NSFR.py")
-
-    with st.expander("📙 Risque de taux"):
-        if st.button("📈 EVE"):
-            st.switch_page("pages/EVE.py")
-        if st.button("📈 MNI"):
-            st.switch_page("pages/MNI.py")
-
-    with st.expander("📗 Risque de change"):
-        if st.button("💱 Risque de change"):
-            st.switch_page("pages/RISQUE_DE_CHANGE.py")
+mise_en_page("Calcul de la MNI")
 
 st.title("📊 Calculateur de MNI (Marge Nette d'Intérêt)")
 
-fichier_excel = st.file_uploader("📂 Importer le fichier Excel contenant les feuilles 'Actifs' et 'Passifs'", type="xlsx")
-
-class Banque:
-    def __init__(self, actifs, passifs):
-        self.actifs = actifs
-        self.passifs = passifs
-
-    def calcul_mni(self):
-        interets_produits = sum(self.actifs.values())
-        interets_charges = sum(self.passifs.values())
-        return round(interets_produits - interets_charges, 3)
-
-    def ajuster_taux_interet(self):
-        for key in self.actifs:
-            facteur = round(random.uniform(1, 3), 2)
-            self.actifs[key] *= facteur
+date_positions = date_entrepot(JEUX_MNI, "mni")
+if date_positions is None:
+    fichier_excel = st.file_uploader("📂 Importer le fichier Excel contenant les feuilles 'Actifs' et 'Passifs'", type="xlsx")
+else:
+    fichier_excel = EntrepotPositions().sources(date_positions, JEUX_MNI)
 
-        for key in self.passifs:
-            facteur = round(random.uniform(0.1, 2), 2)
-            self.passifs[key] *= facteur
+col1, col2, col3, col4 = st.columns(4)
+horizon = col1.slider("Horizon (mois)", min_value=12, max_value=36, value=12, step=6)
+nb_simulations = col2.number_input("Nombre de simulations", min_value=1_000, max_value=1_000_000, value=10_000, step=1_000)
+volatilite = col3.number_input("Volatilité annuelle des taux (%)", min_value=0.0, value=1.0, step=0.1)
+graine = col4.number_input("Graine aléatoire", min_value=0, value=42, step=1)
+choc_pb = st.slider("Choc de taux parallèle pour le gap (pb)", min_value=-300, max_value=300, value=100, step=25)
 
 if fichier_excel and st.button("Calculer la MNI"):
-    try:
-        df_actifs = pd.read_excel(fichier_excel, sheet_name="Actifs")
-        df_passifs = pd.read_excel(fichier_excel, sheet_name="Passifs")
-
-        data_actifs = dict(zip(df_actifs["Catégorie"], df_actifs["Montant (€)"]))
-        data_passifs = dict(zip(df_passifs["Catégorie"], df_passifs["Montant (€)"]))
-
-        banque = Banque(data_actifs, data_passifs)
-
-        mni_avant = banque.calcul_mni()
-        st.metric("📅 MNI avant ajustement des taux (€)", f"{mni_avant:,.2f}")
-
-        banque.ajuster_taux_interet()
-        mni_apres = banque.calcul_mni()
-        st.metric("🔄 MNI après ajustement des taux (€)", f"{mni_apres:,.2f}")
-
-        st.subheader("📈 Évolution de la MNI")
-        st.line_chart({"Avant ajustement": [mni_avant], "Après ajustement": [mni_apres]})
-
-        with st.expander("📊 Détail des données actuelles (après ajustement)"):
-            st.write("### Actifs")
-            st.dataframe(pd.DataFrame(list(banque.actifs.items()), columns=["Catégorie", "Montant ajusté (€)"]))
-
-            st.write("### Passifs")
-            st.dataframe(pd.DataFrame(list(banque.passifs.items()), columns=["Catégorie", "Montant ajusté (€)"]))
-
-    except Exception as e:
-        st.error(f"❌ Une erreur est survenue : {e}")
+    with mesurer_page("MNI"):
+        try:
+            df_actifs, df_passifs = feuilles_mni(fichier_excel)
+            mni_avant, mni_choquee, gap = gap_mni_fichier(fichier_excel, choc_pb / 10_000, horizon)
+            for message in valeurs_par_defaut(df_actifs, df_passifs):
+                st.warning(f"⚠️ Valeurs par défaut : {message}.")
+            st.metric("📅 MNI sans choc de taux (€)", f"{mni_avant:,.2f}")
+
+            # Gap de révision : impact d'un choc immédiat sur la MNI de l'horizon
+            st.metric(f"⚡ MNI sur {horizon} mois après un choc de {choc_pb} pb (€)",
+                      f"{mni_choquee:,.2f}",
+                      delta=f"{gap['Impact MNI (€)'].sum():,.2f}")
+            with st.expander("📊 Gap de taux par compartiment de révision"):
+                st.dataframe(gap)
+                st.bar_chart(gap["Gap (€)"])
+
+            # Simulation Monte Carlo des trajectoires de taux
+            resultat = simulation_mni_fichier(fichier_excel, horizon=horizon, nb_simulations=int(nb_simulations),
+                                              sigma=volatilite / 100, graine=int(graine))
+            col1, col2, col3 = st.columns(3)
+            col1.metric(f"📈 MNI moyenne sur {horizon} mois (€)", f"{resultat.moyenne:,.2f}")
+            col2.metric("📉 MNI au percentile 5 % (€)", f"{resultat.percentiles[5]:,.2f}")
+            col3.metric("⚠️ MNI-at-Risk 95 % (€)", f"{resultat.mni_at_risk(0.95):,.2f}")
+
+            st.subheader("📈 Évolution de la MNI cumulée (percentiles)")
+            st.line_chart(resultat.trajectoires[["P5", "P50", "P95"]])
+
+            st.subheader("📊 Distribution de la MNI simulée")
+            effectifs, bornes = np.histogram(resultat.mni, bins=50)
+            st.bar_chart(pd.Series(effectifs, index=np.round((bornes[:-1] + bornes[1:]) / 2, 0)))
+
+            with st.expander("📊 Percentiles de la MNI simulée"):
+                st.dataframe(pd.DataFrame({"Percentile": list(resultat.percentiles), "MNI (€)": list(resultat.percentiles.values())}))
+
+            with st.expander("📊 Détail des données"):
+                st.write("### Actifs")
+                st.dataframe(df_actifs)
+
+                st.write("### Passifs")
+                st.dataframe(df_passifs)
+
+        except Exception as e:
+            st.error(f"❌ Une erreur est survenue : {e}")
 else:
     st.info("⬆️ Charge un fichier Excel, puis clique sur le bouton pour lancer le calcul.")
@@ -2,39 +2,9 @@ import streamlit as st
 from datetime import datetime
 from PIL import Image
 import os
+from interface.mise_en_page import mise_en_page
 
-st.set_page_config(page_title="Accueil - ALM", layout="wide")
-
-# 🔧 CSS personnalisé pour agrandir les textes
-st.markdown("""
-<style>
-h1 { font-size: 3rem !important; }
-h2 { font-size: 2rem !important; }
-h3 { font-size: 1.5rem !important; }
-p, li, div, .stMarkdown { font-size: 1.3rem !important; }
-button[kind="primary"] { font-size: 1.2rem !important; padding: 0.8rem 1.5rem; }
-</style>
-""", unsafe_allow_html=True)
-
-# 📂 Barre latérale avec navigation personnalisée
-with st.sidebar:
-    st.title("📂 Navigation")
-
-    with st.expander("📘 Risque de liquidité"):
-        if st.button("💧 LCR"):
-            st.switch_page("pages/LCR.py")
-        if st.button("🏦 NSFR"):
-            st.switch_page("pages/NSFR.py")
-
-    with st.expander("📙 Risque de taux"):
-        if st.button("📈 EVE"):
-            st.switch_page("pages/EVE.py")
-        if st.button("📊 MNI"):
-            st.switch_page("pages/MNI.py")  
-
-    with st.expander("📗 Risque de change"):
-        if st.button("💱 Risque de change"):
-            st.switch_page("pages/RISQUE_DE_CHANGE.py")
+mise_en_page("Accueil - ALM", accueil=False)
 
 # 🖼️ Titre et logo
 col_title, col_logo = st.columns([8, 1])
@@ -61,6 +31,7 @@ Utilisez la barre latérale pour naviguer entre les différents modules :
 - 🏦 **NSFR** : Net Stable Funding Ratio  
 - 💱 **Risque de change** : Sensibilité au choc et GAP de change  
 - 📊 **MNI** : Net Interest Margin
+- 🧪 **Bac à sable** : scénarios what-if sur tous les indicateurs
 """)
 
 # 🔗 Accès rapide
@@ -73,6 +44,7 @@ with col1:
 with col2:
     st.page_link("pages/NSFR.py", label="🏦 NSFR")
     st.page_link("pages/RISQUE_DE_CHANGE.py", label="💱 Risque de change")
+    st.page_link("pages/BAC_A_SABLE.py", label="🧪 Bac à sable")
 
 # ❓ Expander ALM
 with st.expander("❓ Qu’est-ce que l’ALM ?"):